@@ -1,9 +1,9 @@
 import streamlit as st
 
-from config import SHEET_ID
 from ui.login import login
-from ui.registro import mostrar_registro_tab
-from ui.resumen import mostrar_resumen_insights
+from utils.arranque import importar, precargar_en_segundo_plano
+
+# Arriba solo Streamlit y el login: pandas, gspread y los servicios se importan recién cuando hacen falta.
 
 st.set_page_config(page_title="Registro de Asistencia", page_icon="icon.jpg", layout="centered")
 
@@ -161,8 +161,16 @@ css = """
 st.markdown(css, unsafe_allow_html=True)
 
 if not login():
+    # Mientras el entrenador escribe la clave, los módulos pesados se van importando en segundo plano.
+    precargar_en_segundo_plano()
     st.stop()
 
+SHEET_ID = importar("config").SHEET_ID
+
+# Roster y asistencias se piden en paralelo apenas entra el entrenador, antes de dibujar la pestaña.
+if "precarga" not in st.session_state:
+    st.session_state.precarga = importar("services.precarga").iniciar_precarga(SHEET_ID)
+
 st.image("icon.jpg", width=110)
 
 st.markdown('<div class="tabbar">', unsafe_allow_html=True)
@@ -176,7 +184,11 @@ tab_seleccion = st.radio(
 st.markdown("</div>", unsafe_allow_html=True)
 
 if tab_seleccion == "Registro":
-    mostrar_registro_tab(SHEET_ID)
+    importar("ui.registro").mostrar_registro_tab(SHEET_ID)
 
 if tab_seleccion == "Resumen":
-    mostrar_resumen_insights(SHEET_ID)
+    importar("ui.resumen").mostrar_resumen_insights(SHEET_ID)
+
+# ?admin=1 solo muestra el panel a quien entró con la clave de administración.
+if st.query_params.get("admin") == "1" and st.session_state.get("es_admin"):
+    importar("ui.admin").mostrar_panel_admin(SHEET_ID)
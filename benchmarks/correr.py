@@ -0,0 +1,200 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+# Mide las rutas de datos contra la simulación de Sheets en memoria:
+#   python -m benchmarks.correr --filas 10000 100000 1000000
+# Cada corrida se guarda en benchmarks/resultados/ y se compara con la anterior.
+
+CARPETA_RESULTADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resultados")
+FILAS_POR_DEFECTO = [10_000, 100_000, 1_000_000]
+
+
+def _preparar_entorno(carpeta):
+    # Snapshot y cola van a una carpeta temporal: tienen que existir antes de importar los servicios.
+    os.environ["ASISTENCIA_SNAPSHOT"] = os.path.join(carpeta, "snapshot.sqlite3")
+    os.environ["ASISTENCIA_COLA"] = os.path.join(carpeta, "cola.sqlite3")
+    os.environ["ASISTENCIA_BACKEND"] = "memoria"
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def _medir(cliente, ejecutar, preparar=None, repeticiones=3):
+    tiempos = []
+    llamadas = []
+    for _ in range(repeticiones):
+        if preparar:
+            preparar()
+        antes = dict(cliente.llamadas)
+        inicio = time.perf_counter()
+        ejecutar()
+        tiempos.append(time.perf_counter() - inicio)
+        llamadas.append({tipo: cliente.llamadas[tipo] - antes.get(tipo, 0) for tipo in ("lectura", "escritura")})
+
+    # El pico de memoria va en una corrida aparte: tracemalloc distorsiona los tiempos.
+    if preparar:
+        preparar()
+    tracemalloc.start()
+    try:
+        ejecutar()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "seg": statistics.median(tiempos),
+        "seg_min": min(tiempos),
+        "pico_mb": pico / 2**20,
+        "lecturas": max(l["lectura"] for l in llamadas),
+        "escrituras": max(l["escritura"] for l in llamadas),
+    }
+
+
+def correr_tamano(filas, latencia, repeticiones, particionar=False):
+    from config import SHEET_ID
+    from services import conexion, cuota, particiones, snapshot
+    from services.almacenamiento import AlmacenamientoSheets, usar_almacenamiento
+    from services.almacenamiento.memoria import ClienteMemoria
+    from services.asistencia import generar_resumen
+    from services.google_sheets import obtener_asistencias_previas, upsert_asistencias
+    from services.insights import calcular_insights
+    from services.plantel import armar_plantel
+    from ui.categorias import filtrar_jugadoras
+
+    from benchmarks.datos import generar_hojas
+
+    hoy = date.today()
+    hojas = generar_hojas(filas, hasta=hoy)
+    jugadoras = filtrar_jugadoras(armar_plantel(hojas["Jugadoras"][1:]), "Primera")
+
+    # Sin cuota: se cuentan las llamadas, no se las limita.
+    cuota.configurar(0, 0)
+    cliente = ClienteMemoria({SHEET_ID: hojas}, latencia_seg=latencia, lecturas_por_minuto=0, escrituras_por_minuto=0)
+    conexion.usar_cliente(cliente)
+    usar_almacenamiento(SHEET_ID, AlmacenamientoSheets(SHEET_ID))
+    if particionar:
+        particiones.migrar(SHEET_ID)
+
+    desde = hoy - timedelta(days=45)
+    lotes = iter(range(1, 10_000))
+
+    def recargar():
+        for hoja in particiones.hojas_del_rango(SHEET_ID):
+            snapshot.invalidar(SHEET_ID, hoja)
+
+    def resumen():
+        return generar_resumen(SHEET_ID, desde, hoy, jugadoras)
+
+    def guardar():
+        # Un entrenamiento nuevo para toda la categoría y una corrección del último.
+        nueva = (hoy + timedelta(days=next(lotes))).strftime("%Y-%m-%d")
+        lote = [[nueva, j, "SÍ", "NO", ""] for j in jugadoras]
+        lote += [[hoy.strftime("%Y-%m-%d"), j, "SÍ", "SÍ", ""] for j in jugadoras[:5]]
+        upsert_asistencias(SHEET_ID, "Asistencias", lote)
+
+    casos = [
+        ("generar_resumen (recarga completa)", resumen, recargar),
+        ("generar_resumen", resumen, None),
+        ("obtener_asistencias_previas", lambda: obtener_asistencias_previas(hoy), None),
+        ("upsert_asistencias", guardar, None),
+    ]
+    resultados = []
+    for nombre, ejecutar, preparar in casos:
+        resultados.append(dict(caso=nombre, filas=filas, **_medir(cliente, ejecutar, preparar, repeticiones)))
+
+    datos_resumen = resumen()
+    resultados.append(
+        dict(
+            caso="calcular_insights",
+            filas=filas,
+            **_medir(cliente, lambda: calcular_insights(datos_resumen, jugadoras), None, repeticiones),
+        )
+    )
+    return resultados
+
+
+def _ultimo_guardado():
+    if not os.path.isdir(CARPETA_RESULTADOS):
+        return None
+    archivos = sorted(f for f in os.listdir(CARPETA_RESULTADOS) if f.endswith(".json"))
+    if not archivos:
+        return None
+    with open(os.path.join(CARPETA_RESULTADOS, archivos[-1]), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _guardar(corrida):
+    os.makedirs(CARPETA_RESULTADOS, exist_ok=True)
+    nombre = datetime.now().strftime("%Y%m%d-%H%M%S")
+    if corrida["commit"]:
+        nombre += f"-{corrida['commit']}"
+    ruta = os.path.join(CARPETA_RESULTADOS, f"{nombre}.json")
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(corrida, f, ensure_ascii=False, indent=2)
+    return ruta
+
+
+def _variacion(actual, anterior):
+    if not anterior:
+        return ""
+    return f"{(actual - anterior) / anterior * 100:+.0f}%"
+
+
+def _imprimir(resultados, anterior):
+    previos = {(r["caso"], r["filas"]): r for r in (anterior or {}).get("resultados", [])}
+    print(f"{'caso':<36} {'filas':>9} {'seg':>9} {'Δ':>6} {'pico MB':>9} {'Δ':>6} {'lect':>5} {'escr':>5}")
+    for r in resultados:
+        previo = previos.get((r["caso"], r["filas"]), {})
+        print(
+            f"{r['caso']:<36} {r['filas']:>9} {r['seg']:>9.3f} {_variacion(r['seg'], previo.get('seg')):>6} "
+            f"{r['pico_mb']:>9.1f} {_variacion(r['pico_mb'], previo.get('pico_mb')):>6} "
+            f"{r['lecturas']:>5} {r['escrituras']:>5}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de las rutas de datos sobre historiales sintéticos.")
+    parser.add_argument("--filas", type=int, nargs="+", default=FILAS_POR_DEFECTO)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--latencia", type=float, default=0.0, help="Segundos simulados por llamada a la API.")
+    parser.add_argument("--particionar", action="store_true", help="Migra a hojas mensuales antes de medir.")
+    parser.add_argument("--no-guardar", action="store_true")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        _preparar_entorno(carpeta)
+        resultados = []
+        for filas in args.filas:
+            resultados.extend(correr_tamano(filas, args.latencia, args.repeticiones, args.particionar))
+
+    corrida = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "latencia": args.latencia,
+        "particionado": args.particionar,
+        "resultados": resultados,
+    }
+    _imprimir(resultados, _ultimo_guardado())
+    if not args.no_guardar:
+        print(f"\nGuardado en {_guardar(corrida)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
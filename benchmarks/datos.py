@@ -0,0 +1,74 @@
+import random
+from datetime import date, timedelta
+
+from services.almacenamiento import ENCABEZADOS_ASISTENCIAS, ENCABEZADOS_JUGADORAS
+
+# Días de entrenamiento por categoría (lunes = 0): "1" es Primera y "2" Intermedia, como en la hoja.
+DIAS_ENTRENAMIENTO = {"1": (0, 2, 4), "2": (1, 3)}
+FECHAS_MALFORMADAS = ["31/02/2024", "2024-13-01", "ayer", "", "2024-1-", "12-03-2024"]
+COMENTARIOS = ["LESIONADA", "VIAJE", "ESTUDIO", "AVISÓ", "TURNO MÉDICO"]
+
+
+def jugadoras_para(filas):
+    # Plantel que crece con el historial para que las temporadas tengan un largo razonable.
+    return min(600, max(40, filas // 2000))
+
+
+def generar_plantel(cantidad, semilla=0):
+    azar = random.Random(semilla)
+    filas = []
+    for i in range(cantidad):
+        categoria = "1" if i % 2 == 0 else "2"
+        if azar.random() < 0.03:
+            categoria = "1 y 2"
+        filas.append([f"Jugadora {i + 1:04d}", categoria])
+    return filas
+
+
+def generar_historial(filas, plantel, semilla=0, hasta=None):
+    # Sesiones hacia atrás desde "hasta" hasta juntar las filas pedidas. Cada sesión registra a todo el
+    # plantel de la categoría; ~1% son guardados repetidos de la misma (Fecha, Jugadora) y ~0,5% tienen
+    # la fecha mal cargada.
+    azar = random.Random(semilla)
+    hasta = hasta or date.today()
+    por_categoria = {}
+    for nombre, categoria in plantel:
+        por_categoria.setdefault(categoria[0], []).append(nombre)
+
+    sesiones = []
+    total = 0
+    dia = hasta
+    while total < filas:
+        for categoria, dias in DIAS_ENTRENAMIENTO.items():
+            if dia.weekday() not in dias:
+                continue
+            sesion = []
+            for nombre in por_categoria.get(categoria, []):
+                asistio = azar.random() < 0.8
+                fila = [
+                    dia.strftime("%Y-%m-%d"),
+                    nombre,
+                    "SÍ" if asistio else "NO",
+                    "SÍ" if asistio and azar.random() < 0.1 else "NO",
+                    azar.choice(COMENTARIOS) if azar.random() < 0.05 else "",
+                ]
+                if azar.random() < 0.005:
+                    fila[0] = azar.choice(FECHAS_MALFORMADAS)
+                sesion.append(fila)
+                if azar.random() < 0.01:
+                    sesion.append(fila[:2] + ["SÍ" if fila[2] == "NO" else "NO", "NO", "CORREGIDO"])
+            sesiones.append(sesion)
+            total += len(sesion)
+        dia -= timedelta(days=1)
+
+    # La hoja crece hacia abajo: lo más viejo arriba.
+    historial = [fila for sesion in reversed(sesiones) for fila in sesion]
+    return historial[len(historial) - filas :]
+
+
+def generar_hojas(filas, jugadoras=None, semilla=0, hasta=None):
+    plantel = generar_plantel(jugadoras or jugadoras_para(filas), semilla)
+    return {
+        "Asistencias": [ENCABEZADOS_ASISTENCIAS] + generar_historial(filas, plantel, semilla, hasta),
+        "Jugadoras": [ENCABEZADOS_JUGADORAS] + plantel,
+    }
@@ -1,6 +1,8 @@
 # config.py
+import json
+import os
+
 from pytz import timezone
-import streamlit as st
 
 # Zona horaria Argentina
 ARG_TZ = timezone("America/Argentina/Buenos_Aires")
@@ -8,5 +10,19 @@ ARG_TZ = timezone("America/Argentina/Buenos_Aires")
 # ID del Google Sheet
 SHEET_ID = "1MIzfkUB9kOsHyvNKVfBcS0VzmGbJnE4w8ufnvxHd5Po"
 
-# Credenciales (dict ya cargado desde secrets.toml)
-CREDENTIALS_DICT = st.secrets["credentials"]
+# Dónde viven los datos: "sheets" (Google Sheets), "sqlite" (archivo local) o "memoria" (simulación de Sheets)
+BACKEND = os.environ.get("ASISTENCIA_BACKEND", "sheets")
+RUTA_SQLITE = os.environ.get("ASISTENCIA_SQLITE", "asistencias.sqlite3")
+# Sin Streamlit (línea de comandos, cron): JSON de la cuenta de servicio en lugar de secrets.toml
+RUTA_CREDENCIALES = os.environ.get("ASISTENCIA_CREDENCIALES", "")
+
+
+def obtener_credenciales():
+    # Credenciales (dict ya cargado desde secrets.toml). Se leen recién al conectarse a Sheets,
+    # así los backends locales funcionan sin secrets.
+    if RUTA_CREDENCIALES:
+        with open(RUTA_CREDENCIALES, encoding="utf-8") as f:
+            return json.load(f)
+    import streamlit as st
+
+    return st.secrets["credentials"]
@@ -0,0 +1,225 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from services import tabla
+
+# Sumas acumuladas sobre la tabla compacta, por (sheet_id, hoja), en un bloque por mes. Cada bloque tiene los
+# días de entrenamiento del mes y, por jugadora, filas, presencias y tardanzas acumuladas día por día
+# (matrices jugadoras × días + 1). Lo de cualquier rango sale de restar dos columnas por jugadora y mes, así
+# que mover el rango en Resumen no recorre el historial.
+# Una escritura corrige solo los bloques de los meses que tocó: los meses cerrados no se vuelven a contar.
+# Los entrenamientos dependen del grupo de jugadoras (cuenta un día si alguna del grupo tiene fila): se
+# acumulan por bloque y grupo la primera vez que se piden.
+
+CAMPOS = ("filas", "presencias", "tardanzas")
+MAX_GRUPOS = 16
+
+_lock = threading.Lock()
+# (sheet_id, hoja) -> índice
+_indices = {}
+
+
+def _contar(jugadoras, dias, dia, jugadora, estado):
+    # Matrices jugadoras × días con lo que suma cada fila, en el orden de CAMPOS.
+    ancho = len(dias)
+    celda = jugadora.astype(np.int64) * ancho + np.searchsorted(dias, dia)
+    pesos = (None, (estado & tabla.ASISTIO) != 0, (estado & tabla.TARDE) != 0)
+    return [np.bincount(celda, weights=p, minlength=jugadoras * ancho).reshape(jugadoras, ancho) for p in pesos]
+
+
+def _acumular(dias, conteos):
+    bloque = {"dias": dias, "grupos": OrderedDict()}
+    for campo, conteo in zip(CAMPOS, conteos):
+        acumulado = np.zeros((conteo.shape[0], conteo.shape[1] + 1), dtype=np.int32)
+        acumulado[:, 1:] = np.cumsum(conteo, axis=1)
+        acumulado.flags.writeable = False
+        bloque[campo] = acumulado
+    return bloque
+
+
+def _bloque(jugadoras, dia, jugadora, estado):
+    dias = np.unique(dia)
+    return _acumular(dias, _contar(jugadoras, dias, dia, jugadora, estado))
+
+
+def _corregir(bloque, jugadoras, quitadas, sumadas):
+    # Vuelve a conteos por día, resta lo que se pisó, suma lo escrito y acumula de nuevo. None si el mes
+    # quedó sin filas.
+    dias = np.union1d(bloque["dias"], sumadas[0]).astype(np.int32)
+    columnas = np.searchsorted(dias, bloque["dias"])
+    anteriores = bloque["filas"].shape[0]
+    conteos = []
+    for campo, menos, mas in zip(CAMPOS, _contar(jugadoras, dias, *quitadas), _contar(jugadoras, dias, *sumadas)):
+        conteo = mas - menos
+        conteo[:anteriores, columnas] += np.diff(bloque[campo], axis=1)
+        conteos.append(conteo)
+    # Un día sin ninguna fila deja de ser un entrenamiento.
+    con_filas = conteos[0].sum(axis=0) > 0
+    if not con_filas.any():
+        return None
+    return _acumular(dias[con_filas], [c[:, con_filas] for c in conteos])
+
+
+def _construir(compacta):
+    validos = np.flatnonzero(compacta["dia"] != tabla.DIA_INVALIDO)
+    orden = validos[np.argsort(compacta["dia"][validos], kind="stable")]
+    dia, jugadora, estado = (compacta[c][orden] for c in ("dia", "jugadora", "estado"))
+    meses, cortes = np.unique(tabla.meses_de(dia), return_index=True)
+    limites = [*cortes.tolist(), len(dia)]
+    jugadoras = len(compacta["jugadoras"])
+    bloques = {
+        mes: _bloque(jugadoras, dia[a:b], jugadora[a:b], estado[a:b])
+        for mes, a, b in zip(meses.tolist(), limites, limites[1:])
+    }
+    return _indice(compacta["version"], compacta["jugadoras"], compacta["codigos"], bloques)
+
+
+def _indice(version, jugadoras, codigos, bloques):
+    return {
+        "version": version,
+        "jugadoras": jugadoras,
+        "codigos": codigos,
+        "meses": np.array(sorted(bloques), dtype=np.int32),
+        "bloques": bloques,
+    }
+
+
+def obtener(sheet_id, hoja="Asistencias", version=None):
+    compacta = tabla.obtener(sheet_id, hoja, version)
+    clave = (sheet_id, hoja)
+    with _lock:
+        indice = _indices.get(clave)
+        if indice is None or indice["version"] != compacta["version"]:
+            indice = _indices[clave] = _construir(compacta)
+        return indice
+
+
+def registrar_escritura(sheet_id, hoja, version_anterior, version_nueva, cambios):
+    # cambios: lo que devuelve tabla.registrar_escritura. Solo se rehacen los bloques de los meses tocados.
+    clave = (sheet_id, hoja)
+    with _lock:
+        indice = _indices.get(clave)
+        if indice is None:
+            return
+        if cambios is None or indice["version"] != version_anterior or version_nueva is None:
+            _indices.pop(clave, None)
+            return
+
+        jugadoras = len(cambios["jugadoras"])
+        validas = {}
+        for lado in ("quitadas", "sumadas"):
+            dia, jugadora, estado = cambios[lado]
+            ok = dia != tabla.DIA_INVALIDO
+            validas[lado] = (dia[ok], jugadora[ok], estado[ok], tabla.meses_de(dia[ok]))
+        bloques = dict(indice["bloques"])
+        vacio = {"dias": np.empty(0, np.int32), **{c: np.zeros((0, 1), np.int32) for c in CAMPOS}}
+        for mes in set(validas["quitadas"][3].tolist()) | set(validas["sumadas"][3].tolist()):
+            del_mes = {lado: tuple(c[meses == mes] for c in (d, j, e)) for lado, (d, j, e, meses) in validas.items()}
+            bloque = _corregir(bloques.get(mes, vacio), jugadoras, del_mes["quitadas"], del_mes["sumadas"])
+            if bloque is None:
+                bloques.pop(mes, None)
+            else:
+                bloques[mes] = bloque
+        _indices[clave] = _indice(version_nueva, cambios["jugadoras"], indice["codigos"], bloques)
+
+
+def _entrenamientos(bloque, codigos):
+    clave = None if codigos is None else frozenset(codigos.tolist())
+    with _lock:
+        grupo = bloque["grupos"].get(clave)
+        if grupo is not None:
+            bloque["grupos"].move_to_end(clave)
+            return grupo
+    if codigos is None:
+        # Cada día del bloque tiene al menos una fila.
+        tiene = np.ones(len(bloque["dias"]), dtype=bool)
+    else:
+        tiene = (np.diff(bloque["filas"][codigos], axis=1) > 0).any(axis=0)
+    grupo = (tiene, np.concatenate(([0], np.cumsum(tiene))))
+    with _lock:
+        bloque["grupos"][clave] = grupo
+        while len(bloque["grupos"]) > MAX_GRUPOS:
+            bloque["grupos"].popitem(last=False)
+    return grupo
+
+
+def _consultar_hoja(indice, desde, hasta, jugadoras):
+    # Devuelve (por_mes_jugadora, {mes: entrenamientos}, días de entrenamiento del rango) o None.
+    primero = None if desde is None else tabla.dia_ordinal(desde)
+    ultimo = None if hasta is None else tabla.dia_ordinal(hasta)
+    meses = indice["meses"]
+    desde_mes = 0 if primero is None else np.searchsorted(meses, tabla.meses_de(np.array([primero]))[0], "left")
+    hasta_mes = len(meses) if ultimo is None else np.searchsorted(meses, tabla.meses_de(np.array([ultimo]))[0], "right")
+    codigos = None
+    if jugadoras is not None:
+        codigos = np.array(sorted(indice["codigos"][j] for j in jugadoras if j in indice["codigos"]), dtype=np.int64)
+        if not len(codigos):
+            return None
+
+    columnas = {"Mes": [], "Jugadora": [], "Presencias": [], "Tardanzas": []}
+    entrenamientos = {}
+    dias_rango = []
+    for mes in meses[desde_mes:hasta_mes].tolist():
+        bloque = indice["bloques"][mes]
+        dias = bloque["dias"]
+        inicio = 0 if primero is None else int(np.searchsorted(dias, primero, "left"))
+        fin = len(dias) if ultimo is None else int(np.searchsorted(dias, ultimo, "right"))
+        cantidad = bloque["filas"].shape[0]
+        cuales = np.arange(cantidad) if codigos is None else codigos[codigos < cantidad]
+        if inicio >= fin or not len(cuales):
+            continue
+        # Dos lecturas por jugadora: el acumulado al final del rango menos el del principio.
+        filas = bloque["filas"][cuales, fin] - bloque["filas"][cuales, inicio]
+        cuales = cuales[filas > 0]
+        if not len(cuales):
+            continue
+        columnas["Mes"].append(np.full(len(cuales), mes, dtype=np.int64))
+        columnas["Jugadora"].append(cuales)
+        columnas["Presencias"].append(bloque["presencias"][cuales, fin] - bloque["presencias"][cuales, inicio])
+        columnas["Tardanzas"].append(bloque["tardanzas"][cuales, fin] - bloque["tardanzas"][cuales, inicio])
+        tiene, acumulado = _entrenamientos(bloque, None if codigos is None else codigos[codigos < cantidad])
+        entrenamientos[mes] = int(acumulado[fin] - acumulado[inicio])
+        dias_rango.append(dias[inicio:fin][tiene[inicio:fin]])
+    if not entrenamientos:
+        return None
+
+    por_mes_jugadora = pd.DataFrame({c: np.concatenate(v).astype(np.int64) for c, v in columnas.items()})
+    por_mes_jugadora["Jugadora"] = np.array(indice["jugadoras"], dtype=object)[por_mes_jugadora["Jugadora"]]
+    return por_mes_jugadora, entrenamientos, np.concatenate(dias_rango)
+
+
+def consultar(indices, desde=None, hasta=None, jugadoras=None):
+    # Presencias y tardanzas por (Mes, Jugadora) y entrenamientos por mes de las filas del rango, como los
+    # arma armar_resumen. None si no queda ninguna fila.
+    jugadoras = None if jugadoras is None else set(jugadoras)
+    partes = [p for p in (_consultar_hoja(i, desde, hasta, jugadoras) for i in indices) if p is not None]
+    if not partes:
+        return None
+
+    if len(partes) == 1:
+        por_mes_jugadora = partes[0][0].sort_values(["Mes", "Jugadora"], ignore_index=True)
+        entrenamientos = partes[0][1]
+    else:
+        # La hoja base y la partición de un mes pueden tener el mismo día: se cuentan los días sin repetir.
+        por_mes_jugadora = (
+            pd.concat([p[0] for p in partes], ignore_index=True)
+            .groupby(["Mes", "Jugadora"], sort=True)[["Presencias", "Tardanzas"]]
+            .sum()
+            .reset_index()
+        )
+        dias = np.unique(np.concatenate([p[2] for p in partes]))
+        meses, conteos = np.unique(tabla.meses_de(dias), return_counts=True)
+        entrenamientos = dict(zip(meses.tolist(), conteos.tolist()))
+
+    por_mes_jugadora["Mes"] = pd.PeriodIndex.from_ordinals(por_mes_jugadora["Mes"].to_numpy(), freq="M")
+    meses = sorted(entrenamientos)
+    entrenamientos_por_mes = pd.DataFrame(
+        {
+            "Mes": pd.PeriodIndex.from_ordinals(np.array(meses, dtype=np.int64), freq="M"),
+            "Entrenamientos del mes": np.array([entrenamientos[m] for m in meses], dtype=np.int64),
+        }
+    )
+    return por_mes_jugadora, entrenamientos_por_mes
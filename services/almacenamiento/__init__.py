@@ -0,0 +1,57 @@
+import threading
+
+import config
+from services import conexion
+from services.almacenamiento.base import (
+    Almacenamiento,
+    ENCABEZADOS_ASISTENCIAS,
+    ENCABEZADOS_JUGADORAS,
+    filas_resumen,
+)
+from services.almacenamiento.sheets import AlmacenamientoSheets
+
+__all__ = [
+    "Almacenamiento",
+    "AlmacenamientoSheets",
+    "ENCABEZADOS_ASISTENCIAS",
+    "ENCABEZADOS_JUGADORAS",
+    "filas_resumen",
+    "obtener_almacenamiento",
+    "usar_almacenamiento",
+]
+
+_lock = threading.Lock()
+_instancias = {}
+
+
+def _crear(sheet_id, tipo):
+    if tipo == "sheets":
+        return AlmacenamientoSheets(sheet_id)
+    if tipo == "memoria":
+        from services.almacenamiento.memoria import ClienteMemoria
+
+        hojas = {"Asistencias": [ENCABEZADOS_ASISTENCIAS], "Jugadoras": [ENCABEZADOS_JUGADORAS]}
+        conexion.usar_cliente(ClienteMemoria({sheet_id: hojas}))
+        return AlmacenamientoSheets(sheet_id)
+    if tipo == "sqlite":
+        from services.almacenamiento.sqlite import AlmacenamientoSQLite
+
+        return AlmacenamientoSQLite(sheet_id, config.RUTA_SQLITE)
+    raise ValueError(f"Backend de almacenamiento desconocido: {tipo}")
+
+
+def obtener_almacenamiento(sheet_id):
+    with _lock:
+        almacenamiento = _instancias.get(sheet_id)
+        if almacenamiento is None:
+            almacenamiento = _crear(sheet_id, config.BACKEND)
+            _instancias[sheet_id] = almacenamiento
+        return almacenamiento
+
+
+def usar_almacenamiento(sheet_id, almacenamiento):
+    with _lock:
+        if almacenamiento is None:
+            _instancias.pop(sheet_id, None)
+        else:
+            _instancias[sheet_id] = almacenamiento
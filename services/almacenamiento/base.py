@@ -0,0 +1,83 @@
+import math
+import numbers
+
+ENCABEZADOS_ASISTENCIAS = ["Fecha", "Jugadora", "Asistió", "Llegó tarde", "Comentario"]
+ENCABEZADOS_JUGADORAS = ["Jugadora", "Categoría"]
+
+
+def texto_resumen(valor):
+    # Una celda del resumen como texto, sin depender del formato regional de la planilla: así se compara
+    # lo que se escribió con lo que quedó en la hoja, sea cual sea el backend.
+    if valor is None or (isinstance(valor, float) and math.isnan(valor)):
+        return ""
+    if isinstance(valor, bool):
+        return "TRUE" if valor else "FALSE"
+    if isinstance(valor, numbers.Integral):
+        return str(int(valor))
+    if isinstance(valor, numbers.Number):
+        valor = float(valor)
+        return str(int(valor)) if valor.is_integer() else repr(valor)
+    return str(valor)
+
+
+def filas_resumen(filas):
+    # Filas como texto, sin celdas vacías al final de cada fila ni filas vacías al final de la hoja.
+    resultado = []
+    for fila in filas:
+        fila = [texto_resumen(v) for v in fila]
+        while fila and fila[-1] == "":
+            fila.pop()
+        resultado.append(fila)
+    while resultado and not resultado[-1]:
+        resultado.pop()
+    return resultado
+
+
+class Almacenamiento:
+    # Interfaz de acceso a datos. Las filas se numeran como en la hoja: la 1 es el encabezado.
+
+    def leer_jugadoras(self):
+        # Filas [nombre, categoría] de "Jugadoras", sin el encabezado.
+        raise NotImplementedError
+
+    def leer_filas(self, hoja, desde_fila=1, columnas=None):
+        # Filas de la hoja desde desde_fila hasta el final; con columnas se limita el ancho.
+        raise NotImplementedError
+
+    def actualizar_filas(self, hoja, rangos):
+        # rangos: [{"inicio": fila, "values": [[...], ...]}] con filas contiguas desde inicio.
+        raise NotImplementedError
+
+    def agregar_filas(self, hoja, filas):
+        # Agrega al final y devuelve el número de la primera fila escrita (None si no se sabe).
+        raise NotImplementedError
+
+    def revision(self):
+        # Sondeo barato: un valor que cambia con cada modificación del archivo. None si no se sabe.
+        return None
+
+    def listar_hojas(self):
+        # Nombres de todas las hojas del archivo.
+        raise NotImplementedError
+
+    def reemplazar_filas(self, hoja, filas, leidas):
+        # Deja la hoja con exactamente estas filas (encabezado incluido) en lugar de las "leidas" primeras,
+        # en una sola operación. Si la hoja ya tiene más filas que las leídas, no toca nada y devuelve False.
+        raise NotImplementedError
+
+    def asegurar_hoja(self, nombre, filas, columnas):
+        # Crea la hoja si no existe. Devuelve True si la tuvo que crear.
+        raise NotImplementedError
+
+    def borrar_hoja(self, nombre):
+        raise NotImplementedError
+
+    def escribir_resumen(self, nombre, tramos, filas, columnas, completo):
+        # tramos: [(fila_inicio, valores)] con fila_inicio base 0; cada tramo reemplaza sus filas
+        # enteras hasta "columnas". Con completo=True la hoja queda de filas x columnas y se limpia el resto.
+        # Si la hoja no existe se crea en la misma operación. Devuelve lo que quedó en toda la hoja después de escribir, como filas_resumen (None si no se sabe).
+        raise NotImplementedError
+
+    def leer_resumen(self, nombre):
+        # Toda la hoja como filas_resumen; None si la hoja no existe.
+        raise NotImplementedError
@@ -0,0 +1,364 @@
+import itertools
+import json
+import re
+import threading
+import time
+from collections import Counter, deque
+from datetime import date, timedelta
+
+import gspread
+from gspread.utils import a1_to_rowcol
+
+# Simulación en memoria de gspread (Client/Spreadsheet/Worksheet) para correr y medir la app sin
+# una planilla real. Cada método que en gspread es un request suma una llamada, espera la latencia
+# configurada y respeta una cuota por minuto como la de la API (lecturas y escrituras por separado).
+
+LATENCIA_SEG = 0.15
+LECTURAS_POR_MINUTO = 60
+ESCRITURAS_POR_MINUTO = 60
+
+
+class RespuestaSimulada:
+    def __init__(self, codigo, mensaje="", cuerpo=None):
+        self.status_code = codigo
+        self.text = json.dumps(cuerpo if cuerpo is not None else {"error": {"code": codigo, "message": mensaje}})
+
+    def json(self):
+        return json.loads(self.text)
+
+
+def _parsear_rango(rango):
+    # "A5:E", "A2:E10", "B3", "Hoja!A1:C" -> (fila_ini, col_ini, fila_fin, col_fin) base 1; None = abierto.
+    rango = rango.split("!")[-1]
+    partes = rango.split(":")
+
+    def punto(texto):
+        letras, numeros = re.fullmatch(r"([A-Za-z]*)(\d*)", texto).groups()
+        fila = int(numeros) if numeros else None
+        columna = a1_to_rowcol(f"{letras}1")[1] if letras else None
+        return fila, columna
+
+    fila_ini, col_ini = punto(partes[0])
+    if len(partes) == 1:
+        return fila_ini, col_ini, fila_ini, col_ini
+    fila_fin, col_fin = punto(partes[1])
+    return fila_ini or 1, col_ini or 1, fila_fin, col_fin
+
+
+def _texto(valor):
+    if valor is None:
+        return ""
+    if isinstance(valor, bool):
+        return "TRUE" if valor else "FALSE"
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor)
+
+
+def _valor_celda(celda):
+    valor = (celda or {}).get("userEnteredValue", {})
+    formato = (celda or {}).get("userEnteredFormat", {}).get("numberFormat", {})
+    if formato.get("type") == "DATE" and "numberValue" in valor:
+        return (date(1899, 12, 30) + timedelta(days=int(valor["numberValue"]))).isoformat()
+    for clave in ("stringValue", "numberValue", "boolValue", "formulaValue"):
+        if clave in valor:
+            return _texto(valor[clave])
+    return ""
+
+
+class HojaMemoria:
+    def __init__(self, spreadsheet, titulo, hoja_id, filas=None, rows=1000, cols=26):
+        self.spreadsheet = spreadsheet
+        self.title = titulo
+        self.id = hoja_id
+        self._filas = [[_texto(v) for v in fila] for fila in (filas or [])]
+        self.row_count = max(int(rows), len(self._filas))
+        self.col_count = max([int(cols)] + [len(f) for f in self._filas])
+
+    def _llamar(self, tipo):
+        self.spreadsheet.client.llamar(tipo, self.title)
+
+    def _ultima_fila(self):
+        ultima = len(self._filas)
+        while ultima and not any(self._filas[ultima - 1]):
+            ultima -= 1
+        return ultima
+
+    def _escribir(self, fila, columna, valores):
+        for i, valores_fila in enumerate(valores):
+            indice = fila - 1 + i
+            while len(self._filas) <= indice:
+                self._filas.append([])
+            actual = self._filas[indice]
+            for j, valor in enumerate(valores_fila):
+                c = columna - 1 + j
+                while len(actual) <= c:
+                    actual.append("")
+                actual[c] = _texto(valor)
+        self.row_count = max(self.row_count, len(self._filas))
+        self.col_count = max([self.col_count] + [len(f) for f in self._filas])
+        self.spreadsheet.client.version += 1
+
+    def _leer(self, rango):
+        fila_ini, col_ini, fila_fin, col_fin = _parsear_rango(rango)
+        filas = self._filas[fila_ini - 1 : fila_fin]
+        resultado = []
+        for fila in filas:
+            recorte = fila[col_ini - 1 : col_fin]
+            while recorte and recorte[-1] == "":
+                recorte.pop()
+            resultado.append(recorte)
+        while resultado and not resultado[-1]:
+            resultado.pop()
+        return resultado
+
+    def get_all_values(self, **kwargs):
+        self._llamar("lectura")
+        # Como la API: hasta la última columna con algún valor, completando las filas más cortas.
+        filas = self._filas[: self._ultima_fila()]
+        ancho = max([max((j + 1 for j, v in enumerate(f) if v), default=0) for f in filas] + [0])
+        filas = [(list(f) + [""] * ancho)[:ancho] for f in filas]
+        return filas
+
+    def get(self, range_name=None, **kwargs):
+        self._llamar("lectura")
+        return self._leer(range_name or "A1:ZZ")
+
+    def batch_get(self, ranges, **kwargs):
+        self._llamar("lectura")
+        return [self._leer(r) for r in ranges]
+
+    def col_values(self, col, **kwargs):
+        self._llamar("lectura")
+        valores = [f[col - 1] if len(f) >= col else "" for f in self._filas]
+        while valores and valores[-1] == "":
+            valores.pop()
+        return valores
+
+    def update(self, range_name, values=None, **kwargs):
+        self._llamar("escritura")
+        fila, columna, _, _ = _parsear_rango(range_name)
+        self._escribir(fila, columna or 1, values or [])
+        return {"updatedRange": f"{self.title}!{range_name}"}
+
+    def batch_update(self, data, **kwargs):
+        self._llamar("escritura")
+        for bloque in data:
+            fila, columna, _, _ = _parsear_rango(bloque["range"])
+            self._escribir(fila, columna or 1, bloque["values"])
+        return {"totalUpdatedRows": sum(len(b["values"]) for b in data)}
+
+    def append_rows(self, values, **kwargs):
+        self._llamar("escritura")
+        inicio = self._ultima_fila() + 1
+        self._escribir(inicio, 1, values)
+        return {"updates": {"updatedRange": f"{self.title}!A{inicio}:Z{inicio + len(values) - 1}"}}
+
+    def resize(self, rows=None, cols=None):
+        self._llamar("escritura")
+        self._redimensionar(rows, cols)
+
+    def _redimensionar(self, rows=None, cols=None):
+        if rows is not None:
+            self.row_count = int(rows)
+            del self._filas[self.row_count :]
+        if cols is not None:
+            self.col_count = int(cols)
+            for fila in self._filas:
+                del fila[self.col_count :]
+        self.spreadsheet.client.version += 1
+
+    def clear(self):
+        self._llamar("escritura")
+        self._filas = []
+        self.spreadsheet.client.version += 1
+
+
+class SpreadsheetMemoria:
+    def __init__(self, client, sheet_id, hojas=None):
+        self.client = client
+        self.id = sheet_id
+        self.title = sheet_id
+        self._ids = itertools.count(1)
+        self._hojas = {}
+        for titulo, filas in (hojas or {}).items():
+            self._hojas[titulo] = HojaMemoria(self, titulo, next(self._ids), filas)
+
+    def worksheet(self, title):
+        self.client.llamar("lectura", title)
+        if title not in self._hojas:
+            raise gspread.exceptions.WorksheetNotFound(title)
+        return self._hojas[title]
+
+    def worksheets(self, exclude_hidden=False):
+        self.client.llamar("lectura", None)
+        return list(self._hojas.values())
+
+    def add_worksheet(self, title, rows, cols, index=None):
+        self.client.llamar("escritura", title)
+        hoja = HojaMemoria(self, title, next(self._ids), rows=rows, cols=cols)
+        self._hojas[title] = hoja
+        self.client.version += 1
+        return hoja
+
+    def del_worksheet(self, worksheet):
+        self.client.llamar("escritura", worksheet.title)
+        self._hojas.pop(worksheet.title, None)
+        self.client.version += 1
+
+    def _hoja_por_id(self, hoja_id):
+        return next(h for h in self._hojas.values() if h.id == hoja_id)
+
+    def _grilla(self, rango):
+        # Como spreadsheets.get con includeGridData: lo ingresado en cada celda ("Hoja" o "'Hoja'").
+        titulo = rango.split("!")[0]
+        if titulo.startswith("'"):
+            titulo = titulo[1:-1].replace("''", "'")
+        if titulo not in self._hojas:
+            raise gspread.exceptions.APIError(RespuestaSimulada(400, f"Unable to parse range: {rango}"))
+        filas = self._hojas[titulo]._filas
+        return {
+            "sheets": [
+                {
+                    "data": [
+                        {
+                            "rowData": [
+                                {"values": [{"userEnteredValue": {"stringValue": v}} if v else {} for v in fila]}
+                                for fila in filas
+                            ]
+                        }
+                    ]
+                }
+            ]
+        }
+
+    def obtener(self, params):
+        self.client.llamar("lectura", None)
+        return self._grilla(params["ranges"])
+
+    def batch_update(self, body):
+        self.client.llamar("escritura", None)
+        respuesta = {"replies": []}
+        for pedido in body.get("requests", []):
+            if "addSheet" in pedido:
+                propiedades = pedido["addSheet"]["properties"]
+                if propiedades["title"] in self._hojas:
+                    raise gspread.exceptions.APIError(
+                        RespuestaSimulada(400, f"A sheet with the name \"{propiedades['title']}\" already exists.")
+                    )
+                grilla = propiedades.get("gridProperties", {})
+                hoja = HojaMemoria(
+                    self,
+                    propiedades["title"],
+                    propiedades.get("sheetId", next(self._ids)),
+                    rows=grilla.get("rowCount", 1000),
+                    cols=grilla.get("columnCount", 26),
+                )
+                self._hojas[hoja.title] = hoja
+                self.client.version += 1
+                respuesta["replies"].append({"addSheet": {"properties": {"sheetId": hoja.id, "title": hoja.title}}})
+            elif "updateSheetProperties" in pedido:
+                propiedades = pedido["updateSheetProperties"]["properties"]
+                grilla = propiedades.get("gridProperties", {})
+                self._hoja_por_id(propiedades["sheetId"])._redimensionar(
+                    grilla.get("rowCount"), grilla.get("columnCount")
+                )
+            elif "updateCells" in pedido:
+                datos = pedido["updateCells"]
+                rango = datos["range"]
+                hoja = self._hoja_por_id(rango["sheetId"])
+                fila_ini = rango.get("startRowIndex", 0)
+                col_ini = rango.get("startColumnIndex", 0)
+                fila_fin = rango.get("endRowIndex", hoja.row_count)
+                col_fin = rango.get("endColumnIndex", hoja.col_count)
+                filas = datos.get("rows", [])
+                valores = []
+                for i in range(fila_fin - fila_ini):
+                    celdas = filas[i].get("values", []) if i < len(filas) else []
+                    valores.append(
+                        [_valor_celda(celdas[j]) if j < len(celdas) else "" for j in range(col_fin - col_ini)]
+                    )
+                hoja._escribir(fila_ini + 1, col_ini + 1, valores)
+            elif "deleteDimension" in pedido:
+                rango = pedido["deleteDimension"]["range"]
+                if rango["dimension"] != "ROWS":
+                    raise NotImplementedError("Solo se simula borrar filas")
+                hoja = self._hoja_por_id(rango["sheetId"])
+                del hoja._filas[rango["startIndex"] : rango["endIndex"]]
+                hoja.row_count -= rango["endIndex"] - rango["startIndex"]
+                hoja.spreadsheet.client.version += 1
+            else:
+                raise NotImplementedError(f"Pedido no simulado: {list(pedido)}")
+        if body.get("includeSpreadsheetInResponse"):
+            respuesta["updatedSpreadsheet"] = self._grilla(body["responseRanges"][0])
+        return respuesta
+
+
+class ClienteMemoria:
+    def __init__(
+        self,
+        hojas_por_id=None,
+        latencia_seg=LATENCIA_SEG,
+        lecturas_por_minuto=LECTURAS_POR_MINUTO,
+        escrituras_por_minuto=ESCRITURAS_POR_MINUTO,
+    ):
+        self.auth = None
+        self.latencia_seg = latencia_seg
+        self.cuotas = {"lectura": lecturas_por_minuto, "escritura": escrituras_por_minuto}
+        self.llamadas = Counter()
+        self.llamadas_por_hoja = Counter()
+        # Se incrementa con cada escritura: hace de "versión" del archivo como la de Drive.
+        self.version = 1
+        self._ventanas = {"lectura": deque(), "escritura": deque()}
+        self._lock = threading.Lock()
+        self._spreadsheets = {
+            sheet_id: SpreadsheetMemoria(self, sheet_id, hojas) for sheet_id, hojas in (hojas_por_id or {}).items()
+        }
+
+    def llamar(self, tipo, hoja):
+        with self._lock:
+            ahora = time.monotonic()
+            ventana = self._ventanas[tipo]
+            while ventana and ahora - ventana[0] >= 60:
+                ventana.popleft()
+            limite = self.cuotas[tipo]
+            if limite and len(ventana) >= limite:
+                self.llamadas["429"] += 1
+                raise gspread.exceptions.APIError(
+                    RespuestaSimulada(429, f"Quota exceeded for quota metric '{tipo}' (simulado)")
+                )
+            ventana.append(ahora)
+            self.llamadas[tipo] += 1
+            self.llamadas_por_hoja[(tipo, hoja)] += 1
+        if self.latencia_seg:
+            time.sleep(self.latencia_seg)
+
+    def open_by_key(self, key):
+        self.llamar("lectura", None)
+        if key not in self._spreadsheets:
+            self._spreadsheets[key] = SpreadsheetMemoria(self, key)
+        return self._spreadsheets[key]
+
+    def login(self):
+        pass
+
+    def request(self, method, endpoint, params=None, **kwargs):
+        # spreadsheets.get y spreadsheets.batchUpdate con la grilla en la respuesta (hoja de resumen) y el
+        # files.get de Drive del sondeo de cambios, que no consume la cuota de Sheets.
+        pedido = re.search(r"/v4/spreadsheets/([^/:]+)(:batchUpdate)?$", endpoint)
+        if pedido:
+            spreadsheet = self._spreadsheets[pedido.group(1)]
+            if pedido.group(2) and method.lower() == "post":
+                return RespuestaSimulada(200, cuerpo=spreadsheet.batch_update(kwargs["json"]))
+            if not pedido.group(2) and method.lower() == "get":
+                return RespuestaSimulada(200, cuerpo=spreadsheet.obtener(params))
+        if method.lower() != "get" or "/drive/v3/files/" not in endpoint:
+            raise NotImplementedError(f"Pedido no simulado: {method} {endpoint}")
+        with self._lock:
+            self.llamadas["sondeo"] += 1
+        if self.latencia_seg:
+            time.sleep(self.latencia_seg)
+        return RespuestaSimulada(200, cuerpo={"version": str(self.version)})
+
+    def total_llamadas(self):
+        return self.llamadas["lectura"] + self.llamadas["escritura"]
@@ -0,0 +1,270 @@
+import math
+import numbers
+import random
+import re
+from datetime import date
+
+import gspread
+from gspread.urls import DRIVE_FILES_API_V3_URL, SPREADSHEET_BATCH_UPDATE_URL, SPREADSHEET_URL
+from gspread.utils import rowcol_to_a1
+
+from services import cuota
+from services.almacenamiento.base import Almacenamiento, filas_resumen
+from services.conexion import abrir_hoja, abrir_spreadsheet, get_client, invalidar, registrar_hoja
+
+_FECHA_ISO = re.compile(r"\d{4}-\d{2}-\d{2}")
+_EPOCA_SHEETS = date(1899, 12, 30)
+_FORMATO_FECHA = {"type": "DATE", "pattern": "yyyy-mm-dd"}
+# De la grilla solo interesa lo ingresado en cada celda: sin formatos, la respuesta es chica.
+_CAMPOS_GRILLA = "sheets.data.rowData.values.userEnteredValue"
+_TIPOS_VALOR = ("stringValue", "numberValue", "boolValue", "formulaValue")
+
+
+def _letra_columna(columna):
+    return re.sub(r"\d", "", rowcol_to_a1(1, max(columna, 1)))
+
+
+def _celda(valor):
+    if valor is None or (isinstance(valor, float) and math.isnan(valor)):
+        return {}
+    if isinstance(valor, bool):
+        return {"userEnteredValue": {"boolValue": valor}}
+    if isinstance(valor, numbers.Integral):
+        return {"userEnteredValue": {"numberValue": int(valor)}}
+    if isinstance(valor, numbers.Number):
+        return {"userEnteredValue": {"numberValue": float(valor)}}
+    return {"userEnteredValue": {"stringValue": str(valor)}}
+
+
+def _celda_ingresada(valor):
+    # Lo mismo que haría USER_ENTERED con el texto leído: las fechas ISO siguen siendo fechas y TRUE/FALSE,
+    # booleanos.
+    texto = "" if valor is None else str(valor)
+    if _FECHA_ISO.fullmatch(texto):
+        try:
+            serie = (date.fromisoformat(texto) - _EPOCA_SHEETS).days
+        except ValueError:
+            return _celda(texto)
+        return {"userEnteredValue": {"numberValue": serie}, "userEnteredFormat": {"numberFormat": _FORMATO_FECHA}}
+    if texto in ("TRUE", "FALSE"):
+        return _celda(texto == "TRUE")
+    return _celda(texto) if texto else {}
+
+
+def _rango_hoja(nombre):
+    return "'{}'".format(nombre.replace("'", "''"))
+
+
+def _filas_de_grilla(spreadsheet):
+    # rowData de un spreadsheets.get o de la respuesta de un batchUpdate, como filas_resumen.
+    hojas = spreadsheet.get("sheets") or [{}]
+    datos = hojas[0].get("data") or [{}]
+    filas = []
+    for fila in datos[0].get("rowData", []):
+        valores = []
+        for celda in fila.get("values", []):
+            ingresado = celda.get("userEnteredValue", {})
+            valores.append(next((ingresado[c] for c in _TIPOS_VALOR if c in ingresado), None))
+        filas.append(valores)
+    return filas_resumen(filas)
+
+
+def _fila_inicial_agregada(respuesta):
+    rango = (respuesta or {}).get("updates", {}).get("updatedRange", "")
+    encontrado = re.search(r"![A-Z]+(\d+)", rango)
+    return int(encontrado.group(1)) if encontrado else None
+
+
+class AlmacenamientoSheets(Almacenamiento):
+    def __init__(self, sheet_id):
+        self.sheet_id = sheet_id
+
+    def leer_jugadoras(self):
+        hoja = abrir_hoja(self.sheet_id, "Jugadoras")
+        # Nombre y categoría en un solo request.
+        filas = cuota.llamar("batch_get", hoja.title, hoja.batch_get, ["A2:B"])[0]
+        return [(list(fila) + ["", ""])[:2] for fila in filas]
+
+    def leer_filas(self, hoja, desde_fila=1, columnas=None):
+        ws = abrir_hoja(self.sheet_id, hoja)
+        if desde_fila <= 1 and columnas is None:
+            return cuota.llamar("get_all_values", hoja, ws.get_all_values)
+        ultima = _letra_columna(columnas or ws.col_count)
+        return [list(fila) for fila in cuota.llamar("get", hoja, ws.get, f"A{desde_fila}:{ultima}")]
+
+    def actualizar_filas(self, hoja, rangos):
+        updates = []
+        for rango in rangos:
+            fin = rango["inicio"] + len(rango["values"]) - 1
+            ancho = max(len(v) for v in rango["values"])
+            updates.append({"range": f"A{rango['inicio']}:{rowcol_to_a1(fin, ancho)}", "values": rango["values"]})
+        cuota.llamar("batch_update", hoja, abrir_hoja(self.sheet_id, hoja).batch_update, updates)
+
+    def agregar_filas(self, hoja, filas):
+        respuesta = cuota.llamar(
+            "append_rows", hoja, abrir_hoja(self.sheet_id, hoja).append_rows, filas, value_input_option="USER_ENTERED"
+        )
+        return _fila_inicial_agregada(respuesta)
+
+    def revision(self):
+        # La "version" de Drive sube con cualquier cambio del archivo (cualquier hoja).
+        respuesta = cuota.llamar(
+            "revision",
+            None,
+            get_client().request,
+            "get",
+            f"{DRIVE_FILES_API_V3_URL}/{self.sheet_id}",
+            params={"fields": "version", "supportsAllDrives": True},
+        )
+        return respuesta.json()["version"]
+
+    def listar_hojas(self):
+        hojas = cuota.llamar("worksheets", None, abrir_spreadsheet(self.sheet_id).worksheets)
+        for hoja in hojas:
+            registrar_hoja(self.sheet_id, hoja)
+        return [hoja.title for hoja in hojas]
+
+    def reemplazar_filas(self, hoja, filas, leidas):
+        if len(filas) > leidas:
+            raise ValueError("reemplazar_filas no puede agregar filas")
+        if self.leer_filas(hoja, desde_fila=leidas + 1):
+            return False
+        ws = abrir_hoja(self.sheet_id, hoja)
+        # Escribir y recortar van en un único spreadsheets.batchUpdate. updateCells cubre todas las columnas
+        # (limpia lo que quedaba después de la E) y deleteDimension borra solo las filas leídas que sobran: una
+        # fila agregada después del control se corre hacia arriba en lugar de perderse.
+        requests = [
+            {
+                "updateCells": {
+                    "range": {
+                        "sheetId": ws.id,
+                        "startRowIndex": 0,
+                        "endRowIndex": len(filas),
+                        "startColumnIndex": 0,
+                        "endColumnIndex": ws.col_count,
+                    },
+                    "rows": [{"values": [_celda_ingresada(v) for v in fila]} for fila in filas],
+                    "fields": "userEnteredValue,userEnteredFormat.numberFormat",
+                }
+            }
+        ]
+        if leidas > len(filas):
+            requests.append(
+                {
+                    "deleteDimension": {
+                        "range": {
+                            "sheetId": ws.id,
+                            "dimension": "ROWS",
+                            "startIndex": len(filas),
+                            "endIndex": leidas,
+                        }
+                    }
+                }
+            )
+        spreadsheet = abrir_spreadsheet(self.sheet_id)
+        cuota.llamar("spreadsheet.batch_update", hoja, spreadsheet.batch_update, {"requests": requests})
+        return True
+
+    def asegurar_hoja(self, nombre, filas, columnas):
+        try:
+            abrir_hoja(self.sheet_id, nombre)
+            return False
+        except gspread.exceptions.WorksheetNotFound:
+            spreadsheet = abrir_spreadsheet(self.sheet_id)
+            hoja = cuota.llamar(
+                "add_worksheet", nombre, spreadsheet.add_worksheet, title=nombre, rows=filas, cols=columnas
+            )
+            registrar_hoja(self.sheet_id, hoja)
+            return True
+
+    def borrar_hoja(self, nombre):
+        hoja = abrir_hoja(self.sheet_id, nombre)
+        cuota.llamar("del_worksheet", nombre, abrir_spreadsheet(self.sheet_id).del_worksheet, hoja)
+        invalidar(self.sheet_id, nombre)
+
+    def escribir_resumen(self, nombre, tramos, filas, columnas, completo):
+        requests = []
+        try:
+            hoja_id = abrir_hoja(self.sheet_id, nombre).id
+        except gspread.exceptions.WorksheetNotFound:
+            # Si la hoja no existe se crea en el mismo batchUpdate que la escribe, con un id elegido acá.
+            hoja_id = random.randrange(1, 2**31)
+            requests.append(
+                {
+                    "addSheet": {
+                        "properties": {
+                            "sheetId": hoja_id,
+                            "title": nombre,
+                            "gridProperties": {"rowCount": filas, "columnCount": columnas},
+                        }
+                    }
+                }
+            )
+        if completo:
+            # Redimensionar, limpiar y escribir van en un único spreadsheets.batchUpdate: la grilla queda
+            # exactamente del tamaño del resumen y updateCells borra lo que no se manda.
+            requests.append(
+                {
+                    "updateSheetProperties": {
+                        "properties": {
+                            "sheetId": hoja_id,
+                            "gridProperties": {"rowCount": filas, "columnCount": columnas},
+                        },
+                        "fields": "gridProperties(rowCount,columnCount)",
+                    }
+                }
+            )
+        for inicio, valores in tramos:
+            fin = filas if completo else inicio + len(valores)
+            requests.append(
+                {
+                    "updateCells": {
+                        "range": {
+                            "sheetId": hoja_id,
+                            "startRowIndex": inicio,
+                            "endRowIndex": fin,
+                            "startColumnIndex": 0,
+                            "endColumnIndex": columnas,
+                        },
+                        "rows": [{"values": [_celda(v) for v in fila]} for fila in valores],
+                        "fields": "userEnteredValue",
+                    }
+                }
+            )
+        if not requests:
+            return self.leer_resumen(nombre)
+        # La respuesta trae cómo quedó toda la hoja: con eso se verifica la escritura sin otra lectura.
+        cuerpo = {
+            "requests": requests,
+            "includeSpreadsheetInResponse": True,
+            "responseRanges": [_rango_hoja(nombre)],
+            "responseIncludeGridData": True,
+        }
+        respuesta = cuota.llamar(
+            "spreadsheet.batch_update",
+            nombre,
+            get_client().request,
+            "post",
+            SPREADSHEET_BATCH_UPDATE_URL % self.sheet_id,
+            params={"fields": f"updatedSpreadsheet({_CAMPOS_GRILLA})"},
+            json=cuerpo,
+        )
+        return _filas_de_grilla(respuesta.json().get("updatedSpreadsheet", {}))
+
+    def leer_resumen(self, nombre):
+        try:
+            respuesta = cuota.llamar(
+                "spreadsheet.get",
+                nombre,
+                get_client().request,
+                "get",
+                SPREADSHEET_URL % self.sheet_id,
+                params={"ranges": _rango_hoja(nombre), "includeGridData": "true", "fields": _CAMPOS_GRILLA},
+            )
+        except gspread.exceptions.APIError as e:
+            # Un rango que no se puede leer es una hoja que ya no existe (se borró a mano).
+            if getattr(getattr(e, "response", None), "status_code", None) != 400:
+                raise
+            invalidar(self.sheet_id, nombre)
+            return None
+        return _filas_de_grilla(respuesta.json())
@@ -0,0 +1,260 @@
+import json
+import numbers
+import os
+import sqlite3
+import threading
+
+from services.almacenamiento.base import (
+    Almacenamiento,
+    ENCABEZADOS_ASISTENCIAS,
+    ENCABEZADOS_JUGADORAS,
+    filas_resumen,
+)
+
+
+def _valor(valor):
+    if valor is None or isinstance(valor, (bool, str)):
+        return valor
+    if isinstance(valor, numbers.Integral):
+        return int(valor)
+    if isinstance(valor, numbers.Number):
+        return float(valor)
+    return str(valor)
+
+
+class AlmacenamientoSQLite(Almacenamiento):
+    # Cada hoja se guarda como filas numeradas igual que en Sheets, con los valores en JSON.
+
+    def __init__(self, sheet_id, ruta):
+        self.sheet_id = sheet_id
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        carpeta = os.path.dirname(ruta)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+        con = self._conectar()
+        try:
+            with con:
+                con.executescript(
+                    """
+                    CREATE TABLE IF NOT EXISTS hojas (
+                        sheet_id TEXT NOT NULL,
+                        nombre TEXT NOT NULL,
+                        PRIMARY KEY (sheet_id, nombre)
+                    );
+                    CREATE TABLE IF NOT EXISTS filas_hoja (
+                        sheet_id TEXT NOT NULL,
+                        hoja TEXT NOT NULL,
+                        fila INTEGER NOT NULL,
+                        valores TEXT NOT NULL,
+                        PRIMARY KEY (sheet_id, hoja, fila)
+                    );
+                    CREATE TABLE IF NOT EXISTS revisiones (
+                        sheet_id TEXT PRIMARY KEY,
+                        version INTEGER NOT NULL
+                    );
+                    """
+                )
+                for nombre, encabezados in (
+                    ("Asistencias", ENCABEZADOS_ASISTENCIAS),
+                    ("Jugadoras", ENCABEZADOS_JUGADORAS),
+                ):
+                    if self._crear_hoja(con, nombre):
+                        self._guardar(con, nombre, 1, encabezados)
+        finally:
+            con.close()
+
+    def _conectar(self):
+        con = sqlite3.connect(self.ruta, timeout=30, check_same_thread=False)
+        con.execute("PRAGMA journal_mode=WAL")
+        return con
+
+    def _crear_hoja(self, con, nombre):
+        cursor = con.execute(
+            "INSERT OR IGNORE INTO hojas (sheet_id, nombre) VALUES (?, ?)", (self.sheet_id, nombre)
+        )
+        return cursor.rowcount > 0
+
+    def _tocar(self, con):
+        # Sube la revisión del archivo, como la "version" de Drive para Sheets.
+        con.execute(
+            "INSERT INTO revisiones (sheet_id, version) VALUES (?, 1) "
+            "ON CONFLICT(sheet_id) DO UPDATE SET version = version + 1",
+            (self.sheet_id,),
+        )
+
+    def _guardar(self, con, hoja, fila, valores):
+        con.execute(
+            "INSERT OR REPLACE INTO filas_hoja (sheet_id, hoja, fila, valores) VALUES (?, ?, ?, ?)",
+            (self.sheet_id, hoja, fila, json.dumps([_valor(v) for v in valores])),
+        )
+
+    def _filas(self, con, hoja, desde_fila=1):
+        filas = {}
+        for fila, valores in con.execute(
+            "SELECT fila, valores FROM filas_hoja WHERE sheet_id = ? AND hoja = ? AND fila >= ? ORDER BY fila",
+            (self.sheet_id, hoja, desde_fila),
+        ):
+            filas[fila] = ["" if v is None else str(v) for v in json.loads(valores)]
+        return filas
+
+    def _fila(self, con, hoja, fila):
+        encontrada = con.execute(
+            "SELECT valores FROM filas_hoja WHERE sheet_id = ? AND hoja = ? AND fila = ?",
+            (self.sheet_id, hoja, fila),
+        ).fetchone()
+        return json.loads(encontrada[0]) if encontrada else []
+
+    def _resumen(self, con, nombre):
+        # Con los valores tal como se guardaron (números, booleanos), no como texto de leer_filas.
+        filas = {}
+        for fila, valores in con.execute(
+            "SELECT fila, valores FROM filas_hoja WHERE sheet_id = ? AND hoja = ? ORDER BY fila",
+            (self.sheet_id, nombre),
+        ):
+            filas[fila] = json.loads(valores)
+        return filas_resumen([filas.get(f, []) for f in range(1, max(filas, default=0) + 1)])
+
+    def _ultima_fila(self, con, hoja):
+        for fila, valores in con.execute(
+            "SELECT fila, valores FROM filas_hoja WHERE sheet_id = ? AND hoja = ? ORDER BY fila DESC",
+            (self.sheet_id, hoja),
+        ):
+            if any(v not in (None, "") for v in json.loads(valores)):
+                return fila
+        return 0
+
+    def leer_jugadoras(self):
+        return [(fila + ["", ""])[:2] for fila in self.leer_filas("Jugadoras", 2)]
+
+    def leer_filas(self, hoja, desde_fila=1, columnas=None):
+        con = self._conectar()
+        try:
+            filas = self._filas(con, hoja, desde_fila)
+            ultima = self._ultima_fila(con, hoja)
+        finally:
+            con.close()
+        resultado = [filas.get(f, []) for f in range(max(desde_fila, 1), ultima + 1)]
+        if columnas is not None:
+            resultado = [f[:columnas] for f in resultado]
+        # Igual que get_all_values: todas las filas del mismo ancho.
+        ancho = max([len(f) for f in resultado] + [0])
+        return [f + [""] * (ancho - len(f)) for f in resultado]
+
+    def actualizar_filas(self, hoja, rangos):
+        with self._lock:
+            con = self._conectar()
+            try:
+                with con:
+                    for rango in rangos:
+                        for i, valores in enumerate(rango["values"]):
+                            fila = rango["inicio"] + i
+                            actual = self._fila(con, hoja, fila)
+                            actual[: len(valores)] = [_valor(v) for v in valores]
+                            self._guardar(con, hoja, fila, actual)
+                    self._tocar(con)
+            finally:
+                con.close()
+
+    def agregar_filas(self, hoja, filas):
+        with self._lock:
+            con = self._conectar()
+            try:
+                with con:
+                    self._crear_hoja(con, hoja)
+                    inicio = self._ultima_fila(con, hoja) + 1
+                    for i, valores in enumerate(filas):
+                        self._guardar(con, hoja, inicio + i, valores)
+                    self._tocar(con)
+                    return inicio
+            finally:
+                con.close()
+
+    def listar_hojas(self):
+        con = self._conectar()
+        try:
+            return [
+                nombre
+                for (nombre,) in con.execute(
+                    "SELECT nombre FROM hojas WHERE sheet_id = ? ORDER BY nombre", (self.sheet_id,)
+                )
+            ]
+        finally:
+            con.close()
+
+    def revision(self):
+        con = self._conectar()
+        try:
+            fila = con.execute("SELECT version FROM revisiones WHERE sheet_id = ?", (self.sheet_id,)).fetchone()
+            return fila[0] if fila else 0
+        finally:
+            con.close()
+
+    def asegurar_hoja(self, nombre, filas, columnas):
+        con = self._conectar()
+        try:
+            with con:
+                creada = self._crear_hoja(con, nombre)
+                if creada:
+                    self._tocar(con)
+                return creada
+        finally:
+            con.close()
+
+    def borrar_hoja(self, nombre):
+        with self._lock:
+            con = self._conectar()
+            try:
+                with con:
+                    con.execute("DELETE FROM filas_hoja WHERE sheet_id = ? AND hoja = ?", (self.sheet_id, nombre))
+                    con.execute("DELETE FROM hojas WHERE sheet_id = ? AND nombre = ?", (self.sheet_id, nombre))
+                    self._tocar(con)
+            finally:
+                con.close()
+
+    def reemplazar_filas(self, hoja, filas, leidas):
+        if len(filas) > leidas:
+            raise ValueError("reemplazar_filas no puede agregar filas")
+        with self._lock:
+            con = self._conectar()
+            try:
+                with con:
+                    # El control y el reemplazo van en la misma transacción.
+                    if self._ultima_fila(con, hoja) > leidas:
+                        return False
+                    con.execute("DELETE FROM filas_hoja WHERE sheet_id = ? AND hoja = ?", (self.sheet_id, hoja))
+                    for i, fila in enumerate(filas):
+                        self._guardar(con, hoja, i + 1, fila)
+                    self._tocar(con)
+                    return True
+            finally:
+                con.close()
+
+    def escribir_resumen(self, nombre, tramos, filas, columnas, completo):
+        with self._lock:
+            con = self._conectar()
+            try:
+                with con:
+                    self._crear_hoja(con, nombre)
+                    if completo:
+                        con.execute(
+                            "DELETE FROM filas_hoja WHERE sheet_id = ? AND hoja = ?", (self.sheet_id, nombre)
+                        )
+                    for inicio, valores in tramos:
+                        for i, fila in enumerate(valores):
+                            relleno = list(fila)[:columnas] + [""] * (columnas - len(fila))
+                            self._guardar(con, nombre, inicio + i + 1, relleno)
+                    self._tocar(con)
+                    return self._resumen(con, nombre)
+            finally:
+                con.close()
+
+    def leer_resumen(self, nombre):
+        con = self._conectar()
+        try:
+            existe = con.execute(
+                "SELECT 1 FROM hojas WHERE sheet_id = ? AND nombre = ?", (self.sheet_id, nombre)
+            ).fetchone()
+            return self._resumen(con, nombre) if existe else None
+        finally:
+            con.close()
@@ -1,65 +1,46 @@
-import pandas as pd
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-from config import CREDENTIALS_DICT
+from services import acumulados, cuota, particiones, snapshot
+from utils.helpers import normalizar_texto
 
-SCOPE = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
 REQUIRED_COLUMNS = ["Fecha", "Jugadora", "Asistió", "Llegó tarde"]
 
 
+@cuota.prioridad(cuota.RESUMEN)
 def generar_resumen(sheet_id, fecha_desde=None, fecha_hasta=None, jugadoras_filtro=None):
-    creds = ServiceAccountCredentials.from_json_keyfile_dict(CREDENTIALS_DICT, SCOPE)
-    client = gspread.authorize(creds)
-    spreadsheet = client.open_by_key(sheet_id)
-    ws = spreadsheet.worksheet("Asistencias")
-    raw_data = ws.get_all_values()
-
-    if not raw_data or len(raw_data) < 2:
+    indices = []
+    # Solo se leen las hojas (particiones mensuales) que se cruzan con el rango.
+    for hoja in particiones.hojas_del_rango(sheet_id, fecha_desde, fecha_hasta):
+        meta = snapshot.sincronizar(sheet_id, hoja)
+        if meta["total_filas"] < 2:
+            continue
+
+        headers = [normalizar_texto(h) for h in meta["encabezados"]]
+        missing = [c for c in REQUIRED_COLUMNS if normalizar_texto(c) not in headers]
+        if missing:
+            raise ValueError(f"Faltan columnas requeridas en '{hoja}': {', '.join(missing)}")
+
+        indices.append(acumulados.obtener(sheet_id, hoja, meta["version"]))
+
+    # Cualquier rango sale de las sumas acumuladas: dos búsquedas por jugadora y mes.
+    agrupadas = acumulados.consultar(indices, fecha_desde, fecha_hasta, jugadoras_filtro or None)
+    if agrupadas is None:
         return None
+    return armar_resumen(*agrupadas)
 
-    headers = raw_data[0]
-    missing = [c for c in REQUIRED_COLUMNS if c not in headers]
-    if missing:
-        raise ValueError(f"Faltan columnas requeridas en 'Asistencias': {', '.join(missing)}")
-
-    df = pd.DataFrame(raw_data[1:], columns=headers)
-    df["Fecha"] = pd.to_datetime(df["Fecha"], errors="coerce")
-    df = df.dropna(subset=["Fecha", "Jugadora"])
-
-    df["Jugadora"] = df["Jugadora"].astype(str).str.strip()
-    df["Asistió"] = df["Asistió"].astype(str).str.strip().str.upper()
-    df["Llegó tarde"] = df["Llegó tarde"].astype(str).str.strip().str.upper()
-    if fecha_desde is not None:
-        df = df[df["Fecha"] >= pd.to_datetime(fecha_desde)]
-    if fecha_hasta is not None:
-        df = df[df["Fecha"] <= pd.to_datetime(fecha_hasta)]
-    if jugadoras_filtro:
-        df = df[df["Jugadora"].isin(jugadoras_filtro)]
-
-    if df.empty:
-        return None
 
-    df["Mes"] = df["Fecha"].dt.to_period("M")
+def armar_resumen(por_mes_jugadora, entrenamientos_por_mes):
+    presencias_por_jugadora_mes = por_mes_jugadora.loc[
+        por_mes_jugadora["Presencias"] > 0, ["Mes", "Jugadora", "Presencias"]
+    ].reset_index(drop=True)
 
-    entrenamientos_por_mes = df.groupby("Mes")["Fecha"].nunique().reset_index(name="Entrenamientos del mes")
-
-    presencias_por_jugadora_mes = (
-        df[df["Asistió"] == "SÍ"].groupby(["Mes", "Jugadora"]).size().reset_index(name="Presencias")
-    )
-
-    llegadas_tarde_mes = (
-        df[(df["Asistió"] == "SÍ") & (df["Llegó tarde"] == "SÍ")]
-        .groupby(["Mes", "Jugadora"])
-        .size()
-        .reset_index(name="Tardanzas")
-    )
+    llegadas_tarde_mes = por_mes_jugadora.loc[
+        por_mes_jugadora["Tardanzas"] > 0, ["Mes", "Jugadora", "Tardanzas"]
+    ].reset_index(drop=True)
 
     ranking = (
-        df[df["Asistió"] == "SÍ"]
-        .groupby("Jugadora")
-        .size()
+        presencias_por_jugadora_mes.groupby("Jugadora", sort=True)["Presencias"]
+        .sum()
         .reset_index(name="Total presencias")
-        .sort_values("Total presencias", ascending=False)
+        .sort_values("Total presencias", ascending=False, kind="stable")
     )
 
     return {
@@ -67,5 +48,4 @@ def generar_resumen(sheet_id, fecha_desde=None, fecha_hasta=None, jugadoras_filt
         "presencias_por_jugadora_mes": presencias_por_jugadora_mes,
         "llegadas_tarde_mes": llegadas_tarde_mes,
         "ranking": ranking,
-        "spreadsheet": spreadsheet,
     }
@@ -0,0 +1,29 @@
+import threading
+import time
+
+from services.almacenamiento import obtener_almacenamiento
+
+# Sondeo de cambios del archivo: antes de releer una hoja se compara la revisión actual con la de la
+# última lectura. Si no cambió, lo que está en caché sigue valiendo sin importar cuánto tiempo pasó.
+# Todas las sesiones comparten el último sondeo, así una ráfaga de reruns consulta una sola vez.
+
+INTERVALO_SONDEO_SEG = 2
+
+_lock = threading.Lock()
+# sheet_id -> (revision, monotonic)
+_sondeos = {}
+
+
+def revision(sheet_id):
+    # None si el backend no sabe dar una revisión o el sondeo falló: quien llama vuelve a sus intervalos.
+    with _lock:
+        ultimo = _sondeos.get(sheet_id)
+        if ultimo and time.monotonic() - ultimo[1] < INTERVALO_SONDEO_SEG:
+            return ultimo[0]
+    try:
+        actual = obtener_almacenamiento(sheet_id).revision()
+    except Exception:
+        actual = None
+    with _lock:
+        _sondeos[sheet_id] = (actual, time.monotonic())
+    return actual
@@ -0,0 +1,333 @@
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+
+import gspread
+import requests
+
+# La cola va en un archivo aparte del snapshot: el snapshot se puede borrar y reconstruir,
+# las asistencias pendientes no. Solo los errores pasajeros (429, 5xx, conexión) se reintentan con
+# backoff; ante cualquier otro se prueba fila por fila y las que vuelven a fallar pasan a "fallidas",
+# donde quedan a la vista hasta que alguien las vuelva a encolar.
+RUTA_COLA = os.environ.get("ASISTENCIA_COLA", os.path.join(".cache", "cola_asistencias.sqlite3"))
+
+ESPERA_AGRUPAR_SEG = 1.0
+REINTENTO_BASE_SEG = 2.0
+REINTENTO_MAX_SEG = 300.0
+
+_lock = threading.Lock()
+_despertar = threading.Event()
+_worker = None
+# Último error inesperado del hilo de fondo ({"error", "desde", "seguidas"}), o None si la última pasada anduvo.
+_falla_worker = None
+_esquema_listo = set()
+_log = logging.getLogger(__name__)
+
+
+def _conectar():
+    carpeta = os.path.dirname(RUTA_COLA)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+    con = sqlite3.connect(RUTA_COLA, timeout=30, check_same_thread=False)
+    if RUTA_COLA not in _esquema_listo:
+        con.execute("PRAGMA journal_mode=WAL")
+        con.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS pendientes (
+                sheet_id TEXT NOT NULL,
+                hoja TEXT NOT NULL,
+                fecha TEXT NOT NULL,
+                jugadora TEXT NOT NULL,
+                valores TEXT NOT NULL,
+                secuencia INTEGER NOT NULL,
+                PRIMARY KEY (sheet_id, hoja, fecha, jugadora)
+            );
+            CREATE TABLE IF NOT EXISTS estado (
+                sheet_id TEXT NOT NULL,
+                hoja TEXT NOT NULL,
+                intentos INTEGER NOT NULL,
+                proximo_intento REAL NOT NULL,
+                ultimo_error TEXT NOT NULL,
+                ultimo_envio REAL NOT NULL,
+                PRIMARY KEY (sheet_id, hoja)
+            );
+            CREATE TABLE IF NOT EXISTS fallidas (
+                sheet_id TEXT NOT NULL,
+                hoja TEXT NOT NULL,
+                fecha TEXT NOT NULL,
+                jugadora TEXT NOT NULL,
+                valores TEXT NOT NULL,
+                error TEXT NOT NULL,
+                fallo REAL NOT NULL,
+                PRIMARY KEY (sheet_id, hoja, fecha, jugadora)
+            );
+            """
+        )
+        _esquema_listo.add(RUTA_COLA)
+    return con
+
+
+def encolar(sheet_id, hoja, filas):
+    # Una fila nueva para la misma (Fecha, Jugadora) reemplaza a la pendiente: se envía solo la última.
+    secuencia = time.time_ns()
+    con = _conectar()
+    try:
+        with con:
+            con.executemany(
+                "INSERT OR REPLACE INTO pendientes (sheet_id, hoja, fecha, jugadora, valores, secuencia) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    (sheet_id, hoja, f[0].strip(), f[1].strip(), json.dumps(list(f)), secuencia + i)
+                    for i, f in enumerate(filas)
+                ),
+            )
+    finally:
+        con.close()
+    _asegurar_worker()
+    _despertar.set()
+    return len(filas)
+
+
+def pendientes_de_fecha(sheet_id, hoja, fecha_str):
+    con = _conectar()
+    try:
+        filas = con.execute(
+            "SELECT jugadora, valores FROM pendientes WHERE sheet_id = ? AND hoja = ? AND fecha = ?",
+            (sheet_id, hoja, fecha_str),
+        ).fetchall()
+    finally:
+        con.close()
+    return {jugadora: str(json.loads(valores)[2]).strip().upper() for jugadora, valores in filas}
+
+
+def estado(sheet_id, hoja):
+    con = _conectar()
+    try:
+        pendientes = con.execute(
+            "SELECT COUNT(*) FROM pendientes WHERE sheet_id = ? AND hoja = ?", (sheet_id, hoja)
+        ).fetchone()[0]
+        fila = con.execute(
+            "SELECT intentos, proximo_intento, ultimo_error, ultimo_envio FROM estado "
+            "WHERE sheet_id = ? AND hoja = ?",
+            (sheet_id, hoja),
+        ).fetchone()
+        cantidad_fallidas = con.execute(
+            "SELECT COUNT(*) FROM fallidas WHERE sheet_id = ? AND hoja = ?", (sheet_id, hoja)
+        ).fetchone()[0]
+    finally:
+        con.close()
+    if pendientes:
+        # Si el proceso se reinició con asistencias en el journal, se retoma el envío.
+        _asegurar_worker()
+    intentos, proximo, error, envio = fila or (0, 0.0, "", 0.0)
+    falla = _falla_worker
+    return {
+        "pendientes": pendientes,
+        "intentos": intentos,
+        "proximo_intento": proximo,
+        "ultimo_error": error,
+        "ultimo_envio": envio,
+        "fallidas": cantidad_fallidas,
+        "worker_activo": _worker is not None and _worker.is_alive(),
+        "error_worker": falla["error"] if falla else "",
+        "error_worker_desde": falla["desde"] if falla else 0.0,
+    }
+
+
+def fallidas(sheet_id, hoja):
+    con = _conectar()
+    try:
+        filas = con.execute(
+            "SELECT valores, error, fallo FROM fallidas WHERE sheet_id = ? AND hoja = ? "
+            "ORDER BY fallo, fecha, jugadora",
+            (sheet_id, hoja),
+        ).fetchall()
+    finally:
+        con.close()
+    return [{"fila": json.loads(valores), "error": error, "fallo": fallo} for valores, error, fallo in filas]
+
+
+def reintentar_fallidas(sheet_id, hoja):
+    # Vuelven a la cola, salvo que ya haya una versión más nueva pendiente de la misma (Fecha, Jugadora).
+    con = _conectar()
+    try:
+        with con:
+            filas = con.execute(
+                "SELECT valores FROM fallidas WHERE sheet_id = ? AND hoja = ?", (sheet_id, hoja)
+            ).fetchall()
+            secuencia = time.time_ns()
+            con.executemany(
+                "INSERT OR IGNORE INTO pendientes (sheet_id, hoja, fecha, jugadora, valores, secuencia) "
+                "SELECT sheet_id, hoja, fecha, jugadora, valores, ? FROM fallidas "
+                "WHERE sheet_id = ? AND hoja = ? AND fecha = ? AND jugadora = ?",
+                (
+                    (secuencia + i, sheet_id, hoja, f[0].strip(), f[1].strip())
+                    for i, f in enumerate(json.loads(v) for (v,) in filas)
+                ),
+            )
+            con.execute("DELETE FROM fallidas WHERE sheet_id = ? AND hoja = ?", (sheet_id, hoja))
+    finally:
+        con.close()
+    _asegurar_worker()
+    _despertar.set()
+    return len(filas)
+
+
+def es_temporal(error):
+    # Vale la pena reintentar: cuota, error del servidor o de red. El resto (permisos, hoja inexistente,
+    # datos inválidos) va a seguir fallando igual.
+    if isinstance(error, gspread.exceptions.APIError):
+        codigo = getattr(getattr(error, "response", None), "status_code", None)
+        return codigo == 429 or (codigo is not None and codigo >= 500)
+    de_red = (requests.exceptions.ConnectionError, requests.exceptions.Timeout, ConnectionError, TimeoutError)
+    return isinstance(error, de_red)
+
+
+def _guardar_estado(con, sheet_id, hoja, intentos, proximo, error, envio):
+    con.execute(
+        "INSERT OR REPLACE INTO estado (sheet_id, hoja, intentos, proximo_intento, ultimo_error, ultimo_envio) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (sheet_id, hoja, intentos, proximo, error, envio),
+    )
+
+
+def _borrar_enviadas(con, sheet_id, hoja, filas):
+    # Solo se borra lo enviado: si otra carga reemplazó la fila mientras tanto, queda pendiente.
+    con.executemany(
+        "DELETE FROM pendientes WHERE sheet_id = ? AND hoja = ? AND fecha = ? AND jugadora = ? AND secuencia = ?",
+        ((sheet_id, hoja, fecha, jugadora, secuencia) for fecha, jugadora, _, secuencia in filas),
+    )
+
+
+def _reprogramar(con, sheet_id, hoja, previo, error):
+    intentos = previo[0] + 1
+    espera = min(REINTENTO_BASE_SEG * (2 ** (intentos - 1)), REINTENTO_MAX_SEG)
+    espera *= random.uniform(0.8, 1.2)
+    with con:
+        _guardar_estado(con, sheet_id, hoja, intentos, time.time() + espera, repr(error), previo[1])
+
+
+def _separar_fallidas(con, sheet_id, hoja, filas, upsert, previo):
+    # El lote falló con un error que no se arregla reintentando: se manda de a una fila para apartar
+    # solo las que fallan. Si en el medio aparece un error pasajero, el resto queda para el reintento.
+    envio = previo[1]
+    for fila in filas:
+        fecha, jugadora, valores, _ = fila
+        try:
+            upsert(sheet_id, hoja, [json.loads(valores)])
+        except Exception as e:
+            if es_temporal(e):
+                _reprogramar(con, sheet_id, hoja, (previo[0], envio), e)
+                return
+            with con:
+                con.execute(
+                    "INSERT OR REPLACE INTO fallidas (sheet_id, hoja, fecha, jugadora, valores, error, fallo) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (sheet_id, hoja, fecha, jugadora, valores, repr(e), time.time()),
+                )
+                _borrar_enviadas(con, sheet_id, hoja, [fila])
+            continue
+        envio = time.time()
+        with con:
+            _borrar_enviadas(con, sheet_id, hoja, [fila])
+    with con:
+        _guardar_estado(con, sheet_id, hoja, 0, 0.0, "", envio)
+
+
+def _vaciar(sheet_id, hoja, upsert):
+    con = _conectar()
+    try:
+        filas = con.execute(
+            "SELECT fecha, jugadora, valores, secuencia FROM pendientes "
+            "WHERE sheet_id = ? AND hoja = ? ORDER BY secuencia",
+            (sheet_id, hoja),
+        ).fetchall()
+        if not filas:
+            return
+        previo = con.execute(
+            "SELECT intentos, ultimo_envio FROM estado WHERE sheet_id = ? AND hoja = ?", (sheet_id, hoja)
+        ).fetchone() or (0, 0.0)
+        try:
+            upsert(sheet_id, hoja, [json.loads(valores) for _, _, valores, _ in filas])
+        except Exception as e:
+            if es_temporal(e):
+                _reprogramar(con, sheet_id, hoja, previo, e)
+            else:
+                _separar_fallidas(con, sheet_id, hoja, filas, upsert, previo)
+            return
+        with con:
+            _borrar_enviadas(con, sheet_id, hoja, filas)
+            _guardar_estado(con, sheet_id, hoja, 0, 0.0, "", time.time())
+    finally:
+        con.close()
+
+
+def _listas_para_enviar():
+    con = _conectar()
+    try:
+        return con.execute(
+            "SELECT DISTINCT p.sheet_id, p.hoja, COALESCE(e.proximo_intento, 0) FROM pendientes p "
+            "LEFT JOIN estado e ON e.sheet_id = p.sheet_id AND e.hoja = p.hoja"
+        ).fetchall()
+    finally:
+        con.close()
+
+
+def _enviar_listas(upsert):
+    # Una pasada por las hojas con pendientes. Devuelve cuánto esperar hasta la próxima (None: hasta que
+    # llegue algo nuevo).
+    ahora = time.time()
+    proxima_espera = None
+    for sheet_id, hoja, proximo in _listas_para_enviar():
+        if proximo > ahora:
+            espera = proximo - ahora
+            proxima_espera = espera if proxima_espera is None else min(proxima_espera, espera)
+            continue
+        _vaciar(sheet_id, hoja, upsert)
+        proxima_espera = 0
+    return proxima_espera
+
+
+def _vuelta(upsert):
+    # Un error inesperado (SQLite bloqueado, un bug) no puede matar el hilo: las filas siguen en el
+    # journal, así que se registra, se espera con backoff y se vuelve a probar.
+    global _falla_worker
+    try:
+        espera = _enviar_listas(upsert)
+    except Exception as e:
+        seguidas = _falla_worker["seguidas"] + 1 if _falla_worker else 1
+        desde = _falla_worker["desde"] if _falla_worker else time.time()
+        _falla_worker = {"error": repr(e), "desde": desde, "seguidas": seguidas}
+        _log.exception("Falló el envío en segundo plano de la cola de asistencias (%d seguidas)", seguidas)
+        return False, min(REINTENTO_BASE_SEG * (2 ** (seguidas - 1)), REINTENTO_MAX_SEG)
+    _falla_worker = None
+    return True, espera
+
+
+def _trabajar():
+    from services.google_sheets import upsert_asistencias
+
+    while True:
+        ok, espera = _vuelta(upsert_asistencias)
+        if not ok:
+            # Un guardado nuevo no acorta la espera: el error probablemente siga ahí.
+            time.sleep(espera)
+            continue
+        if espera == 0:
+            continue
+        _despertar.wait(timeout=espera)
+        _despertar.clear()
+        # Se deja pasar un instante para juntar varios guardados en un solo envío.
+        time.sleep(ESPERA_AGRUPAR_SEG)
+
+
+def _asegurar_worker():
+    global _worker
+    with _lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_trabajar, name="cola-asistencias", daemon=True)
+            _worker.start()
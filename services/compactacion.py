@@ -0,0 +1,219 @@
+import argparse
+import csv
+import os
+import sys
+
+import pandas as pd
+
+from services import particiones, snapshot
+from services.almacenamiento import ENCABEZADOS_ASISTENCIAS, obtener_almacenamiento
+from services.google_sheets import _rangos_contiguos
+from utils.helpers import indices_columnas, normalizar_asistio, normalizar_tarde, parsear_fechas
+
+# Compacta las hojas de asistencias: deja una sola fila por (Fecha, Jugadora) (gana la última, igual
+# que al leer), normaliza los valores y saca las temporadas cerradas a hojas "Archivo AAAA" o a
+# archivos CSV locales. Cada hoja viva se reescribe en una sola operación y solo si cambió.
+#   python -m services.compactacion --archivar-hasta 2024
+
+PREFIJO_ARCHIVO = "Archivo"
+
+
+def nombre_archivo(temporada):
+    return f"{PREFIJO_ARCHIVO} {temporada}"
+
+
+def _recortar(fila):
+    fila = [str(v) for v in fila]
+    while fila and fila[-1] == "":
+        fila.pop()
+    return fila
+
+
+def _normalizar(fila, indices, fecha):
+    def valor(campo):
+        i = indices.get(campo)
+        return str(fila[i]).strip() if i is not None and i < len(fila) else ""
+
+    asistio = normalizar_asistio(valor("Asistió"))
+    # La tardanza solo cuenta si asistió: es lo mismo que ya calculan los resúmenes.
+    tarde = normalizar_tarde(valor("Llegó tarde")) if asistio == "SÍ" else "NO"
+    fecha_texto = fecha.strftime("%Y-%m-%d") if pd.notna(fecha) else valor("Fecha")
+    return [fecha_texto, valor("Jugadora"), asistio, tarde, valor("Comentario")]
+
+
+def _leer_hoja(almacenamiento, hoja):
+    datos = almacenamiento.leer_filas(hoja)
+    if not datos:
+        return None
+    encabezados = datos[0]
+    try:
+        indices = indices_columnas(encabezados, ENCABEZADOS_ASISTENCIAS[:4])
+    except ValueError as e:
+        raise ValueError(f"Falta la columna {e} en '{hoja}'") from None
+    try:
+        indices.update(indices_columnas(encabezados, ["Comentario"]))
+    except ValueError:
+        pass
+
+    originales = [f for f in datos[1:] if any(str(v).strip() for v in f)]
+    fechas = parsear_fechas([f[indices["Fecha"]] if indices["Fecha"] < len(f) else "" for f in originales])
+    filas = [_normalizar(f, indices, fecha) for f, fecha in zip(originales, fechas)]
+    return {
+        "total": len(datos),
+        "encabezado_ok": _recortar(encabezados) == ENCABEZADOS_ASISTENCIAS,
+        "vacias": len(datos) - 1 - len(originales),
+        "normalizadas": sum(1 for o, f in zip(originales, filas) if _recortar(o) != _recortar(f)),
+        "filas": filas,
+        "temporadas": [fecha.year if pd.notna(fecha) else None for fecha in fechas],
+    }
+
+
+def _archivar_en_hoja(almacenamiento, temporada, filas):
+    # Igual que en la carpeta, gana la fila más nueva de cada (Fecha, Jugadora): una corrección hecha
+    # después de archivar reemplaza a la archivada. Solo se reescriben las filas que cambiaron.
+    nombre = nombre_archivo(temporada)
+    posiciones = {}
+    previas = []
+    if almacenamiento.asegurar_hoja(nombre, len(filas) + 1, len(ENCABEZADOS_ASISTENCIAS)):
+        almacenamiento.actualizar_filas(nombre, [{"inicio": 1, "values": [list(ENCABEZADOS_ASISTENCIAS)]}])
+    else:
+        previas = [_recortar(f) for f in almacenamiento.leer_filas(nombre)]
+        for numero, fila in enumerate(previas[1:], start=2):
+            posiciones[tuple(fila[:2])] = numero
+    cambiadas = {}
+    nuevas = {}
+    for fila in filas:
+        clave = tuple(fila[:2])
+        if clave in posiciones:
+            if previas[posiciones[clave] - 1] != _recortar(fila):
+                cambiadas[posiciones[clave]] = fila
+        else:
+            nuevas[clave] = fila
+    if cambiadas:
+        almacenamiento.actualizar_filas(nombre, _rangos_contiguos(cambiadas))
+    if nuevas:
+        almacenamiento.agregar_filas(nombre, list(nuevas.values()))
+    return nombre
+
+
+def _archivar_en_carpeta(carpeta, temporada, filas):
+    os.makedirs(carpeta, exist_ok=True)
+    ruta = os.path.join(carpeta, f"asistencias-{temporada}.csv")
+    por_clave = {}
+    if os.path.exists(ruta):
+        with open(ruta, newline="", encoding="utf-8") as f:
+            for fila in list(csv.reader(f))[1:]:
+                por_clave[tuple(fila[:2])] = fila
+    for fila in filas:
+        por_clave[tuple(fila[:2])] = fila
+    with open(ruta, "w", newline="", encoding="utf-8") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(ENCABEZADOS_ASISTENCIAS)
+        escritor.writerows(sorted(por_clave.values()))
+    return ruta
+
+
+def compactar(sheet_id, archivar_hasta=None, carpeta=None, simular=False):
+    # archivar_hasta: última temporada (año) que se archiva; None = no se archiva nada.
+    # carpeta: archiva en CSV locales en vez de hojas. simular: solo arma el informe.
+    almacenamiento = obtener_almacenamiento(sheet_id)
+    leidas = {}
+    for hoja in particiones.hojas_del_rango(sheet_id):
+        leida = _leer_hoja(almacenamiento, hoja)
+        if leida is not None:
+            leidas[hoja] = leida
+
+    # Última fila de cada clave entre todas las hojas, en el orden en que las lee la app.
+    ultima = {}
+    for hoja, leida in leidas.items():
+        for i, fila in enumerate(leida["filas"]):
+            ultima[(fila[0], fila[1])] = (hoja, i)
+
+    informe = {"hojas": {}, "archivadas": {}, "borradas": [], "destinos": []}
+    vivas = {}
+    archivo = {}
+    for hoja, leida in leidas.items():
+        quedan = []
+        duplicadas = 0
+        for i, (fila, temporada) in enumerate(zip(leida["filas"], leida["temporadas"])):
+            if ultima[(fila[0], fila[1])] != (hoja, i):
+                duplicadas += 1
+            elif archivar_hasta is not None and temporada is not None and temporada <= archivar_hasta:
+                archivo.setdefault(temporada, []).append(fila)
+            else:
+                quedan.append(fila)
+        vivas[hoja] = quedan
+        informe["hojas"][hoja] = {
+            "filas": leida["total"] - 1,
+            "vacias": leida["vacias"],
+            "duplicadas": duplicadas,
+            "normalizadas": leida["normalizadas"],
+            "archivadas": len(leida["filas"]) - duplicadas - len(quedan),
+            "quedan": len(quedan),
+        }
+    informe["archivadas"] = {t: len(f) for t, f in sorted(archivo.items())}
+    if simular:
+        return informe
+
+    # Primero se archiva y recién después se reescriben las hojas vivas.
+    for temporada, filas in sorted(archivo.items()):
+        if carpeta:
+            destino = _archivar_en_carpeta(carpeta, temporada, filas)
+        else:
+            destino = _archivar_en_hoja(almacenamiento, temporada, filas)
+        informe["destinos"].append(destino)
+
+    for hoja, quedan in vivas.items():
+        leida = leidas[hoja]
+        datos = informe["hojas"][hoja]
+        if datos["quedan"] == datos["filas"] and not datos["normalizadas"] and leida["encabezado_ok"]:
+            continue
+        if hoja != particiones.HOJA_BASE and not quedan:
+            if almacenamiento.leer_filas(hoja, desde_fila=leida["total"] + 1):
+                datos["omitida"] = True
+                continue
+            almacenamiento.borrar_hoja(hoja)
+            informe["borradas"].append(hoja)
+        elif not almacenamiento.reemplazar_filas(hoja, [list(ENCABEZADOS_ASISTENCIAS)] + quedan, leida["total"]):
+            # Se agregaron filas mientras tanto: esta hoja queda para la próxima corrida.
+            datos["omitida"] = True
+            continue
+        snapshot.invalidar(sheet_id, hoja)
+    particiones.olvidar_listado(sheet_id)
+    return informe
+
+
+def _imprimir(informe, simular):
+    print(f"{'hoja':<24} {'filas':>7} {'vacías':>7} {'dupl.':>7} {'normal.':>8} {'archiv.':>8} {'quedan':>7}")
+    for hoja, datos in informe["hojas"].items():
+        nota = "  (cambió durante la compactación, sin tocar)" if datos.get("omitida") else ""
+        print(
+            f"{hoja:<24} {datos['filas']:>7} {datos['vacias']:>7} {datos['duplicadas']:>7} "
+            f"{datos['normalizadas']:>8} {datos['archivadas']:>8} {datos['quedan']:>7}{nota}"
+        )
+    for temporada, cantidad in informe["archivadas"].items():
+        print(f"Temporada {temporada}: {cantidad} filas archivadas")
+    for destino in informe["destinos"]:
+        print(f"Archivo: {destino}")
+    for hoja in informe["borradas"]:
+        print(f"Hoja borrada (quedó vacía): {hoja}")
+    if simular:
+        print("Simulación: no se escribió nada.")
+
+
+def main(argv=None):
+    from config import SHEET_ID
+
+    parser = argparse.ArgumentParser(description="Deduplica, normaliza y archiva las asistencias.")
+    parser.add_argument("--sheet-id", default=SHEET_ID)
+    parser.add_argument("--archivar-hasta", type=int, help="Archiva las temporadas (años) hasta esta inclusive.")
+    parser.add_argument("--carpeta", help="Archiva en CSV dentro de esta carpeta en lugar de hojas 'Archivo AAAA'.")
+    parser.add_argument("--simular", action="store_true", help="Muestra qué haría sin escribir.")
+    args = parser.parse_args(argv)
+    informe = compactar(args.sheet_id, args.archivar_hasta, args.carpeta, args.simular)
+    _imprimir(informe, args.simular)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+import threading
+from datetime import datetime, timedelta
+
+import gspread
+
+from config import obtener_credenciales
+from services import cuota
+
+SCOPE = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+
+# Se renueva el token antes de que venza para que ningún click pague el intercambio OAuth.
+MARGEN_RENOVACION = timedelta(minutes=5)
+CONEXIONES_POR_HOST = 20
+
+_lock = threading.RLock()
+_cliente = None
+_spreadsheets = {}
+_worksheets = {}
+
+
+def _crear_cliente():
+    # oauth2client y requests solo hacen falta con Sheets de verdad: no se importan con los backends locales.
+    from oauth2client.service_account import ServiceAccountCredentials
+    from requests.adapters import HTTPAdapter
+
+    creds = ServiceAccountCredentials.from_json_keyfile_dict(obtener_credenciales(), SCOPE)
+    cliente = gspread.authorize(creds)
+    # Varias sesiones de Streamlit comparten el cliente: pool de conexiones keep-alive más grande.
+    adaptador = HTTPAdapter(pool_connections=CONEXIONES_POR_HOST, pool_maxsize=CONEXIONES_POR_HOST)
+    cliente.session.mount("https://", adaptador)
+    cuota.llamar("login", None, cliente.login)
+    return cliente
+
+
+def _token_por_vencer(cliente):
+    auth = getattr(cliente, "auth", None)
+    if auth is None:
+        return False
+    expiry = getattr(auth, "expiry", None)
+    if not getattr(auth, "token", None) or expiry is None:
+        return True
+    return expiry - datetime.utcnow() < MARGEN_RENOVACION
+
+
+def usar_cliente(cliente):
+    # Reemplaza el cliente real (p. ej. por la simulación en memoria) y descarta las hojas cacheadas.
+    global _cliente
+    with _lock:
+        _cliente = cliente
+        _spreadsheets.clear()
+        _worksheets.clear()
+
+
+def get_client():
+    global _cliente
+    with _lock:
+        if _cliente is None:
+            _cliente = _crear_cliente()
+        elif _token_por_vencer(_cliente):
+            cuota.llamar("login", None, _cliente.login)
+        return _cliente
+
+
+def abrir_spreadsheet(sheet_id):
+    with _lock:
+        spreadsheet = _spreadsheets.get(sheet_id)
+        if spreadsheet is None:
+            spreadsheet = cuota.llamar("open_by_key", None, get_client().open_by_key, sheet_id)
+            _spreadsheets[sheet_id] = spreadsheet
+        return spreadsheet
+
+
+def abrir_hoja(sheet_id, nombre):
+    clave = (sheet_id, nombre)
+    with _lock:
+        hoja = _worksheets.get(clave)
+        if hoja is not None:
+            return hoja
+    hoja = cuota.llamar("worksheet", nombre, abrir_spreadsheet(sheet_id).worksheet, nombre)
+    with _lock:
+        _worksheets[clave] = hoja
+    return hoja
+
+
+def registrar_hoja(sheet_id, hoja):
+    with _lock:
+        _worksheets[(sheet_id, hoja.title)] = hoja
+
+
+def invalidar(sheet_id=None, nombre=None):
+    with _lock:
+        if sheet_id is None:
+            _spreadsheets.clear()
+            _worksheets.clear()
+            return
+        if nombre is None:
+            _spreadsheets.pop(sheet_id, None)
+            for clave in [c for c in _worksheets if c[0] == sheet_id]:
+                del _worksheets[clave]
+            return
+        _worksheets.pop((sheet_id, nombre), None)
@@ -0,0 +1,159 @@
+import contextlib
+import contextvars
+import heapq
+import itertools
+import random
+import threading
+import time
+
+import gspread
+
+from services import metricas
+
+# Todas las sesiones comparten la misma cuenta de servicio, y con ella la cuota por minuto de la API.
+# Cada llamada saca una ficha del balde de lecturas o de escrituras; si no hay, espera su turno
+# según la prioridad. Ante un 429 se pausa el balde con backoff y se reintenta.
+
+LECTURAS_POR_MINUTO = 60
+ESCRITURAS_POR_MINUTO = 60
+RAFAGA = 10
+REINTENTOS_429 = 5
+ESPERA_429_BASE_SEG = 2.0
+ESPERA_429_MAX_SEG = 60.0
+
+GUARDADO = 0
+NORMAL = 1
+RESUMEN = 2
+
+ESCRITURAS = {
+    "batch_update",
+    "append_rows",
+    "add_worksheet",
+    "del_worksheet",
+    "spreadsheet.batch_update",
+    "update",
+    "resize",
+    "clear",
+}
+# El sondeo de cambios va contra la API de Drive, que tiene su propia cuota.
+SIN_CUOTA = {"login", "revision"}
+
+_prioridad = contextvars.ContextVar("prioridad_api", default=NORMAL)
+_cond = threading.Condition()
+_orden = itertools.count()
+
+
+class _Balde:
+    def __init__(self, por_minuto):
+        self.turnos = []
+        self.configurar(por_minuto)
+
+    def configurar(self, por_minuto):
+        # Con la ráfaga incluida, en ningún minuto se pasa de por_minuto llamadas.
+        self.por_minuto = por_minuto
+        self.capacidad = max(1, min(RAFAGA, por_minuto // 6))
+        self.tasa = max(por_minuto - self.capacidad, 1) / 60
+        self.fichas = float(self.capacidad)
+        self.actualizado = time.monotonic()
+        self.pausa_hasta = 0.0
+
+    def recargar(self, ahora):
+        self.fichas = min(self.capacidad, self.fichas + (ahora - self.actualizado) * self.tasa)
+        self.actualizado = ahora
+
+    def espera(self, ahora):
+        if ahora < self.pausa_hasta:
+            return self.pausa_hasta - ahora
+        if self.fichas >= 1:
+            return 0
+        return (1 - self.fichas) / self.tasa
+
+
+_baldes = {"lectura": _Balde(LECTURAS_POR_MINUTO), "escritura": _Balde(ESCRITURAS_POR_MINUTO)}
+
+
+def configurar(lecturas_por_minuto=LECTURAS_POR_MINUTO, escrituras_por_minuto=ESCRITURAS_POR_MINUTO):
+    # 0 = sin límite (benchmarks, backends locales).
+    with _cond:
+        _baldes["lectura"].configurar(lecturas_por_minuto)
+        _baldes["escritura"].configurar(escrituras_por_minuto)
+        _cond.notify_all()
+
+
+@contextlib.contextmanager
+def prioridad(valor):
+    token = _prioridad.set(valor)
+    try:
+        yield
+    finally:
+        _prioridad.reset(token)
+
+
+def tipo_de(operacion):
+    if operacion in SIN_CUOTA:
+        return None
+    return "escritura" if operacion in ESCRITURAS else "lectura"
+
+
+def _tomar(balde):
+    turno = (_prioridad.get(), next(_orden))
+    with _cond:
+        if not balde.por_minuto:
+            return 0.0
+        inicio = time.monotonic()
+        heapq.heappush(balde.turnos, turno)
+        try:
+            while True:
+                if not balde.por_minuto:
+                    # Se desactivó el límite mientras esperaba.
+                    balde.turnos.remove(turno)
+                    heapq.heapify(balde.turnos)
+                    return time.monotonic() - inicio
+                ahora = time.monotonic()
+                balde.recargar(ahora)
+                espera = balde.espera(ahora)
+                if balde.turnos[0] == turno and espera == 0:
+                    heapq.heappop(balde.turnos)
+                    balde.fichas -= 1
+                    _cond.notify_all()
+                    return ahora - inicio
+                # Si no es su turno, espera a que alguien tome la ficha; si lo es, a que se recargue.
+                _cond.wait(espera if balde.turnos[0] == turno else None)
+        except BaseException:
+            if turno in balde.turnos:
+                balde.turnos.remove(turno)
+                heapq.heapify(balde.turnos)
+                _cond.notify_all()
+            raise
+
+
+def _pausar(balde, intento):
+    espera = min(ESPERA_429_BASE_SEG * (2**intento), ESPERA_429_MAX_SEG) * random.uniform(0.8, 1.2)
+    with _cond:
+        balde.fichas = 0.0
+        balde.pausa_hasta = max(balde.pausa_hasta, time.monotonic() + espera)
+        _cond.notify_all()
+
+
+def es_429(error):
+    respuesta = getattr(error, "response", None)
+    return isinstance(error, gspread.exceptions.APIError) and getattr(respuesta, "status_code", None) == 429
+
+
+def llamar(operacion, hoja, funcion, *args, **kwargs):
+    tipo = tipo_de(operacion)
+    if tipo is None:
+        return metricas.llamar(operacion, hoja, funcion, *args, **kwargs)
+    balde = _baldes[tipo]
+    intento = 0
+    while True:
+        esperado = _tomar(balde)
+        if esperado > 0.001:
+            metricas.registrar("espera_cuota", tipo, esperado)
+        try:
+            return metricas.llamar(operacion, hoja, funcion, *args, **kwargs)
+        except gspread.exceptions.APIError as e:
+            if not es_429(e) or intento >= REINTENTOS_429:
+                raise
+            _pausar(balde, intento)
+            intento += 1
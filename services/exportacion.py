@@ -0,0 +1,236 @@
+import argparse
+import csv
+import io
+import os
+import re
+import sys
+import tempfile
+import zipfile
+
+import pandas as pd
+
+from services import particiones, snapshot
+from services.almacenamiento import ENCABEZADOS_ASISTENCIAS
+from services.asistencia import generar_resumen
+from services.hoja_resumen import BLOQUES_RESUMEN
+from utils.helpers import parsear_fechas
+
+# Exporta las asistencias crudas y las tablas de generar_resumen a CSV, Excel o Parquet escribiendo de a
+# tandas: las filas salen del snapshot con un cursor y se escriben a medida que llegan, sin armar copias
+# en texto de toda la historia.
+#   python -m services.exportacion --formato xlsx --salida asistencias.xlsx --desde 2025-01-01
+
+FORMATOS = ["csv", "xlsx", "parquet"]
+DEPENDENCIAS = {"xlsx": "XlsxWriter", "parquet": "pyarrow"}
+TAMANO_TANDA = 5000
+# Límite de filas de una hoja de Excel: lo que sobra sigue en "Asistencias (2)", etc.
+MAX_FILAS_XLSX = 1_048_576
+
+
+def _meses_entre(desde, hasta):
+    return [str(p) for p in pd.period_range(pd.Timestamp(desde), pd.Timestamp(hasta), freq="M")]
+
+
+def tandas_asistencias(sheet_id, fecha_desde=None, fecha_hasta=None, jugadoras=None, tamano=TAMANO_TANDA):
+    # Sin rango salen todas las filas, también las de fecha inválida; con rango, solo las que caen adentro.
+    desde = pd.Timestamp(fecha_desde) if fecha_desde is not None else None
+    hasta = pd.Timestamp(fecha_hasta) if fecha_hasta is not None else None
+    meses = _meses_entre(desde, hasta) if desde is not None and hasta is not None else None
+    jugadoras = set(jugadoras) if jugadoras else None
+    for hoja in particiones.hojas_del_rango(sheet_id, fecha_desde, fecha_hasta):
+        if snapshot.sincronizar(sheet_id, hoja)["total_filas"] < 2:
+            continue
+        for tanda in snapshot.iterar_filas(sheet_id, hoja, meses, tamano):
+            if jugadoras is not None:
+                tanda = [f for f in tanda if f[1] in jugadoras]
+            if desde is not None or hasta is not None:
+                fechas = parsear_fechas([f[0] for f in tanda])
+                dentro = fechas.notna()
+                if desde is not None:
+                    dentro &= fechas >= desde
+                if hasta is not None:
+                    dentro &= fechas <= hasta
+                tanda = [f for f, ok in zip(tanda, dentro.to_numpy()) if ok]
+            if tanda:
+                yield tanda
+
+
+def tandas_dataframe(df, tamano=TAMANO_TANDA):
+    # Los meses (Period) salen como "AAAA-MM"; el resto de los valores, tal cual.
+    periodos = [c for c in df.columns if isinstance(df[c].dtype, pd.PeriodDtype)]
+    for inicio in range(0, len(df), tamano):
+        bloque = df.iloc[inicio : inicio + tamano]
+        if periodos:
+            bloque = bloque.assign(**{c: bloque[c].astype(str) for c in periodos})
+        yield list(bloque.itertuples(index=False, name=None))
+
+
+def armar_tablas(sheet_id, fecha_desde=None, fecha_hasta=None, jugadoras=None, asistencias=True, resumen=True):
+    # [(nombre, columnas, tandas)]: las tandas se generan recién cuando se escriben.
+    tablas = []
+    if asistencias:
+        tandas = tandas_asistencias(sheet_id, fecha_desde, fecha_hasta, jugadoras)
+        tablas.append(("asistencias", list(ENCABEZADOS_ASISTENCIAS), tandas))
+    if resumen:
+        datos = generar_resumen(sheet_id, fecha_desde, fecha_hasta, list(jugadoras) if jugadoras else None)
+        if datos:
+            for bloque in BLOQUES_RESUMEN:
+                df = datos[bloque]
+                tablas.append((bloque, [str(c) for c in df.columns], tandas_dataframe(df)))
+    return tablas
+
+
+def extension(formato, tablas):
+    # Una sola tabla va en su archivo; varias, en un .zip (CSV y Parquet) o en hojas de un mismo Excel.
+    if formato == "xlsx":
+        return "xlsx"
+    return formato if len(tablas) == 1 else "zip"
+
+
+def exportar(salida, formato, tablas):
+    # salida: archivo binario abierto para escribir.
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato desconocido: {formato}")
+    if formato == "xlsx":
+        return _escribir_xlsx(salida, tablas)
+    escribir = _escribir_csv if formato == "csv" else _escribir_parquet
+    if len(tablas) == 1:
+        return escribir(salida, *tablas[0])
+    total = 0
+    with zipfile.ZipFile(salida, "w", zipfile.ZIP_DEFLATED) as zf:
+        for nombre, columnas, tandas in tablas:
+            if formato == "csv":
+                with zf.open(f"{nombre}.csv", "w", force_zip64=True) as archivo:
+                    total += escribir(archivo, nombre, columnas, tandas)
+            else:
+                # Parquet necesita poder moverse en el archivo: cada tabla pasa por un temporal.
+                with tempfile.TemporaryFile() as temporal:
+                    total += escribir(temporal, nombre, columnas, tandas)
+                    temporal.seek(0)
+                    with zf.open(f"{nombre}.parquet", "w", force_zip64=True) as archivo:
+                        while True:
+                            bloque = temporal.read(1 << 20)
+                            if not bloque:
+                                break
+                            archivo.write(bloque)
+    return total
+
+
+def _escribir_csv(salida, nombre, columnas, tandas):
+    texto = io.TextIOWrapper(salida, encoding="utf-8", newline="", write_through=True)
+    try:
+        escritor = csv.writer(texto)
+        escritor.writerow(columnas)
+        total = 0
+        for tanda in tandas:
+            escritor.writerows(tanda)
+            total += len(tanda)
+        return total
+    finally:
+        # Se suelta el archivo sin cerrarlo: quien lo abrió decide.
+        texto.detach()
+
+
+def _escribir_parquet(salida, nombre, columnas, tandas):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    escritor = None
+    total = 0
+    try:
+        for tanda in tandas:
+            tabla = pa.Table.from_pandas(pd.DataFrame(tanda, columns=columnas), preserve_index=False)
+            if escritor is None:
+                escritor = pq.ParquetWriter(salida, tabla.schema)
+            escritor.write_table(tabla.cast(escritor.schema))
+            total += len(tanda)
+        if escritor is None:
+            # Sin filas igual queda un archivo válido con las columnas.
+            vacia = pa.table({c: pa.array([], pa.string()) for c in columnas})
+            escritor = pq.ParquetWriter(salida, vacia.schema)
+            escritor.write_table(vacia)
+    finally:
+        if escritor is not None:
+            escritor.close()
+    return total
+
+
+def _nombre_hoja_xlsx(nombre, parte):
+    # Excel admite hasta 31 caracteres y no acepta []:*?/\
+    nombre = re.sub(r"[\[\]:*?/\\]", "", nombre)
+    return nombre[:31] if parte == 1 else f"{nombre[:25]} ({parte})"
+
+
+def _escribir_xlsx(salida, tablas):
+    # XlsxWriter en modo constant_memory escribe cada fila a un temporal apenas llega: el libro nunca está
+    # entero en memoria. Los textos quedan como texto (sin fórmulas ni links).
+    import xlsxwriter
+
+    opciones = {
+        "constant_memory": True,
+        "strings_to_formulas": False,
+        "strings_to_urls": False,
+        "nan_inf_to_errors": True,
+    }
+    total = 0
+    with xlsxwriter.Workbook(salida, opciones) as libro:
+        for nombre, columnas, tandas in tablas:
+            parte = 1
+            hoja = libro.add_worksheet(_nombre_hoja_xlsx(nombre, parte))
+            hoja.write_row(0, 0, columnas)
+            numero = 1
+            for tanda in tandas:
+                for valores in tanda:
+                    if numero >= MAX_FILAS_XLSX:
+                        parte += 1
+                        hoja = libro.add_worksheet(_nombre_hoja_xlsx(nombre, parte))
+                        hoja.write_row(0, 0, columnas)
+                        numero = 1
+                    hoja.write_row(numero, 0, valores)
+                    numero += 1
+                total += len(tanda)
+    return total
+
+
+def main(argv=None):
+    from config import SHEET_ID
+    from services.plantel import CATEGORIAS, obtener_plantel
+
+    parser = argparse.ArgumentParser(description="Exporta asistencias y resumen a CSV, Excel o Parquet.")
+    parser.add_argument("--sheet-id", default=SHEET_ID)
+    parser.add_argument("--formato", choices=FORMATOS, default="csv")
+    parser.add_argument("--salida", help="Archivo de salida (por defecto, asistencias.<extensión>).")
+    parser.add_argument("--desde", type=pd.Timestamp)
+    parser.add_argument("--hasta", type=pd.Timestamp)
+    parser.add_argument("--categoria", choices=CATEGORIAS, help="Solo las jugadoras de esta categoría.")
+    contenido = parser.add_mutually_exclusive_group()
+    contenido.add_argument("--solo-asistencias", action="store_true")
+    contenido.add_argument("--solo-resumen", action="store_true")
+    args = parser.parse_args(argv)
+
+    jugadoras = None
+    if args.categoria:
+        jugadoras = obtener_plantel(args.sheet_id)["por_categoria"][args.categoria]
+    desde = args.desde.date() if args.desde is not None else None
+    hasta = args.hasta.date() if args.hasta is not None else None
+    tablas = armar_tablas(
+        args.sheet_id, desde, hasta, jugadoras, asistencias=not args.solo_resumen, resumen=not args.solo_asistencias
+    )
+    if not tablas:
+        print("No hay datos para exportar.")
+        return 1
+    ruta = args.salida or f"asistencias.{extension(args.formato, tablas)}"
+    try:
+        with open(ruta, "wb") as salida:
+            total = exportar(salida, args.formato, tablas)
+    except ImportError as e:
+        os.remove(ruta)
+        print(f"No se pudo exportar a {args.formato}: falta una dependencia ({e}).")
+        print(f"Instalala con: pip install {DEPENDENCIAS[args.formato]}")
+        return 1
+    print(f"{ruta}: {total} filas en {len(tablas)} tablas ({os.path.getsize(ruta) / 2**20:.1f} MB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
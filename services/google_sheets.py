@@ -1,139 +1,117 @@
-import gspread
-import re
-from oauth2client.service_account import ServiceAccountCredentials
 import streamlit as st
 
-from config import SHEET_ID, CREDENTIALS_DICT
+from config import SHEET_ID
+from services import acumulados, cola_escritura, cuota, indices, particiones, snapshot, tabla
+from services.almacenamiento import obtener_almacenamiento
+from services.plantel import obtener_plantel
+from utils.helpers import indices_columnas
 
-SCOPE = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
 
-
-def normalizar_texto(value):
-    return value.strip().lower().replace("ó", "o")
-
-
-def get_client():
-    creds = ServiceAccountCredentials.from_json_keyfile_dict(CREDENTIALS_DICT, SCOPE)
-    return gspread.authorize(creds)
-
-
-def _parse_categoria_unica(value):
-    if value is None:
-        return "", False
-    texto = str(value)
-    encontrados = re.findall(r"[12]", texto)
-    if not encontrados:
-        return "", False
-    categoria = encontrados[0]
-    ambas = ("1" in encontrados) and ("2" in encontrados)
-    return categoria, ambas
-
-
-@st.cache_data(ttl=300)
 def cargar_jugadoras():
-    client = get_client()
-    hoja = client.open_by_key(SHEET_ID).worksheet("Jugadoras")
-    jugadoras = [j.strip() for j in hoja.col_values(1)[1:] if j.strip()]
-    return sorted(set(jugadoras))
+    return list(obtener_plantel(SHEET_ID)["por_categoria"]["Todas"])
 
 
-@st.cache_data(ttl=300)
 def cargar_jugadoras_con_categoria():
-    client = get_client()
-    hoja = client.open_by_key(SHEET_ID).worksheet("Jugadoras")
-    nombres = hoja.col_values(1)[1:]
-    categorias = hoja.col_values(2)[1:]
-    total = max(len(nombres), len(categorias))
-    jugadoras = {}
-    for i in range(total):
-        nombre = nombres[i].strip() if i < len(nombres) else ""
-        if not nombre:
-            continue
-        categoria_raw = categorias[i] if i < len(categorias) else ""
-        categoria, ambas = _parse_categoria_unica(categoria_raw)
-        if nombre in jugadoras:
-            continue
-        jugadoras[nombre] = {"jugadora": nombre, "categoria": categoria, "ambas": ambas}
-    return list(jugadoras.values())
-
+    return list(obtener_plantel(SHEET_ID)["jugadoras"])
 
-def _indices_columnas(encabezados, requeridas):
-    encabezados_norm = [normalizar_texto(e) for e in encabezados]
-    indices = {}
-    for col in requeridas:
-        col_norm = normalizar_texto(col)
-        if col_norm not in encabezados_norm:
-            raise ValueError(col)
-        indices[col] = encabezados_norm.index(col_norm)
-    return indices
 
-
-@st.cache_data(ttl=120)
 def obtener_asistencias_previas(fecha):
-    client = get_client()
-    hoja = client.open_by_key(SHEET_ID).worksheet("Asistencias")
-    datos = hoja.get_all_values()
-    if not datos:
-        return []
-
-    encabezados = datos[0]
-
-    try:
-        idx = _indices_columnas(encabezados, ["Fecha", "Jugadora", "Asistió"])
-    except ValueError:
-        st.error(
-            "Error al leer los encabezados de la hoja 'Asistencias'. "
-            "Verificá que existan las columnas: Fecha, Jugadora, Asistió."
-        )
-        st.write("Encabezados detectados:", encabezados)
-        return []
-
     fecha_str = fecha.strftime("%Y-%m-%d")
     ultimos_registros = {}
-
-    for fila in datos[1:]:
-        if len(fila) <= max(idx.values()):
+    # Hoja base primero y después la partición del mes: la última escritura pisa a las anteriores.
+    for hoja in particiones.hojas_de_fecha(SHEET_ID, fecha):
+        meta = snapshot.sincronizar(SHEET_ID, hoja)
+        encabezados = meta["encabezados"]
+        if not encabezados:
             continue
-        f_fecha = fila[idx["Fecha"]].strip()
-        f_jugadora = fila[idx["Jugadora"]].strip()
-        f_asistio = fila[idx["Asistió"]].strip().upper()
-        if f_fecha == fecha_str:
-            ultimos_registros[f_jugadora] = f_asistio
 
+        try:
+            indices_columnas(encabezados, ["Fecha", "Jugadora", "Asistió"])
+        except ValueError:
+            st.error(
+                f"Error al leer los encabezados de la hoja '{hoja}'. "
+                "Verificá que existan las columnas: Fecha, Jugadora, Asistió."
+            )
+            st.write("Encabezados detectados:", encabezados)
+            return []
+
+        ultimos_registros.update(tabla.asistencias_de_fecha(tabla.obtener(SHEET_ID, hoja, meta["version"]), fecha))
+
+    # Lo que sigue en la cola de escritura ya cuenta como registrado.
+    ultimos_registros.update(cola_escritura.pendientes_de_fecha(SHEET_ID, particiones.HOJA_BASE, fecha_str))
     return [j for j, estado in ultimos_registros.items() if estado == "SÍ"]
 
 
+def _rangos_contiguos(actualizadas):
+    # Agrupa filas consecutivas en un solo rango para escribirlas juntas.
+    rangos = []
+    for fila in sorted(actualizadas):
+        valores = actualizadas[fila]
+        if rangos and rangos[-1]["fin"] == fila - 1:
+            rangos[-1]["fin"] = fila
+            rangos[-1]["values"].append(valores)
+        else:
+            rangos.append({"inicio": fila, "fin": fila, "values": [valores]})
+    return [{"inicio": r["inicio"], "values": r["values"]} for r in rangos]
+
+
+@cuota.prioridad(cuota.GUARDADO)
 def upsert_asistencias(sheet_id, hoja_nombre, nuevas_filas):
-    client = get_client()
-    hoja = client.open_by_key(sheet_id).worksheet(hoja_nombre)
-    datos = hoja.get_all_values()
-    if not datos:
+    if hoja_nombre != particiones.HOJA_BASE:
+        return _upsert_en_hoja(sheet_id, hoja_nombre, nuevas_filas)
+    # "Asistencias" es la hoja lógica: con particiones, cada fila va a la hoja de su mes.
+    totales = {"actualizadas": 0, "agregadas": 0}
+    for hoja, filas in particiones.agrupar_por_hoja(sheet_id, nuevas_filas).items():
+        resultado = _upsert_en_hoja(sheet_id, hoja, filas)
+        totales["actualizadas"] += resultado["actualizadas"]
+        totales["agregadas"] += resultado["agregadas"]
+    return totales
+
+
+def _upsert_en_hoja(sheet_id, hoja_nombre, nuevas_filas):
+    # Antes de escribir se confirma contra la hoja que los números de fila sigan vigentes.
+    meta = snapshot.sincronizar(sheet_id, hoja_nombre, forzar=True)
+    encabezados = meta["encabezados"]
+    if not encabezados:
         raise ValueError("La hoja de asistencias no tiene encabezados.")
 
-    encabezados = datos[0]
-    idx = _indices_columnas(encabezados, ["Fecha", "Jugadora"])
+    indices_columnas(encabezados, ["Fecha", "Jugadora"])
 
     nuevas_dict = {(f[0].strip(), f[1].strip()): f for f in nuevas_filas}
-    filas_existentes = datos[1:]
-    filas_actualizadas = set()
-    updates = []
-
-    for i, fila in enumerate(filas_existentes):
-        if len(fila) <= max(idx.values()):
-            continue
-        clave = (fila[idx["Fecha"]].strip(), fila[idx["Jugadora"]].strip())
-        if clave in nuevas_dict:
-            updates.append({"range": f"A{i + 2}", "values": [nuevas_dict[clave]]})
-            filas_actualizadas.add(clave)
+    existentes = indices.filas_de_claves(sheet_id, hoja_nombre, nuevas_dict.keys(), meta["version"])
+    actualizadas = {fila: nuevas_dict[clave] for clave, filas in existentes.items() for fila in filas}
 
-    if updates:
-        hoja.batch_update(updates)
+    almacenamiento = obtener_almacenamiento(sheet_id)
+    if actualizadas:
+        almacenamiento.actualizar_filas(hoja_nombre, _rangos_contiguos(actualizadas))
 
-    nuevas_para_agregar = [fila for clave, fila in nuevas_dict.items() if clave not in filas_actualizadas]
+    nuevas_para_agregar = [fila for clave, fila in nuevas_dict.items() if clave not in existentes]
+    fila_agregadas = None
     if nuevas_para_agregar:
-        hoja.append_rows(nuevas_para_agregar, value_input_option="USER_ENTERED")
+        fila_agregadas = almacenamiento.agregar_filas(hoja_nombre, nuevas_para_agregar)
+
+    version = snapshot.registrar_escritura(sheet_id, hoja_nombre, actualizadas, nuevas_para_agregar, fila_agregadas)
+    indices.registrar_escritura(
+        sheet_id,
+        hoja_nombre,
+        nuevas_dict.values(),
+        meta["version"],
+        version,
+        fila_agregadas=fila_agregadas,
+        agregadas=nuevas_para_agregar,
+    )
+    cambios = tabla.registrar_escritura(
+        sheet_id,
+        hoja_nombre,
+        meta["version"],
+        version,
+        actualizadas=actualizadas,
+        fila_agregadas=fila_agregadas,
+        agregadas=nuevas_para_agregar,
+    )
+    acumulados.registrar_escritura(sheet_id, hoja_nombre, meta["version"], version, cambios)
 
     return {
-        "actualizadas": len(updates),
+        "actualizadas": len(actualizadas),
         "agregadas": len(nuevas_para_agregar),
     }
@@ -0,0 +1,105 @@
+import hashlib
+import threading
+
+from services import cuota
+from services.almacenamiento import filas_resumen, obtener_almacenamiento
+
+HOJA_RESUMEN = "Resumen"
+_lock = threading.Lock()
+# (sheet_id, nombre) -> {"layout": tuple, "bloques": [huella], "filas": [huella], "hoja": huella} de la última
+# exportación. "hoja" es la huella de toda la hoja como tendría que estar: se compara con la hoja real para
+# saber si las demás siguen valiendo.
+_ultima_exportacion = {}
+
+BLOQUES_RESUMEN = ["entrenamientos_por_mes", "presencias_por_jugadora_mes", "llegadas_tarde_mes", "ranking"]
+
+
+def armar_grilla(bloques):
+    # Mismo layout que antes: encabezado, filas del bloque y una fila vacía entre bloques.
+    grilla = []
+    for i, df in enumerate(bloques):
+        if i > 0:
+            grilla.append([])
+        grilla.append([str(c) for c in df.columns])
+        grilla.extend(list(fila) for fila in df.itertuples(index=False, name=None))
+    return grilla
+
+
+def _huella(celdas):
+    return hashlib.blake2b(repr(celdas).encode("utf-8"), digest_size=8).digest()
+
+
+def _huellas(bloques, grilla, columnas):
+    # El layout fija en qué fila arranca cada bloque: si cambia, hay que reescribir todo. Las huellas son
+    # del texto de cada fila, que es lo que después se lee de la hoja para verificarla.
+    layout = (columnas,) + tuple((tuple(str(c) for c in df.columns), len(df)) for df in bloques)
+    texto = filas_resumen(grilla)
+    filas = [_huella(fila) for fila in texto + [[]] * (len(grilla) - len(texto))]
+    huellas_bloques = []
+    inicio = 0
+    for i, df in enumerate(bloques):
+        if i > 0:
+            inicio += 1
+        fin = inicio + len(df) + 1
+        huellas_bloques.append(_huella(filas[inicio:fin]))
+        inicio = fin
+    return {"layout": layout, "bloques": huellas_bloques, "filas": filas, "hoja": _huella(texto)}
+
+
+def _filas_cambiadas(anterior, actual, bloques):
+    cambiadas = []
+    inicio = 0
+    for i, df in enumerate(bloques):
+        if i > 0:
+            inicio += 1
+        fin = inicio + len(df) + 1
+        if anterior["bloques"][i] != actual["bloques"][i]:
+            cambiadas.extend(
+                f for f in range(inicio, fin) if anterior["filas"][f] != actual["filas"][f]
+            )
+        inicio = fin
+    return cambiadas
+
+
+def _tramos(filas):
+    tramos = []
+    for fila in filas:
+        if tramos and tramos[-1][1] == fila:
+            tramos[-1][1] = fila + 1
+        else:
+            tramos.append([fila, fila + 1])
+    return tramos
+
+
+@cuota.prioridad(cuota.RESUMEN)
+def escribir_resumen(sheet_id, bloques, nombre=HOJA_RESUMEN):
+    grilla = armar_grilla(bloques)
+    filas = max(len(grilla), 1)
+    columnas = max([len(f) for f in grilla] + [1])
+    huellas = _huellas(bloques, grilla, columnas)
+    almacenamiento = obtener_almacenamiento(sheet_id)
+
+    clave = (sheet_id, nombre)
+    with _lock:
+        anterior = _ultima_exportacion.get(clave)
+
+    completo = anterior is None or anterior["layout"] != huellas["layout"]
+    if not completo:
+        # Mismo layout: solo se reescriben las filas que cambiaron desde la última exportación. La escritura
+        # devuelve cómo quedó la hoja; si no hay nada que escribir, se lee. Si no coincide con lo esperado
+        # (se editó a mano, otro proceso la reescribió o se borró), no se sabe qué hay y va completa.
+        tramos = [
+            (inicio, grilla[inicio:fin]) for inicio, fin in _tramos(_filas_cambiadas(anterior, huellas, bloques))
+        ]
+        if tramos:
+            quedo = almacenamiento.escribir_resumen(nombre, tramos, filas, columnas, False)
+        else:
+            quedo = almacenamiento.leer_resumen(nombre)
+        completo = quedo is None or _huella(quedo) != huellas["hoja"]
+    if completo:
+        tramos = [(0, grilla)]
+        almacenamiento.escribir_resumen(nombre, tramos, filas, columnas, True)
+
+    with _lock:
+        _ultima_exportacion[clave] = huellas
+    return sum(len(valores) for _, valores in tramos)
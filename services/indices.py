@@ -0,0 +1,56 @@
+import threading
+
+from services import snapshot
+
+_lock = threading.RLock()
+# (tipo, sheet_id, hoja) -> {"version": int, "datos": dict}
+#   "claves": {(fecha, jugadora): [filas]}
+_indices = {}
+
+
+def _construir_por_clave(sheet_id, hoja):
+    claves = {}
+    for fila, fecha, jugadora, _, _, _ in snapshot.filas(sheet_id, hoja):
+        claves.setdefault((fecha, jugadora), []).append(fila)
+    return claves
+
+
+_CONSTRUCTORES = {
+    "claves": _construir_por_clave,
+}
+
+
+def _obtener(tipo, sheet_id, hoja, version):
+    clave = (tipo, sheet_id, hoja)
+    with _lock:
+        indice = _indices.get(clave)
+        if indice is None or indice["version"] != version:
+            indice = {"version": version, "datos": _CONSTRUCTORES[tipo](sheet_id, hoja)}
+            _indices[clave] = indice
+        return indice["datos"]
+
+
+def filas_de_claves(sheet_id, hoja, claves, version):
+    with _lock:
+        por_clave = _obtener("claves", sheet_id, hoja, version)
+        return {c: list(por_clave[c]) for c in claves if c in por_clave}
+
+
+def registrar_escritura(sheet_id, hoja, filas, version_anterior, version_nueva, fila_agregadas=None, agregadas=()):
+    with _lock:
+        for tipo in _CONSTRUCTORES:
+            clave = (tipo, sheet_id, hoja)
+            indice = _indices.get(clave)
+            if indice is None or indice["version"] != version_anterior or version_nueva is None:
+                _indices.pop(clave, None)
+                continue
+            if fila_agregadas is None:
+                # Sin el número de fila de lo agregado no se puede ubicar: se reconstruye en la próxima lectura.
+                if agregadas:
+                    _indices.pop(clave, None)
+                    continue
+            else:
+                for i, fila in enumerate(agregadas):
+                    k = (str(fila[0]).strip(), str(fila[1]).strip())
+                    indice["datos"].setdefault(k, []).append(fila_agregadas + i)
+            indice["version"] = version_nueva
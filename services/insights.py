@@ -0,0 +1,135 @@
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from services import particiones
+from services.asistencia import generar_resumen
+
+# Los insights de Resumen dependen solo de (categoría, rango, versión de los datos, versión del plantel):
+# se calculan una vez y todas las sesiones y reruns reusan el mismo resultado.
+MAX_MEMO = 64
+
+_lock = threading.Lock()
+_memo = OrderedDict()
+
+
+def asistencia_por_jugadora(resumen, jugadoras):
+    entrenamientos = resumen["entrenamientos_por_mes"]
+    total_entrenamientos = int(entrenamientos["Entrenamientos del mes"].sum()) if not entrenamientos.empty else 0
+    ranking_presencias = resumen["ranking"].rename(columns={"Total presencias": "Presencias"})
+    presencias = (
+        ranking_presencias.set_index("Jugadora")["Presencias"]
+        .reindex(list(jugadoras), fill_value=0)
+        .astype(int)
+    )
+    porcentaje = (presencias / total_entrenamientos * 100).round(1) if total_entrenamientos > 0 else 0
+    df = pd.DataFrame(
+        {"Jugadora": presencias.index, "Presencias": presencias.to_numpy(), "% Asistencia": porcentaje}
+    ).reset_index(drop=True)
+    return df, total_entrenamientos, ranking_presencias
+
+
+def _por_mes(df, columna):
+    return df.groupby("Mes")[columna].sum() if not df.empty else pd.Series(dtype="int64")
+
+
+def calcular_insights(resumen, jugadoras):
+    entrenamientos = resumen["entrenamientos_por_mes"]
+    presencias = resumen["presencias_por_jugadora_mes"]
+    tardanzas = resumen["llegadas_tarde_mes"]
+    ranking = resumen["ranking"]
+
+    df_asistencia, total_entrenamientos, ranking_presencias = asistencia_por_jugadora(resumen, jugadoras)
+    total_presencias = int(presencias["Presencias"].sum()) if not presencias.empty else 0
+    total_tardanzas = int(tardanzas["Tardanzas"].sum()) if not tardanzas.empty else 0
+    total_jugadoras = len(jugadoras)
+
+    if total_entrenamientos > 0 and not ranking_presencias.empty:
+        ranking_faltas = ranking_presencias.assign(Ausencias=total_entrenamientos - ranking_presencias["Presencias"])
+        ranking_faltas = ranking_faltas.sort_values("Ausencias", ascending=False)
+    else:
+        ranking_faltas = ranking_presencias
+
+    if total_entrenamientos > 0:
+        perfectas = df_asistencia.loc[df_asistencia["% Asistencia"] >= 100, "Jugadora"].tolist()
+        en_riesgo = df_asistencia.loc[df_asistencia["% Asistencia"] < 50, "Jugadora"].tolist()
+    else:
+        perfectas = []
+        en_riesgo = []
+
+    entrenamientos_mes = entrenamientos.set_index("Mes")["Entrenamientos del mes"]
+    presencias_mes = _por_mes(presencias, "Presencias")
+    tardanzas_mes = _por_mes(tardanzas, "Tardanzas")
+
+    ultimo_mes = entrenamientos_mes.index.max() if not entrenamientos_mes.empty else None
+    ultimo = {"entrenamientos": 0, "presencias": 0, "tardanzas": 0, "porcentaje": 0}
+    if ultimo_mes is not None:
+        ultimo["entrenamientos"] = int(entrenamientos_mes[entrenamientos_mes.index == ultimo_mes].sum())
+        if ultimo["entrenamientos"] > 0:
+            ultimo["presencias"] = int(presencias_mes.get(ultimo_mes, 0))
+            ultimo["tardanzas"] = int(tardanzas_mes.get(ultimo_mes, 0))
+            if total_jugadoras > 0:
+                ultimo["porcentaje"] = round(
+                    ultimo["presencias"] / (ultimo["entrenamientos"] * total_jugadoras) * 100, 1
+                )
+
+    mejor_mes = None
+    peor_mes = None
+    if total_jugadoras > 0 and not entrenamientos_mes.empty and not presencias.empty:
+        asistencia_mes_pct = (presencias_mes / (entrenamientos_mes * total_jugadoras) * 100).dropna()
+        if not asistencia_mes_pct.empty:
+            mejor_mes = asistencia_mes_pct.idxmax()
+            peor_mes = asistencia_mes_pct.idxmin()
+
+    return {
+        "total_entrenamientos": total_entrenamientos,
+        "total_presencias": total_presencias,
+        "total_tardanzas": total_tardanzas,
+        "top_jugadora": ranking.iloc[0]["Jugadora"] if not ranking.empty else "-",
+        "asistencia_promedio": round(total_presencias / total_entrenamientos, 1) if total_entrenamientos > 0 else 0,
+        "porcentaje_asistencia": (
+            round(total_presencias / (total_entrenamientos * total_jugadoras) * 100, 1)
+            if total_entrenamientos > 0 and total_jugadoras > 0
+            else 0
+        ),
+        "porcentaje_tardanzas": round(total_tardanzas / total_presencias * 100, 1) if total_presencias > 0 else 0,
+        "ranking": ranking,
+        "ranking_faltas": ranking_faltas,
+        "ranking_tardanzas": (
+            tardanzas
+            if tardanzas.empty
+            else tardanzas.groupby("Jugadora")["Tardanzas"]
+            .sum()
+            .reset_index()
+            .sort_values("Tardanzas", ascending=False)
+        ),
+        "df_asistencia": df_asistencia,
+        "top_asistencia": df_asistencia.sort_values("% Asistencia", ascending=False).head(5),
+        "bajo_asistencia": df_asistencia.sort_values("% Asistencia", ascending=True).head(5),
+        "perfectas": perfectas,
+        "en_riesgo": en_riesgo,
+        "sin_asistencia": sorted(set(jugadoras) - set(ranking["Jugadora"])) if not ranking.empty else [],
+        "ultimo_mes": ultimo,
+        "mejor_mes": mejor_mes,
+        "peor_mes": peor_mes,
+    }
+
+
+def obtener_insights(sheet_id, categoria, fecha_desde, fecha_hasta, jugadoras, version_plantel):
+    # None si no hay datos para el rango; también se memoiza.
+    version = particiones.versiones(sheet_id, fecha_desde, fecha_hasta)
+    clave = (sheet_id, categoria, fecha_desde, fecha_hasta, version, version_plantel)
+    with _lock:
+        if clave in _memo:
+            _memo.move_to_end(clave)
+            return _memo[clave]
+
+    resumen = generar_resumen(sheet_id, fecha_desde, fecha_hasta, list(jugadoras))
+    insights = dict(calcular_insights(resumen, jugadoras), resumen=resumen) if resumen else None
+
+    with _lock:
+        _memo[clave] = insights
+        while len(_memo) > MAX_MEMO:
+            _memo.popitem(last=False)
+    return insights
@@ -0,0 +1,102 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# Todas las llamadas a la API de Sheets pasan por llamar(): cuenta llamadas, errores, latencia
+# (histograma por tramos) y bytes enviados (estimados), en total para el proceso y por sesión de Streamlit.
+
+TRAMOS_MS = (50, 100, 250, 500, 1000, 2500, 5000)
+MAX_SESIONES = 200
+MUESTRA_TAMANO = 8
+SEGUNDO_PLANO = "segundo plano"
+
+_lock = threading.Lock()
+_proceso = {}
+_sesiones = OrderedDict()
+
+
+def sesion_actual():
+    # Sin importar streamlit: si no está cargado (CLI, benchmarks) no hay sesión.
+    if "streamlit" not in sys.modules:
+        return None
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx else SEGUNDO_PLANO
+
+
+def _tamano(valor):
+    # Bytes aproximados de lo que se envía, sin serializarlo: en una lista larga (filas, celdas) se mide el
+    # primer elemento y se multiplica por la cantidad, así el costo no crece con el tamaño del envío.
+    if isinstance(valor, str):
+        return len(valor) + 3
+    if isinstance(valor, dict):
+        return sum(len(str(k)) + 4 + _tamano(v) for k, v in valor.items())
+    if isinstance(valor, (list, tuple)):
+        if len(valor) > MUESTRA_TAMANO:
+            return len(valor) * (_tamano(valor[0]) + 1)
+        return sum(_tamano(v) + 1 for v in valor)
+    return 6
+
+
+def _sumar(tabla, clave, segundos, enviados, filas, error):
+    stats = tabla.get(clave)
+    if stats is None:
+        stats = {
+            "llamadas": 0,
+            "errores": 0,
+            "segundos": 0.0,
+            "max_seg": 0.0,
+            "bytes_enviados": 0,
+            "filas_recibidas": 0,
+            "histograma": [0] * (len(TRAMOS_MS) + 1),
+        }
+        tabla[clave] = stats
+    stats["llamadas"] += 1
+    stats["errores"] += int(error)
+    stats["segundos"] += segundos
+    stats["max_seg"] = max(stats["max_seg"], segundos)
+    stats["bytes_enviados"] += enviados
+    stats["filas_recibidas"] += filas
+    ms = segundos * 1000
+    stats["histograma"][next((i for i, tope in enumerate(TRAMOS_MS) if ms <= tope), len(TRAMOS_MS))] += 1
+
+
+def registrar(operacion, hoja, segundos, enviados=0, filas=0, error=False):
+    clave = (operacion, hoja)
+    sesion = sesion_actual()
+    with _lock:
+        _sumar(_proceso, clave, segundos, enviados, filas, error)
+        if sesion is not None:
+            tabla = _sesiones.pop(sesion, {})
+            _sesiones[sesion] = tabla
+            while len(_sesiones) > MAX_SESIONES:
+                _sesiones.popitem(last=False)
+            _sumar(tabla, clave, segundos, enviados, filas, error)
+
+
+def llamar(operacion, hoja, funcion, *args, **kwargs):
+    enviados = _tamano(args) + _tamano(kwargs) if args or kwargs else 0
+    inicio = time.perf_counter()
+    try:
+        resultado = funcion(*args, **kwargs)
+    except Exception:
+        registrar(operacion, hoja, time.perf_counter() - inicio, enviados, error=True)
+        raise
+    filas = len(resultado) if isinstance(resultado, list) else 0
+    registrar(operacion, hoja, time.perf_counter() - inicio, enviados, filas)
+    return resultado
+
+
+def estadisticas(sesion=None):
+    # Copia de {(operacion, hoja): stats}; con sesion, solo lo de esa sesión.
+    with _lock:
+        tabla = _proceso if sesion is None else _sesiones.get(sesion, {})
+        return {clave: dict(stats, histograma=list(stats["histograma"])) for clave, stats in tabla.items()}
+
+
+def reiniciar():
+    with _lock:
+        _proceso.clear()
+        _sesiones.clear()
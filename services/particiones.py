@@ -0,0 +1,194 @@
+import argparse
+import re
+import sys
+import threading
+import time
+
+import pandas as pd
+
+from services import cambios, snapshot
+from services.almacenamiento import ENCABEZADOS_ASISTENCIAS, obtener_almacenamiento
+from utils.helpers import indices_columnas, parsear_fechas
+
+# Asistencias partidas por mes: "Asistencias 2025-03", "Asistencias 2025-04", ... La hoja "Asistencias"
+# sigue existiendo para lo que no tiene fecha válida (y para archivos que todavía no se migraron):
+# siempre se lee, y mientras no haya particiones es la única hoja.
+
+HOJA_BASE = "Asistencias"
+PATRON_PARTICION = re.compile(rf"^{HOJA_BASE} (\d{{4}}-\d{{2}})$")
+INTERVALO_LISTADO_SEG = 300
+INTENTOS_MIGRACION = 3
+
+_lock = threading.Lock()
+# sheet_id -> {"meses": [mes], "leido": monotonic, "revision": revisión del archivo al listar}
+_listados = {}
+
+
+def nombre_particion(mes):
+    return f"{HOJA_BASE} {mes}"
+
+
+def _meses_de(fechas):
+    # Mismo parseo que el snapshot: lo que no es una fecha válida queda sin mes.
+    return parsear_fechas(fechas).dt.strftime("%Y-%m").fillna("").tolist()
+
+
+def meses_particionados(sheet_id, forzar=False):
+    revision = cambios.revision(sheet_id)
+    with _lock:
+        listado = _listados.get(sheet_id)
+        if listado and not forzar:
+            if revision is not None and listado["revision"] == revision:
+                return list(listado["meses"])
+            if revision is None and time.monotonic() - listado["leido"] < INTERVALO_LISTADO_SEG:
+                return list(listado["meses"])
+        hojas = obtener_almacenamiento(sheet_id).listar_hojas()
+        meses = sorted(m.group(1) for m in (PATRON_PARTICION.match(h) for h in hojas) if m)
+        _listados[sheet_id] = {"meses": meses, "leido": time.monotonic(), "revision": revision}
+        return list(meses)
+
+
+def olvidar_listado(sheet_id=None):
+    with _lock:
+        if sheet_id is None:
+            _listados.clear()
+        else:
+            _listados.pop(sheet_id, None)
+
+
+def _registrar_particion(sheet_id, mes):
+    with _lock:
+        listado = _listados.get(sheet_id)
+        if listado is not None and mes not in listado["meses"]:
+            listado["meses"] = sorted(listado["meses"] + [mes])
+
+
+def hojas_del_rango(sheet_id, fecha_desde=None, fecha_hasta=None):
+    # Solo las particiones cuyo mes se cruza con el rango (None = abierto), más la hoja base.
+    desde = pd.Timestamp(fecha_desde).strftime("%Y-%m") if fecha_desde is not None else None
+    hasta = pd.Timestamp(fecha_hasta).strftime("%Y-%m") if fecha_hasta is not None else None
+    meses = [
+        m
+        for m in meses_particionados(sheet_id)
+        if (desde is None or m >= desde) and (hasta is None or m <= hasta)
+    ]
+    return [HOJA_BASE] + [nombre_particion(m) for m in meses]
+
+
+def hojas_de_fecha(sheet_id, fecha):
+    return hojas_del_rango(sheet_id, fecha, fecha)
+
+
+def versiones(sheet_id, fecha_desde=None, fecha_hasta=None):
+    # Identifica el estado de los datos de un rango: cambia si cambia cualquiera de sus hojas.
+    return tuple(
+        (hoja, snapshot.sincronizar(sheet_id, hoja)["version"])
+        for hoja in hojas_del_rango(sheet_id, fecha_desde, fecha_hasta)
+    )
+
+
+def asegurar_particion(sheet_id, mes, encabezados=ENCABEZADOS_ASISTENCIAS):
+    # Devuelve (nombre, creada).
+    nombre = nombre_particion(mes)
+    almacenamiento = obtener_almacenamiento(sheet_id)
+    creada = almacenamiento.asegurar_hoja(nombre, 1000, len(encabezados))
+    if creada:
+        almacenamiento.actualizar_filas(nombre, [{"inicio": 1, "values": [list(encabezados)]}])
+    _registrar_particion(sheet_id, mes)
+    return nombre, creada
+
+
+def agrupar_por_hoja(sheet_id, filas):
+    # Sin particiones todo va a la hoja base; con particiones, cada fila a la de su mes (se crea si falta).
+    if not meses_particionados(sheet_id):
+        return {HOJA_BASE: list(filas)} if filas else {}
+    grupos = {}
+    for fila, mes in zip(filas, _meses_de([f[0] for f in filas])):
+        hoja = asegurar_particion(sheet_id, mes)[0] if mes else HOJA_BASE
+        grupos.setdefault(hoja, []).append(fila)
+    return grupos
+
+
+def _recortar(fila):
+    fila = [str(v) for v in fila]
+    while fila and fila[-1] == "":
+        fila.pop()
+    return fila
+
+
+def _ya_copiadas(filas_mes, filas_particion):
+    # Cuántas filas del mes ya se copiaron. Cada vuelta agrega a la partición las filas del mes en el orden
+    # de la base, así que se busca hasta dónde aparecen en ese orden: se cuenta por posición y no por
+    # contenido, y dos filas iguales en la base siguen siendo dos.
+    restantes = iter([tuple(_recortar(f)) for f in filas_particion])
+    copiadas = 0
+    for fila in filas_mes:
+        buscada = tuple(_recortar(fila))
+        if not any(p == buscada for p in restantes):
+            break
+        copiadas += 1
+    return copiadas
+
+
+def migrar(sheet_id):
+    # Reparte la hoja base en particiones mensuales y la deja con el encabezado y las filas sin fecha
+    # válida. Si se corta a mitad de camino se puede volver a correr: se retoma cada mes desde la
+    # última fila copiada. Si mientras tanto se agregan filas a la base, se vuelve a leer y se reparte
+    # lo nuevo; tras INTENTOS_MIGRACION vueltas se deja la base sin tocar ("completa": False).
+    almacenamiento = obtener_almacenamiento(sheet_id)
+    # mes -> filas del mes (en el orden de la base) que ya están en su partición.
+    copiadas = {}
+    for _ in range(INTENTOS_MIGRACION):
+        datos = almacenamiento.leer_filas(HOJA_BASE)
+        if not datos:
+            return {"movidas": {}, "sin_fecha": 0, "completa": True}
+        encabezados, filas = datos[0], datos[1:]
+        indice_fecha = indices_columnas(encabezados, ["Fecha"])["Fecha"]
+
+        filas = [f for f in filas if any(str(v).strip() for v in f)]
+        meses = _meses_de([f[indice_fecha] if indice_fecha < len(f) else "" for f in filas])
+        por_mes = {}
+        sin_fecha = [encabezados]
+        for fila, mes in zip(filas, meses):
+            if mes:
+                por_mes.setdefault(mes, []).append(fila)
+            else:
+                sin_fecha.append(fila)
+
+        for mes, filas_mes in sorted(por_mes.items()):
+            nombre, creada = asegurar_particion(sheet_id, mes, encabezados)
+            if mes not in copiadas:
+                copiadas[mes] = 0 if creada else _ya_copiadas(filas_mes, almacenamiento.leer_filas(nombre)[1:])
+            # La base solo crece mientras no se reescribe: lo nuevo de cada mes está al final.
+            if len(filas_mes) > copiadas[mes]:
+                almacenamiento.agregar_filas(nombre, filas_mes[copiadas[mes] :])
+            copiadas[mes] = len(filas_mes)
+            snapshot.invalidar(sheet_id, nombre)
+        olvidar_listado(sheet_id)
+        # Recién con todo copiado se reescribe la base, en una sola operación y solo si no creció.
+        completa = almacenamiento.reemplazar_filas(HOJA_BASE, sin_fecha, len(datos))
+        if completa:
+            snapshot.invalidar(sheet_id, HOJA_BASE)
+            break
+    movidas = {mes: len(f) for mes, f in sorted(por_mes.items())}
+    return {"movidas": movidas, "sin_fecha": len(sin_fecha) - 1, "completa": completa}
+
+
+def main(argv=None):
+    from config import SHEET_ID
+
+    parser = argparse.ArgumentParser(description="Parte la hoja Asistencias en hojas mensuales.")
+    parser.add_argument("--sheet-id", default=SHEET_ID)
+    args = parser.parse_args(argv)
+    informe = migrar(args.sheet_id)
+    for mes, cantidad in informe["movidas"].items():
+        print(f"{nombre_particion(mes)}: {cantidad} filas")
+    if not informe["completa"]:
+        print(f"'{HOJA_BASE}' siguió recibiendo filas durante la migración: quedó sin recortar. Volvé a correrla.")
+        return 1
+    print(f"Quedan en '{HOJA_BASE}' sin fecha válida: {informe['sin_fecha']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
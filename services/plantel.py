@@ -0,0 +1,89 @@
+import hashlib
+import re
+import threading
+import time
+
+from services import cambios
+from services.almacenamiento import obtener_almacenamiento
+
+# Un solo plantel por proceso, compartido por todas las sesiones, con las listas de cada categoría
+# ya ordenadas. La versión sube solo cuando cambia el contenido de la hoja "Jugadoras". Mientras la
+# revisión del archivo no cambie no se relee; si el backend no da revisión, se relee cada tanto.
+
+CATEGORIAS = ["Primera", "Intermedia", "Todas"]
+CODIGOS_CATEGORIA = {"Primera": "1", "Intermedia": "2"}
+INTERVALO_RELECTURA_SEG = 300
+
+_lock = threading.Lock()
+_planteles = {}
+
+
+def parse_categoria_unica(value):
+    if value is None:
+        return "", False
+    texto = str(value)
+    encontrados = re.findall(r"[12]", texto)
+    if not encontrados:
+        return "", False
+    categoria = encontrados[0]
+    ambas = ("1" in encontrados) and ("2" in encontrados)
+    return categoria, ambas
+
+
+def armar_plantel(filas, version=1):
+    jugadoras = {}
+    for nombre, categoria_raw in filas:
+        nombre = nombre.strip()
+        if not nombre or nombre in jugadoras:
+            continue
+        categoria, ambas = parse_categoria_unica(categoria_raw)
+        jugadoras[nombre] = {"jugadora": nombre, "categoria": categoria, "ambas": ambas}
+
+    por_categoria = {"Todas": tuple(sorted(jugadoras))}
+    for categoria, codigo in CODIGOS_CATEGORIA.items():
+        por_categoria[categoria] = tuple(sorted(n for n, j in jugadoras.items() if j["categoria"] == codigo))
+    return {
+        "version": version,
+        "jugadoras": tuple(jugadoras.values()),
+        "por_categoria": por_categoria,
+        "hay_ambas": any(j["ambas"] for j in jugadoras.values()),
+    }
+
+
+def _huella(filas):
+    return hashlib.blake2b(repr([list(f) for f in filas]).encode("utf-8"), digest_size=16).digest()
+
+
+def obtener_plantel(sheet_id, forzar=False):
+    # La revisión se toma antes de leer: si la hoja cambia durante la lectura, el próximo sondeo lo nota.
+    revision = cambios.revision(sheet_id)
+    # El lock se mantiene durante la lectura: las sesiones que llegan mientras tanto esperan ese mismo
+    # resultado en vez de pedir la hoja otra vez.
+    with _lock:
+        actual = _planteles.get(sheet_id)
+        ahora = time.monotonic()
+        if actual and not forzar:
+            if revision is not None and actual["revision"] == revision:
+                return actual["plantel"]
+            if revision is None and ahora - actual["leido"] < INTERVALO_RELECTURA_SEG:
+                return actual["plantel"]
+        filas = obtener_almacenamiento(sheet_id).leer_jugadoras()
+        huella = _huella(filas)
+        if actual and actual["huella"] == huella:
+            actual["leido"] = ahora
+            actual["revision"] = revision
+            return actual["plantel"]
+        version = actual["plantel"]["version"] + 1 if actual else 1
+        plantel = armar_plantel(filas, version)
+        _planteles[sheet_id] = {"plantel": plantel, "huella": huella, "leido": ahora, "revision": revision}
+        return plantel
+
+
+def invalidar_plantel(sheet_id):
+    # "Recargar plantel" del panel de admin. Se fuerza la relectura sin perder la versión: si la hoja no
+    # cambió, sigue siendo la misma.
+    with _lock:
+        actual = _planteles.get(sheet_id)
+        if actual:
+            actual["leido"] = float("-inf")
+            actual["revision"] = None
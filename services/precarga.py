@@ -0,0 +1,24 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from services import acumulados, particiones
+from services.plantel import obtener_plantel
+
+# Compartido por todas las sesiones: cada login dispara sus lecturas en paralelo.
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="precarga")
+
+
+def _calentar_asistencias(sheet_id):
+    # Deja armadas la tabla compacta y las sumas acumuladas que usan Registro y Resumen,
+    # para las hojas del rango que Resumen muestra por defecto.
+    hoy = date.today()
+    for hoja in particiones.hojas_del_rango(sheet_id, hoy - timedelta(days=45), hoy):
+        acumulados.obtener(sheet_id, hoja)
+
+
+def iniciar_precarga(sheet_id):
+    return {
+        "jugadoras": _executor.submit(obtener_plantel, sheet_id),
+        "asistencias": _executor.submit(_calentar_asistencias, sheet_id),
+    }
+
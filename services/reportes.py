@@ -0,0 +1,149 @@
+import argparse
+import csv
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+from services import particiones, snapshot, tabla
+from services.asistencia import armar_resumen
+from services.hoja_resumen import BLOQUES_RESUMEN, armar_grilla, escribir_resumen
+from services.insights import calcular_insights
+from services.plantel import CATEGORIAS, obtener_plantel
+
+# Resúmenes de todas las categorías y varias ventanas de fechas sin abrir la app (p. ej. desde cron):
+#   python -m services.reportes --ventanas 30d 90d 2025 todo --carpeta reportes/
+# Las asistencias se leen una sola vez; cada (categoría, ventana) se calcula en un pool de procesos.
+# No importa Streamlit: para Sheets, las credenciales salen de ASISTENCIA_CREDENCIALES.
+
+VENTANAS_POR_DEFECTO = ["30d", "90d", "temporada", "todo"]
+
+# Tablas compactas de asistencias, cargadas una vez por proceso del pool.
+_tablas = []
+
+
+def parsear_ventana(texto, hoy):
+    # "30d": últimos 30 días; "2025": esa temporada; "temporada": la actual; "todo": sin límites.
+    if texto == "todo":
+        return None, None
+    if texto == "temporada":
+        return date(hoy.year, 1, 1), hoy
+    if re.fullmatch(r"\d+d", texto):
+        return hoy - timedelta(days=int(texto[:-1])), hoy
+    if re.fullmatch(r"\d{4}", texto):
+        return date(int(texto), 1, 1), min(date(int(texto), 12, 31), hoy)
+    raise argparse.ArgumentTypeError(f"Ventana inválida: {texto} (usar 30d, 2025, temporada o todo)")
+
+
+def cargar_asistencias(sheet_id, desde=None, hasta=None):
+    # Una lectura (incremental, vía snapshot) de cada hoja que cubre el rango pedido. Los procesos
+    # reciben las tablas compactas: arreglos numéricos que se copian rápido, sin columnas de texto.
+    tablas = []
+    for hoja in particiones.hojas_del_rango(sheet_id, desde, hasta):
+        meta = snapshot.sincronizar(sheet_id, hoja)
+        if meta["total_filas"] >= 2:
+            compacta = tabla.obtener(sheet_id, hoja, meta["version"])
+            tablas.append({c: compacta[c] for c in ("dia", "jugadora", "estado", "jugadoras", "codigos")})
+    return tablas
+
+
+def _inicializar(tablas):
+    global _tablas
+    _tablas = tablas
+
+
+def _calcular(tarea):
+    categoria, ventana, desde, hasta, jugadoras = tarea
+    agrupadas = tabla.agrupar(_tablas, desde, hasta, jugadoras)
+    if agrupadas is None:
+        return categoria, ventana, None, None
+    resumen = armar_resumen(*agrupadas)
+    return categoria, ventana, resumen, calcular_insights(resumen, jugadoras)
+
+
+def generar_reportes(sheet_id, ventanas, procesos=None):
+    # ventanas: {nombre: (desde, hasta)}. Devuelve [(categoría, ventana, resumen, insights)].
+    plantel = obtener_plantel(sheet_id)
+    desdes = [d for d, _ in ventanas.values()]
+    hastas = [h for _, h in ventanas.values()]
+    desde = None if None in desdes else min(desdes)
+    hasta = None if None in hastas else max(hastas)
+    datos = cargar_asistencias(sheet_id, desde, hasta)
+
+    tareas = [
+        (categoria, nombre, d, h, plantel["por_categoria"][categoria])
+        for categoria in CATEGORIAS
+        for nombre, (d, h) in ventanas.items()
+    ]
+    # Cada proceso recibe los datos una vez al arrancar, no con cada tarea.
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar, initargs=(datos,)) as pool:
+        return list(pool.map(_calcular, tareas))
+
+
+def _nombre(categoria, ventana):
+    return f"{categoria} {ventana}"
+
+
+def guardar_en_carpeta(carpeta, resultados):
+    os.makedirs(carpeta, exist_ok=True)
+    rutas = []
+    for categoria, ventana, resumen, _ in resultados:
+        if resumen is None:
+            continue
+        ruta = os.path.join(carpeta, f"resumen-{categoria.lower()}-{ventana}.csv")
+        with open(ruta, "w", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerows(armar_grilla([resumen[b] for b in BLOQUES_RESUMEN]))
+        rutas.append(ruta)
+    return rutas
+
+
+def guardar_en_hojas(sheet_id, resultados):
+    # Una hoja "Resumen <categoría> <ventana>" por combinación; solo se reescribe lo que cambió.
+    nombres = []
+    for categoria, ventana, resumen, _ in resultados:
+        if resumen is None:
+            continue
+        nombre = f"Resumen {_nombre(categoria, ventana)}"
+        escribir_resumen(sheet_id, [resumen[b] for b in BLOQUES_RESUMEN], nombre)
+        nombres.append(nombre)
+    return nombres
+
+
+def main(argv=None):
+    from config import SHEET_ID
+
+    parser = argparse.ArgumentParser(description="Resúmenes de asistencia de todas las categorías.")
+    parser.add_argument("--sheet-id", default=SHEET_ID)
+    parser.add_argument("--ventanas", nargs="+", default=VENTANAS_POR_DEFECTO, help="30d, 2025, temporada o todo.")
+    parser.add_argument("--carpeta", help="Guarda un CSV por categoría y ventana en esta carpeta.")
+    parser.add_argument("--hojas", action="store_true", help="Escribe una hoja 'Resumen ...' por categoría y ventana.")
+    parser.add_argument("--procesos", type=int, help="Procesos del pool (por defecto, uno por CPU).")
+    args = parser.parse_args(argv)
+
+    hoy = date.today()
+    try:
+        ventanas = {v: parsear_ventana(v, hoy) for v in args.ventanas}
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    resultados = generar_reportes(args.sheet_id, ventanas, args.procesos)
+    for categoria, ventana, resumen, insights in resultados:
+        if resumen is None:
+            print(f"{_nombre(categoria, ventana):<24} sin datos")
+            continue
+        print(
+            f"{_nombre(categoria, ventana):<24} entrenamientos {insights['total_entrenamientos']:>4}  "
+            f"presencias {insights['total_presencias']:>6}  asistencia {insights['porcentaje_asistencia']:>5}%"
+        )
+    if args.carpeta:
+        for ruta in guardar_en_carpeta(args.carpeta, resultados):
+            print(f"Guardado: {ruta}")
+    if args.hojas:
+        for nombre in guardar_en_hojas(args.sheet_id, resultados):
+            print(f"Hoja actualizada: {nombre}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,351 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from services import cambios
+from services.almacenamiento import obtener_almacenamiento
+from utils.helpers import normalizar_texto, parsear_fechas
+
+RUTA_SNAPSHOT = os.environ.get("ASISTENCIA_SNAPSHOT", os.path.join(".cache", "asistencias.sqlite3"))
+
+# Mientras la revisión del archivo no cambie se sirve la copia local sin tocar la API. Si el backend no
+# da revisión, se sirve durante este intervalo entre sincronizaciones.
+INTERVALO_SYNC_SEG = 30
+# Las ediciones en el medio de la hoja no se detectan con la cola: cada tanto se recarga todo.
+RECARGA_COMPLETA_SEG = 60 * 60
+
+COLUMNAS = {
+    "fecha": "Fecha",
+    "jugadora": "Jugadora",
+    "asistio": "Asistió",
+    "tarde": "Llegó tarde",
+    "comentario": "Comentario",
+}
+
+# Subirlo cuando cambien las tablas: el snapshot es una caché y se reconstruye desde la hoja.
+VERSION_ESQUEMA = 3
+
+# Si mientras se lee la hoja alguien registra una escritura o invalida, se descarta lo leído y se vuelve
+# a sincronizar desde el estado nuevo, hasta este número de veces.
+INTENTOS_SYNC = 3
+
+_lock = threading.Lock()
+# (sheet_id, hoja) -> (estado, sync). "estado" protege la meta y las filas y nunca se tiene durante un
+# request; "sync" deja una sola lectura de la hoja en curso: las demás sesiones esperan y usan su resultado.
+_locks = {}
+_esquema_listo = set()
+# (sheet_id, hoja) -> revisión del archivo en la última sincronización de este proceso.
+_revisiones = {}
+
+
+def conectar():
+    carpeta = os.path.dirname(RUTA_SNAPSHOT)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+    con = sqlite3.connect(RUTA_SNAPSHOT, timeout=30, check_same_thread=False)
+    if RUTA_SNAPSHOT not in _esquema_listo:
+        con.execute("PRAGMA journal_mode=WAL")
+        if con.execute("PRAGMA user_version").fetchone()[0] != VERSION_ESQUEMA:
+            tablas = [t for (t,) in con.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+            for tabla in tablas:
+                con.execute(f'DROP TABLE IF EXISTS "{tabla}"')
+            con.execute(f"PRAGMA user_version = {VERSION_ESQUEMA}")
+        con.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS meta (
+                sheet_id TEXT NOT NULL,
+                hoja TEXT NOT NULL,
+                encabezados TEXT NOT NULL,
+                total_filas INTEGER NOT NULL,
+                ultima_fila TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                sincronizado REAL NOT NULL,
+                recargado REAL NOT NULL,
+                PRIMARY KEY (sheet_id, hoja)
+            );
+            CREATE TABLE IF NOT EXISTS filas (
+                sheet_id TEXT NOT NULL,
+                hoja TEXT NOT NULL,
+                fila INTEGER NOT NULL,
+                fecha TEXT NOT NULL,
+                jugadora TEXT NOT NULL,
+                asistio TEXT NOT NULL,
+                tarde TEXT NOT NULL,
+                comentario TEXT NOT NULL,
+                mes TEXT NOT NULL,
+                dia INTEGER NOT NULL,
+                PRIMARY KEY (sheet_id, hoja, fila)
+            );
+            CREATE INDEX IF NOT EXISTS filas_fecha ON filas (sheet_id, hoja, fecha);
+            CREATE INDEX IF NOT EXISTS filas_mes ON filas (sheet_id, hoja, mes);
+            """
+        )
+        _esquema_listo.add(RUTA_SNAPSHOT)
+    return con
+
+
+def _locks_de(sheet_id, hoja):
+    with _lock:
+        return _locks.setdefault((sheet_id, hoja), (threading.Lock(), threading.Lock()))
+
+
+def _recortar(fila):
+    fila = [str(v) for v in fila]
+    while fila and fila[-1] == "":
+        fila.pop()
+    return fila
+
+
+def _mapa_columnas(encabezados):
+    encabezados_norm = [normalizar_texto(e) for e in encabezados]
+    mapa = {}
+    for campo, nombre in COLUMNAS.items():
+        nombre_norm = normalizar_texto(nombre)
+        if nombre_norm in encabezados_norm:
+            mapa[campo] = encabezados_norm.index(nombre_norm)
+    return mapa
+
+
+def _normalizar_fila(fila, mapa):
+    def valor(campo):
+        i = mapa.get(campo)
+        if i is None or i >= len(fila):
+            return ""
+        return str(fila[i])
+
+    return (
+        valor("fecha").strip(),
+        valor("jugadora").strip(),
+        valor("asistio").strip().upper(),
+        valor("tarde").strip().upper(),
+        valor("comentario"),
+    )
+
+
+def _leer_meta(con, sheet_id, hoja):
+    fila = con.execute(
+        "SELECT encabezados, total_filas, ultima_fila, version, sincronizado, recargado "
+        "FROM meta WHERE sheet_id = ? AND hoja = ?",
+        (sheet_id, hoja),
+    ).fetchone()
+    if fila is None:
+        return None
+    return {
+        "encabezados": json.loads(fila[0]),
+        "total_filas": fila[1],
+        "ultima_fila": json.loads(fila[2]),
+        "version": fila[3],
+        "sincronizado": fila[4],
+        "recargado": fila[5],
+    }
+
+
+def _guardar_meta(con, sheet_id, hoja, meta):
+    con.execute(
+        "INSERT OR REPLACE INTO meta "
+        "(sheet_id, hoja, encabezados, total_filas, ultima_fila, version, sincronizado, recargado) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            sheet_id,
+            hoja,
+            json.dumps(meta["encabezados"]),
+            meta["total_filas"],
+            json.dumps(meta["ultima_fila"]),
+            meta["version"],
+            meta["sincronizado"],
+            meta["recargado"],
+        ),
+    )
+
+
+def _meses_y_dias(fechas):
+    # Mismo parseo que usa generar_resumen; las fechas inválidas quedan con mes vacío.
+    parseadas = parsear_fechas(fechas)
+    meses = parseadas.dt.strftime("%Y-%m").fillna("").tolist()
+    dias = parseadas.dt.day.fillna(0).astype(int).tolist()
+    return meses, dias
+
+
+def _insertar_filas(con, sheet_id, hoja, fila_inicio, filas, mapa):
+    normalizadas = [_normalizar_fila(fila, mapa) for fila in filas]
+    meses, dias = _meses_y_dias([f[0] for f in normalizadas])
+    con.executemany(
+        "INSERT OR REPLACE INTO filas "
+        "(sheet_id, hoja, fila, fecha, jugadora, asistio, tarde, comentario, mes, dia) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            (sheet_id, hoja, fila_inicio + i) + fila + (meses[i], dias[i])
+            for i, fila in enumerate(normalizadas)
+        ),
+    )
+
+
+def _traer(almacenamiento, hoja, meta, ahora):
+    # Lo único que va a la red. Devuelve ("recarga", hoja entera) o ("cola", filas nuevas).
+    if meta is None or meta["total_filas"] < 1 or ahora - meta["recargado"] > RECARGA_COMPLETA_SEG:
+        return "recarga", almacenamiento.leer_filas(hoja)
+    # Se pide desde la última fila conocida: si cambió, la hoja se editó y hay que recargar.
+    cola = almacenamiento.leer_filas(hoja, meta["total_filas"], columnas=max(len(meta["encabezados"]), 1))
+    if not cola or _recortar(cola[0]) != meta["ultima_fila"]:
+        return "recarga", almacenamiento.leer_filas(hoja)
+    return "cola", cola[1:]
+
+
+def _recargar(con, sheet_id, hoja, meta, datos):
+    encabezados = datos[0] if datos else []
+    mapa = _mapa_columnas(encabezados)
+    con.execute("DELETE FROM filas WHERE sheet_id = ? AND hoja = ?", (sheet_id, hoja))
+    _insertar_filas(con, sheet_id, hoja, 2, datos[1:], mapa)
+    ahora = time.time()
+    nueva_meta = {
+        "encabezados": encabezados,
+        "total_filas": len(datos),
+        "ultima_fila": _recortar(datos[-1]) if datos else [],
+        "version": (meta["version"] + 1) if meta else 1,
+        "sincronizado": ahora,
+        "recargado": ahora,
+    }
+    _guardar_meta(con, sheet_id, hoja, nueva_meta)
+    return nueva_meta
+
+
+def _agregar_cola(con, sheet_id, hoja, meta, nuevas):
+    total = meta["total_filas"]
+    meta = dict(meta, sincronizado=time.time())
+    if nuevas:
+        _insertar_filas(con, sheet_id, hoja, total + 1, nuevas, _mapa_columnas(meta["encabezados"]))
+        meta["total_filas"] = total + len(nuevas)
+        meta["ultima_fila"] = _recortar(nuevas[-1])
+        meta["version"] += 1
+    _guardar_meta(con, sheet_id, hoja, meta)
+    return meta
+
+
+def _meta(sheet_id, hoja):
+    con = conectar()
+    try:
+        return _leer_meta(con, sheet_id, hoja)
+    finally:
+        con.close()
+
+
+def sincronizar(sheet_id, hoja="Asistencias", forzar=False):
+    # La revisión se toma antes de leer: si la hoja cambia durante la lectura, el próximo sondeo lo nota.
+    revision = cambios.revision(sheet_id)
+    clave = (sheet_id, hoja)
+    estado, sync = _locks_de(sheet_id, hoja)
+    with sync:
+        for _ in range(INTENTOS_SYNC):
+            with estado:
+                meta = _meta(sheet_id, hoja)
+                ahora = time.time()
+                # Una meta con sincronizado = 0 quedó desfasada (invalidar o un agregado fuera de lugar):
+                # la revisión en caché del sondeo puede ser de antes de ese cambio y no alcanza.
+                if meta and meta["sincronizado"] and not forzar:
+                    if revision is not None and _revisiones.get(clave) == revision:
+                        return meta
+                    if revision is None and ahora - meta["sincronizado"] < INTERVALO_SYNC_SEG:
+                        return meta
+            # La lectura va sin el lock de estado: registrar_escritura no espera a la red.
+            tipo, datos = _traer(obtener_almacenamiento(sheet_id), hoja, meta, ahora)
+            with estado:
+                con = conectar()
+                try:
+                    with con:
+                        if _leer_meta(con, sheet_id, hoja) == meta:
+                            if tipo == "recarga":
+                                meta = _recargar(con, sheet_id, hoja, meta, datos)
+                            else:
+                                meta = _agregar_cola(con, sheet_id, hoja, meta, datos)
+                            _revisiones[clave] = revision
+                            return meta
+                finally:
+                    con.close()
+        # Siguió cambiando mientras se leía: se devuelve lo que hay sin marcar la revisión como vista,
+        # así la próxima llamada vuelve a sincronizar.
+        with estado:
+            return _meta(sheet_id, hoja)
+
+
+def invalidar(sheet_id, hoja="Asistencias"):
+    with _locks_de(sheet_id, hoja)[0]:
+        _revisiones.pop((sheet_id, hoja), None)
+        con = conectar()
+        try:
+            with con:
+                con.execute(
+                    "UPDATE meta SET sincronizado = 0, recargado = 0 WHERE sheet_id = ? AND hoja = ?",
+                    (sheet_id, hoja),
+                )
+        finally:
+            con.close()
+
+
+def registrar_escritura(sheet_id, hoja, actualizadas, agregadas, fila_agregadas=None):
+    # actualizadas: {fila: valores}; agregadas: lista de valores escritos a partir de fila_agregadas.
+    with _locks_de(sheet_id, hoja)[0]:
+        con = conectar()
+        try:
+            with con:
+                meta = _leer_meta(con, sheet_id, hoja)
+                if meta is None:
+                    return None
+                mapa = _mapa_columnas(meta["encabezados"])
+                for fila, valores in actualizadas.items():
+                    _insertar_filas(con, sheet_id, hoja, fila, [valores], mapa)
+                    if fila == meta["total_filas"]:
+                        meta["ultima_fila"] = _recortar(valores)
+                if agregadas:
+                    if fila_agregadas != meta["total_filas"] + 1:
+                        # Otra sesión agregó filas en el medio: que la próxima lectura recargue.
+                        meta["sincronizado"] = 0
+                        meta["recargado"] = 0
+                        _revisiones.pop((sheet_id, hoja), None)
+                    else:
+                        _insertar_filas(con, sheet_id, hoja, fila_agregadas, agregadas, mapa)
+                        meta["total_filas"] += len(agregadas)
+                        meta["ultima_fila"] = _recortar(agregadas[-1])
+                meta["version"] += 1
+                _guardar_meta(con, sheet_id, hoja, meta)
+                return meta["version"]
+        finally:
+            con.close()
+
+
+def filas(sheet_id, hoja="Asistencias", fecha=None):
+    con = conectar()
+    try:
+        consulta = (
+            "SELECT fila, fecha, jugadora, asistio, tarde, comentario FROM filas "
+            "WHERE sheet_id = ? AND hoja = ?"
+        )
+        params = [sheet_id, hoja]
+        if fecha is not None:
+            consulta += " AND fecha = ?"
+            params.append(fecha)
+        return con.execute(consulta + " ORDER BY fila", params).fetchall()
+    finally:
+        con.close()
+
+
+def iterar_filas(sheet_id, hoja="Asistencias", meses=None, tamano=5000):
+    # Tandas de tuplas (Fecha, Jugadora, Asistió, Llegó tarde, Comentario) leídas con un cursor: la hoja
+    # nunca se arma entera en memoria.
+    consulta = "SELECT fecha, jugadora, asistio, tarde, comentario FROM filas WHERE sheet_id = ? AND hoja = ?"
+    params = [sheet_id, hoja]
+    if meses is not None:
+        meses = list(meses)
+        consulta += f" AND mes IN ({', '.join('?' for _ in meses)})"
+        params.extend(meses)
+    con = conectar()
+    try:
+        cursor = con.execute(consulta + " ORDER BY fila", params)
+        while True:
+            tanda = cursor.fetchmany(tamano)
+            if not tanda:
+                return
+            yield tanda
+    finally:
+        con.close()
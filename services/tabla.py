@@ -0,0 +1,312 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from services import snapshot
+from utils.helpers import parsear_fechas
+
+# Tabla compacta de asistencias, una por (sheet_id, hoja) y versión del snapshot, compartida por todas las
+# sesiones. Cada fila ocupa 13 bytes en arreglos numpy de solo lectura:
+#   "fila"      int32  número de fila en la hoja (ordenadas de menor a mayor)
+#   "dia"       int32  días desde 1970-01-01; DIA_INVALIDO si la fecha no se pudo leer
+#   "jugadora"  int32  código en la tupla "jugadoras"
+#   "estado"    int8   ASISTIO | TARDE (TARDE solo si asistió, como cuenta Resumen)
+# Los comentarios van aparte ({fila: texto}), solo los que no están vacíos, y "por_dia" guarda las posiciones
+# de cada día ({dia: posiciones}) para que Registro encuentre una fecha sin recorrer la tabla.
+# Una tabla publicada no cambia nunca. Los arreglos son vistas de "reserva", que deja lugar al final: lo
+# agregado se escribe ahí y la tabla nueva solo alarga las vistas, así que quien tenga la anterior no ve filas
+# de más. Corregir filas copia antes la columna que cambia (copia al escribir), y "codigos", "comentarios" y
+# "por_dia" son diccionarios nuevos en cada versión que los toca.
+
+DIA_INVALIDO = np.iinfo(np.int32).min
+ASISTIO = 1
+TARDE = 2
+COLUMNAS_NUMERICAS = ("fila", "dia", "jugadora", "estado")
+# Lugar libre que se deja al armar la tabla: un octavo de las filas, como mínimo este número.
+RESERVA_MINIMA = 1024
+
+_lock = threading.Lock()
+# (sheet_id, hoja) -> tabla
+_tablas = {}
+
+
+def dia_ordinal(fecha):
+    return int(pd.Timestamp(fecha).to_datetime64().astype("datetime64[D]").astype(np.int64))
+
+
+def meses_de(dias):
+    return dias.astype("datetime64[D]").astype("datetime64[M]").astype(np.int32)
+
+
+def _solo_lectura(arreglo):
+    arreglo.flags.writeable = False
+    return arreglo
+
+
+def _codificar(jugadoras, nombres, codigos):
+    # Agrega a nombres/codigos las jugadoras que no tenían código todavía.
+    salida = np.empty(len(jugadoras), dtype=np.int32)
+    for i, nombre in enumerate(jugadoras):
+        codigo = codigos.get(nombre)
+        if codigo is None:
+            codigo = codigos[nombre] = len(nombres)
+            nombres.append(nombre)
+        salida[i] = codigo
+    return salida
+
+
+def _columnas(filas, nombres, codigos):
+    # filas: tuplas (fila, fecha, jugadora, asistio, tarde, comentario) como las guarda el snapshot.
+    numeros, fechas, jugadoras, asistio, tarde, comentarios = zip(*filas)
+    dias = parsear_fechas(pd.Series(fechas, dtype=object)).to_numpy().astype("datetime64[D]")
+    dia = np.where(np.isnat(dias), DIA_INVALIDO, dias.astype(np.int64)).astype(np.int32)
+    presente = np.array(asistio, dtype=object) == "SÍ"
+    estado = (presente * ASISTIO + (presente & (np.array(tarde, dtype=object) == "SÍ")) * TARDE).astype(np.int8)
+    return (
+        np.array(numeros, dtype=np.int32),
+        dia,
+        _codificar(jugadoras, nombres, codigos),
+        estado,
+        {n: c for n, c in zip(numeros, comentarios) if c},
+    )
+
+
+def _por_dia(dia):
+    validos = np.flatnonzero(dia != DIA_INVALIDO)
+    orden = validos[np.argsort(dia[validos], kind="stable")].astype(np.int32)
+    dias, cortes = np.unique(dia[orden], return_index=True)
+    return {d: _solo_lectura(p) for d, p in zip(dias.tolist(), np.split(orden, cortes[1:]))}
+
+
+def _vista(version, reserva, total, nombres, codigos, comentarios, por_dia):
+    tabla = {
+        "version": version,
+        "jugadoras": tuple(nombres),
+        "codigos": codigos,
+        "comentarios": comentarios,
+        "por_dia": por_dia,
+        "reserva": reserva,
+    }
+    for nombre, arreglo in zip(COLUMNAS_NUMERICAS, reserva):
+        tabla[nombre] = _solo_lectura(arreglo[:total])
+    return tabla
+
+
+def _con_lugar(reserva, total, necesario):
+    # Si no entra, se pasa a arreglos más grandes; las vistas viejas siguen apuntando a los anteriores.
+    if necesario <= len(reserva[0]):
+        return reserva
+    capacidad = max(necesario, len(reserva[0]) * 3 // 2)
+    nueva = tuple(np.empty(capacidad, dtype=a.dtype) for a in reserva)
+    for destino, origen in zip(nueva, reserva):
+        destino[:total] = origen[:total]
+    return nueva
+
+
+def _armar(version, partes, nombres, codigos, comentarios):
+    columnas = [np.concatenate(col) for col in zip(*partes)]
+    total = len(columnas[0])
+    reserva = _con_lugar(columnas, total, total + max(total // 8, RESERVA_MINIMA))
+    return _vista(version, reserva, total, nombres, codigos, comentarios, _por_dia(columnas[1]))
+
+
+def _vacia():
+    return (np.empty(0, np.int32), np.empty(0, np.int32), np.empty(0, np.int32), np.empty(0, np.int8))
+
+
+def _leer(sheet_id, hoja, condicion="", params=(), tamano=20000):
+    con = snapshot.conectar()
+    try:
+        cursor = con.execute(
+            "SELECT fila, fecha, jugadora, asistio, tarde, comentario FROM filas "
+            f"WHERE sheet_id = ? AND hoja = ?{condicion} ORDER BY fila",
+            (sheet_id, hoja, *params),
+        )
+        while True:
+            tanda = cursor.fetchmany(tamano)
+            if not tanda:
+                return
+            yield tanda
+    finally:
+        con.close()
+
+
+def _construir(sheet_id, hoja, version):
+    # De a tandas: las columnas de texto nunca están enteras en memoria.
+    nombres, codigos, comentarios = [], {}, {}
+    partes = [_vacia()]
+    for tanda in _leer(sheet_id, hoja):
+        *columnas, comentarios_tanda = _columnas(tanda, nombres, codigos)
+        partes.append(columnas)
+        comentarios.update(comentarios_tanda)
+    return _armar(version, partes, nombres, codigos, comentarios)
+
+
+def obtener(sheet_id, hoja="Asistencias", version=None):
+    if version is None:
+        version = snapshot.sincronizar(sheet_id, hoja)["version"]
+    clave = (sheet_id, hoja)
+    with _lock:
+        tabla = _tablas.get(clave)
+        if tabla is None or tabla["version"] != version:
+            tabla = _tablas[clave] = _construir(sheet_id, hoja, version)
+        return tabla
+
+
+def _leer_filas(sheet_id, hoja, numeros, tamano=500):
+    numeros = list(numeros)
+    for i in range(0, len(numeros), tamano):
+        trozo = numeros[i : i + tamano]
+        for tanda in _leer(sheet_id, hoja, f" AND fila IN ({', '.join('?' for _ in trozo)})", trozo):
+            yield from tanda
+
+
+def _mover_posiciones(por_dia, salen, entran):
+    # salen/entran: {dia: [posiciones]}. Solo se rehacen las listas de esos días.
+    for dia in salen.keys() | entran.keys():
+        if dia == DIA_INVALIDO:
+            continue
+        posiciones = np.setdiff1d(por_dia.get(dia, np.empty(0, np.int32)), salen.get(dia, []))
+        posiciones = np.union1d(posiciones, entran.get(dia, [])).astype(np.int32)
+        if len(posiciones):
+            por_dia[dia] = _solo_lectura(posiciones)
+        else:
+            por_dia.pop(dia, None)
+
+
+def registrar_escritura(
+    sheet_id, hoja, version_anterior, version_nueva, actualizadas=(), fila_agregadas=None, agregadas=()
+):
+    # Las filas escritas se releen del snapshot (ya normalizadas): las corregidas van a una copia de la columna
+    # y las agregadas, a la reserva después de "total". Devuelve {"quitadas", "sumadas": (dia, jugadora, estado), "jugadoras"} para
+    # quien mantenga algo calculado sobre la tabla, o None si se descartó y se rearma en la próxima lectura.
+    clave = (sheet_id, hoja)
+    with _lock:
+        tabla = _tablas.get(clave)
+        if tabla is None:
+            return None
+        total = len(tabla["fila"])
+        ultima = int(tabla["fila"][-1]) if total else 1
+        desfasada = agregadas and fila_agregadas != ultima + 1
+        if tabla["version"] != version_anterior or version_nueva is None or desfasada:
+            # Sin el número de fila de lo agregado no se puede ubicar: se reconstruye en la próxima lectura.
+            _tablas.pop(clave, None)
+            return None
+
+        numeros = list(actualizadas)
+        if agregadas:
+            numeros.extend(range(fila_agregadas, fila_agregadas + len(agregadas)))
+        filas = sorted(_leer_filas(sheet_id, hoja, numeros))
+        nombres = list(tabla["jugadoras"])
+        if not filas:
+            _tablas[clave] = dict(tabla, version=version_nueva)
+            return {"quitadas": _vacia()[1:], "sumadas": _vacia()[1:], "jugadoras": tabla["jugadoras"]}
+
+        codigos = dict(tabla["codigos"])
+        numero, dia, jugadora, estado, comentarios_escritos = _columnas(filas, nombres, codigos)
+        comentarios = tabla["comentarios"]
+        escritas = set(numero.tolist())
+        if comentarios_escritos or not escritas.isdisjoint(comentarios):
+            comentarios = {n: c for n, c in comentarios.items() if n not in escritas}
+            comentarios.update(comentarios_escritos)
+
+        existentes = np.isin(numero, tabla["fila"])
+        posiciones = np.searchsorted(tabla["fila"], numero[existentes])
+        quitadas = tuple(tabla[c][posiciones].copy() for c in ("dia", "jugadora", "estado"))
+        nuevas = ~existentes
+        agregar = int(nuevas.sum())
+        reserva = list(_con_lugar(tabla["reserva"], total, total + agregar))
+        for i, origen in enumerate((numero, dia, jugadora, estado)):
+            if not np.array_equal(reserva[i][posiciones], origen[existentes]):
+                # La tabla anterior sigue usando esta columna: se corrige sobre una copia.
+                if reserva[i] is tabla["reserva"][i]:
+                    reserva[i] = reserva[i].copy()
+                reserva[i][posiciones] = origen[existentes]
+            reserva[i][total : total + agregar] = origen[nuevas]
+        reserva = tuple(reserva)
+
+        salen, entran = {}, {}
+        for p, antes, ahora in zip(posiciones.tolist(), quitadas[0].tolist(), dia[existentes].tolist()):
+            if antes != ahora:
+                salen.setdefault(antes, []).append(p)
+                entran.setdefault(ahora, []).append(p)
+        for p, ahora in enumerate(dia[nuevas].tolist(), start=total):
+            entran.setdefault(ahora, []).append(p)
+        por_dia = tabla["por_dia"]
+        if entran:
+            por_dia = dict(por_dia)
+            _mover_posiciones(por_dia, salen, entran)
+
+        nueva = _vista(version_nueva, reserva, total + agregar, nombres, codigos, comentarios, por_dia)
+        _tablas[clave] = nueva
+        return {"quitadas": quitadas, "sumadas": (dia, jugadora, estado), "jugadoras": nueva["jugadoras"]}
+
+
+def asistencias_de_fecha(tabla, fecha):
+    # {jugadora: "SÍ"/"NO"}; las posiciones van en orden de hoja, así que la última de cada jugadora pisa.
+    posiciones = tabla["por_dia"].get(dia_ordinal(fecha))
+    if posiciones is None:
+        return {}
+    nombres = tabla["jugadoras"]
+    return {
+        nombres[j]: "SÍ" if e & ASISTIO else "NO"
+        for j, e in zip(tabla["jugadora"][posiciones].tolist(), tabla["estado"][posiciones].tolist())
+    }
+
+
+def _seleccion(tabla, desde, hasta, jugadoras):
+    dia = tabla["dia"]
+    mascara = dia != DIA_INVALIDO
+    if desde is not None:
+        mascara &= dia >= dia_ordinal(desde)
+    if hasta is not None:
+        mascara &= dia <= dia_ordinal(hasta)
+    if jugadoras is not None:
+        codigos = tabla["codigos"]
+        mascara &= np.isin(tabla["jugadora"], [codigos[j] for j in jugadoras if j in codigos])
+    return np.flatnonzero(mascara)
+
+
+def agrupar(tablas, desde=None, hasta=None, jugadoras=None):
+    # Presencias y tardanzas por (Mes, Jugadora) y entrenamientos por mes de las filas del rango, contados
+    # sobre los arreglos numéricos de una o más tablas. None si no queda ninguna fila.
+    jugadoras = None if jugadoras is None else set(jugadoras)
+    seleccion = [(t, _seleccion(t, desde, hasta, jugadoras)) for t in tablas]
+    seleccion = [(t, p) for t, p in seleccion if len(p)]
+    if not seleccion:
+        return None
+
+    # Los códigos son propios de cada tabla: se pasan a uno común, en orden alfabético como el groupby.
+    nombres = sorted({t["jugadoras"][c] for t, p in seleccion for c in np.unique(t["jugadora"][p]).tolist()})
+    comun = {n: i for i, n in enumerate(nombres)}
+    dias, jugadora, estado = [], [], []
+    for t, p in seleccion:
+        traduccion = np.array([comun.get(n, -1) for n in t["jugadoras"]], dtype=np.int64)
+        dias.append(t["dia"][p])
+        jugadora.append(traduccion[t["jugadora"][p]])
+        estado.append(t["estado"][p])
+    dias = np.concatenate(dias)
+    jugadora = np.concatenate(jugadora)
+    estado = np.concatenate(estado)
+
+    claves, grupo = np.unique(meses_de(dias).astype(np.int64) * len(nombres) + jugadora, return_inverse=True)
+    presente = (estado & ASISTIO) != 0
+    por_mes_jugadora = pd.DataFrame(
+        {
+            "Mes": pd.PeriodIndex.from_ordinals(claves // len(nombres), freq="M"),
+            "Jugadora": np.array(nombres, dtype=object)[claves % len(nombres)],
+            "Presencias": np.bincount(grupo, weights=presente, minlength=len(claves)).astype(np.int64),
+            "Tardanzas": np.bincount(grupo, weights=(estado & TARDE) != 0, minlength=len(claves)).astype(np.int64),
+        }
+    )
+
+    meses, entrenamientos = np.unique(meses_de(np.unique(dias)), return_counts=True)
+    entrenamientos_por_mes = pd.DataFrame(
+        {
+            "Mes": pd.PeriodIndex.from_ordinals(meses.astype(np.int64), freq="M"),
+            "Entrenamientos del mes": entrenamientos.astype(np.int64),
+        }
+    )
+    return por_mes_jugadora, entrenamientos_por_mes
+
@@ -0,0 +1,94 @@
+import itertools
+import os
+import tempfile
+
+# Antes de importar los servicios: el snapshot y la cola leen sus rutas al importarse.
+_CARPETA = tempfile.mkdtemp(prefix="asistencia-tests-")
+os.environ["ASISTENCIA_BACKEND"] = "memoria"
+os.environ["ASISTENCIA_SNAPSHOT"] = os.path.join(_CARPETA, "snapshot.sqlite3")
+os.environ["ASISTENCIA_COLA"] = os.path.join(_CARPETA, "cola.sqlite3")
+
+import pandas as pd  # noqa: E402
+import pytest  # noqa: E402
+
+from services import conexion, cuota, particiones  # noqa: E402
+from services.almacenamiento import AlmacenamientoSheets, usar_almacenamiento  # noqa: E402
+from services.almacenamiento.memoria import ClienteMemoria  # noqa: E402
+from services.asistencia import armar_resumen  # noqa: E402
+from utils.helpers import parsear_fechas  # noqa: E402
+
+_ids = itertools.count(1)
+
+
+@pytest.fixture(autouse=True)
+def _sin_cuota():
+    cuota.configurar(0, 0)
+
+
+@pytest.fixture
+def planilla():
+    # Crea una planilla en memoria con un sheet_id nuevo: los cachés por sheet_id de los servicios no se
+    # mezclan entre tests. Devuelve (sheet_id, almacenamiento).
+    def crear(hojas):
+        sheet_id = f"test-{next(_ids)}"
+        cliente = ClienteMemoria({sheet_id: hojas}, latencia_seg=0, lecturas_por_minuto=0, escrituras_por_minuto=0)
+        conexion.usar_cliente(cliente)
+        almacenamiento = AlmacenamientoSheets(sheet_id)
+        usar_almacenamiento(sheet_id, almacenamiento)
+        return sheet_id, almacenamiento
+
+    return crear
+
+
+def filas_crudas(almacenamiento):
+    # Todas las filas de "Asistencias" y sus particiones, leídas directo de la planilla.
+    filas = []
+    for hoja in almacenamiento.listar_hojas():
+        if hoja == particiones.HOJA_BASE or particiones.PATRON_PARTICION.match(hoja):
+            filas.extend(almacenamiento.leer_filas(hoja)[1:])
+    return filas
+
+
+def resumen_de_referencia(filas, desde=None, hasta=None, jugadoras=None):
+    # generar_resumen hecho a mano sobre las filas crudas, con pandas y sin índices.
+    df = pd.DataFrame(
+        [(list(f) + [""] * 4)[:4] for f in filas], columns=["Fecha", "Jugadora", "Asistió", "Llegó tarde"]
+    )
+    df["Fecha"] = parsear_fechas(df["Fecha"]).to_numpy()
+    df["Jugadora"] = df["Jugadora"].str.strip()
+    df = df.dropna(subset=["Fecha"])
+    if desde is not None:
+        df = df[df["Fecha"] >= pd.Timestamp(desde)]
+    if hasta is not None:
+        df = df[df["Fecha"] <= pd.Timestamp(hasta)]
+    if jugadoras is not None:
+        df = df[df["Jugadora"].isin(jugadoras)]
+    if df.empty:
+        return None
+    presente = (df["Asistió"].str.strip().str.upper() == "SÍ").astype("int64")
+    tarde = presente * (df["Llegó tarde"].str.strip().str.upper() == "SÍ")
+    base = pd.DataFrame(
+        {
+            "Mes": df["Fecha"].dt.to_period("M").array,
+            "Jugadora": df["Jugadora"].to_numpy(),
+            "Fecha": df["Fecha"].to_numpy(),
+            "Presencias": presente.to_numpy(),
+            "Tardanzas": tarde.to_numpy(),
+        }
+    )
+    por_mes_jugadora = base.groupby(["Mes", "Jugadora"], sort=True)[["Presencias", "Tardanzas"]].sum().reset_index()
+    entrenamientos = (
+        base[["Mes", "Fecha"]].drop_duplicates().groupby("Mes").size().reset_index(name="Entrenamientos del mes")
+    )
+    return armar_resumen(por_mes_jugadora, entrenamientos)
+
+
+def comparar_resumen(obtenido, esperado):
+    assert (obtenido is None) == (esperado is None)
+    if esperado is None:
+        return
+    assert obtenido.keys() == esperado.keys()
+    for bloque in esperado:
+        pd.testing.assert_frame_equal(
+            obtenido[bloque].reset_index(drop=True), esperado[bloque].reset_index(drop=True), obj=bloque
+        )
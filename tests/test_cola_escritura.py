@@ -0,0 +1,147 @@
+import itertools
+
+import gspread
+import pytest
+import requests
+
+from services import cola_escritura
+from services.almacenamiento.memoria import RespuestaSimulada
+
+_ids = itertools.count(1)
+
+
+@pytest.fixture
+def cola(monkeypatch):
+    # Sin el hilo de fondo: cada test vacía la cola a mano con _vaciar.
+    monkeypatch.setattr(cola_escritura, "_asegurar_worker", lambda: None)
+    return f"cola-{next(_ids)}", "Asistencias"
+
+
+class Envio:
+    # upsert falso: falla con los errores que se le indiquen y guarda lo que se envió bien.
+    def __init__(self, *errores, rechazar=()):
+        self.errores = list(errores)
+        self.rechazar = set(rechazar)
+        self.enviadas = []
+        self.llamadas = 0
+
+    def __call__(self, sheet_id, hoja, filas):
+        self.llamadas += 1
+        if self.errores:
+            raise self.errores.pop(0)
+        if any(f[1] in self.rechazar for f in filas):
+            raise gspread.exceptions.APIError(RespuestaSimulada(400, "Invalid value"))
+        self.enviadas.extend(filas)
+
+
+def _filas(*jugadoras, fecha="2025-06-20"):
+    return [[fecha, j, "SÍ", "NO", ""] for j in jugadoras]
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        gspread.exceptions.APIError(RespuestaSimulada(429, "Quota exceeded")),
+        gspread.exceptions.APIError(RespuestaSimulada(503, "Backend error")),
+        requests.exceptions.ConnectionError("sin red"),
+    ],
+)
+def test_error_pasajero_se_reintenta_con_espera(cola, error):
+    sheet_id, hoja = cola
+    cola_escritura.encolar(sheet_id, hoja, _filas("A", "B"))
+    envio = Envio(error, error)
+
+    cola_escritura._vaciar(sheet_id, hoja, envio)
+    primero = cola_escritura.estado(sheet_id, hoja)
+    cola_escritura._vaciar(sheet_id, hoja, envio)
+    segundo = cola_escritura.estado(sheet_id, hoja)
+    assert (primero["pendientes"], primero["intentos"], primero["fallidas"]) == (2, 1, 0)
+    assert segundo["intentos"] == 2 and segundo["proximo_intento"] > primero["proximo_intento"]
+
+    cola_escritura._vaciar(sheet_id, hoja, envio)
+    estado = cola_escritura.estado(sheet_id, hoja)
+    assert (estado["pendientes"], estado["intentos"], estado["ultimo_error"]) == (0, 0, "")
+    assert envio.enviadas == _filas("A", "B")
+
+
+def test_filas_que_siguen_fallando_van_a_fallidas(cola):
+    sheet_id, hoja = cola
+    cola_escritura.encolar(sheet_id, hoja, _filas("A", "Mala", "B"))
+    envio = Envio(rechazar={"Mala"})
+
+    cola_escritura._vaciar(sheet_id, hoja, envio)
+
+    estado = cola_escritura.estado(sheet_id, hoja)
+    assert (estado["pendientes"], estado["fallidas"], estado["intentos"]) == (0, 1, 0)
+    assert envio.enviadas == _filas("A", "B")
+    [fallida] = cola_escritura.fallidas(sheet_id, hoja)
+    assert fallida["fila"] == _filas("Mala")[0]
+    assert "400" in fallida["error"]
+    # Ya no traba a las que vienen después.
+    cola_escritura.encolar(sheet_id, hoja, _filas("C"))
+    cola_escritura._vaciar(sheet_id, hoja, envio)
+    assert envio.enviadas[-1] == _filas("C")[0]
+
+
+def test_error_pasajero_al_separar_deja_el_resto_pendiente(cola):
+    sheet_id, hoja = cola
+    cola_escritura.encolar(sheet_id, hoja, _filas("A", "B", "C"))
+    error = gspread.exceptions.APIError(RespuestaSimulada(400, "Invalid value"))
+    # El lote falla, la primera fila sola sale bien y la segunda choca con la cuota.
+    envio = Envio(error)
+    original = envio.__call__
+
+    def enviar(sheet_id, hoja, filas):
+        if envio.llamadas == 2:
+            envio.llamadas += 1
+            raise gspread.exceptions.APIError(RespuestaSimulada(429, "Quota exceeded"))
+        return original(sheet_id, hoja, filas)
+
+    cola_escritura._vaciar(sheet_id, hoja, enviar)
+
+    estado = cola_escritura.estado(sheet_id, hoja)
+    assert (estado["pendientes"], estado["fallidas"], estado["intentos"]) == (2, 0, 1)
+    assert envio.enviadas == _filas("A")
+
+
+def test_reintentar_fallidas_no_pisa_una_version_mas_nueva(cola):
+    sheet_id, hoja = cola
+    cola_escritura.encolar(sheet_id, hoja, _filas("A", "B"))
+    cola_escritura._vaciar(sheet_id, hoja, Envio(rechazar={"A", "B"}))
+    assert cola_escritura.estado(sheet_id, hoja)["fallidas"] == 2
+
+    # "A" se volvió a cargar mientras tanto: vale la carga nueva, no la que había fallado.
+    cola_escritura.encolar(sheet_id, hoja, [["2025-06-20", "A", "NO", "NO", "corregida"]])
+    assert cola_escritura.reintentar_fallidas(sheet_id, hoja) == 2
+
+    envio = Envio()
+    cola_escritura._vaciar(sheet_id, hoja, envio)
+    assert sorted(envio.enviadas) == [["2025-06-20", "A", "NO", "NO", "corregida"], _filas("B")[0]]
+    estado = cola_escritura.estado(sheet_id, hoja)
+    assert (estado["pendientes"], estado["fallidas"]) == (0, 0)
+
+
+def test_un_error_inesperado_no_detiene_el_worker(cola, monkeypatch):
+    sheet_id, hoja = cola
+    cola_escritura.encolar(sheet_id, hoja, _filas("A"))
+    listas = cola_escritura._listas_para_enviar
+    errores = [RuntimeError("database is locked"), RuntimeError("database is locked")]
+
+    def listas_que_fallan():
+        if errores:
+            raise errores.pop(0)
+        # Solo la hoja de este test: otras pueden haber dejado pendientes en el mismo journal.
+        return [fila for fila in listas() if fila[0] == sheet_id]
+
+    monkeypatch.setattr(cola_escritura, "_listas_para_enviar", listas_que_fallan)
+    envio = Envio()
+
+    primera, segunda = cola_escritura._vuelta(envio), cola_escritura._vuelta(envio)
+    assert not primera[0] and not segunda[0] and segunda[1] > primera[1]
+    estado = cola_escritura.estado(sheet_id, hoja)
+    assert "database is locked" in estado["error_worker"] and estado["pendientes"] == 1
+
+    assert cola_escritura._vuelta(envio)[0]
+    estado = cola_escritura.estado(sheet_id, hoja)
+    assert (estado["pendientes"], estado["error_worker"]) == (0, "")
+    assert envio.enviadas == _filas("A")
@@ -0,0 +1,61 @@
+from services import compactacion, particiones
+from services.almacenamiento import ENCABEZADOS_ASISTENCIAS
+from services.almacenamiento.sqlite import AlmacenamientoSQLite
+from services.google_sheets import upsert_asistencias
+
+
+def _hojas():
+    filas = [
+        ["2024-03-01", "Ana", "SÍ", "NO", ""],
+        ["2024-03-01", "Bea", "SÍ", "SÍ", ""],
+        ["2024-03-08", "Ana", "NO", "NO", ""],
+        ["2025-04-01", "Ana", "SÍ", "NO", ""],
+    ]
+    return {
+        "Jugadoras": [["Jugadora", "Categoría"], ["Ana", "Primera"], ["Bea", "Primera"]],
+        "Asistencias": [list(ENCABEZADOS_ASISTENCIAS)] + filas,
+    }
+
+
+def test_correccion_despues_de_archivar_reemplaza_a_la_archivada(planilla):
+    sheet_id, almacenamiento = planilla(_hojas())
+    compactacion.compactar(sheet_id, archivar_hasta=2024)
+    archivo = compactacion.nombre_archivo(2024)
+    assert len(almacenamiento.leer_filas(archivo)) == 4
+
+    # Se corrige una fila ya archivada y se agrega otra de la temporada cerrada.
+    upsert_asistencias(
+        sheet_id,
+        particiones.HOJA_BASE,
+        [["2024-03-01", "Bea", "SÍ", "NO", "corregida"], ["2024-03-15", "Bea", "SÍ", "NO", ""]],
+    )
+    informe = compactacion.compactar(sheet_id, archivar_hasta=2024)
+
+    assert informe["archivadas"] == {2024: 2}
+    filas = [compactacion._recortar(f) for f in almacenamiento.leer_filas(archivo)[1:]]
+    assert filas == [
+        ["2024-03-01", "Ana", "SÍ", "NO"],
+        ["2024-03-01", "Bea", "SÍ", "NO", "corregida"],
+        ["2024-03-08", "Ana", "NO", "NO"],
+        ["2024-03-15", "Bea", "SÍ", "NO"],
+    ]
+    base = [compactacion._recortar(f) for f in almacenamiento.leer_filas(particiones.HOJA_BASE)[1:]]
+    assert base == [["2025-04-01", "Ana", "SÍ", "NO"]]
+
+
+def test_reemplazar_filas_respeta_filas_agregadas(planilla, tmp_path):
+    encabezado = list(ENCABEZADOS_ASISTENCIAS)
+    filas = [encabezado] + [[f"2025-01-0{i}", f"J{i}", "SÍ", "NO", "", "vieja"] for i in range(1, 6)]
+    _, sheets = planilla({"Asistencias": filas})
+    sqlite = AlmacenamientoSQLite("local", str(tmp_path / "hojas.sqlite3"))
+    sqlite.agregar_filas("Asistencias", filas)
+
+    for almacenamiento in (sheets, sqlite):
+        leidas = len(almacenamiento.leer_filas("Asistencias"))
+        almacenamiento.agregar_filas("Asistencias", [["2025-01-09", "Tarde", "SÍ", "NO", ""]])
+        assert not almacenamiento.reemplazar_filas("Asistencias", [encabezado], leidas)
+        leidas += 1
+        assert almacenamiento.reemplazar_filas("Asistencias", [encabezado, filas[2][:5]], leidas)
+        resultado = [[v for v in f if v] for f in almacenamiento.leer_filas("Asistencias")]
+        # La columna de más ("vieja") también se limpia.
+        assert resultado == [encabezado, filas[2][:4]]
@@ -0,0 +1,85 @@
+import threading
+import time
+
+import gspread
+import pytest
+
+from services import cuota
+from services.almacenamiento.memoria import RespuestaSimulada
+
+
+def _error(codigo):
+    return gspread.exceptions.APIError(RespuestaSimulada(codigo, "error simulado"))
+
+
+class Llamada:
+    # Falla con los errores indicados y después devuelve "ok".
+    def __init__(self, *errores):
+        self.errores = list(errores)
+        self.veces = 0
+
+    def __call__(self):
+        self.veces += 1
+        if self.errores:
+            raise self.errores.pop(0)
+        return "ok"
+
+
+def test_un_429_se_reintenta_con_backoff(monkeypatch):
+    monkeypatch.setattr(cuota, "ESPERA_429_BASE_SEG", 0.05)
+    cuota.configurar(600, 600)
+    llamada = Llamada(_error(429), _error(429))
+
+    inicio = time.monotonic()
+    assert cuota.llamar("append_rows", "Asistencias", llamada) == "ok"
+
+    assert llamada.veces == 3
+    # Dos pausas: ~0.05 s y ~0.1 s, con ±20 % de jitter.
+    assert time.monotonic() - inicio >= 0.8 * (0.05 + 0.1)
+
+
+def test_otros_errores_y_429_persistente_no_se_reintentan_para_siempre(monkeypatch):
+    monkeypatch.setattr(cuota, "ESPERA_429_BASE_SEG", 0.001)
+    llamada = Llamada(_error(400))
+    with pytest.raises(gspread.exceptions.APIError):
+        cuota.llamar("get", "Asistencias", llamada)
+    assert llamada.veces == 1
+
+    cuota.configurar(6000, 6000)
+    llamada = Llamada(*[_error(429)] * (cuota.REINTENTOS_429 + 1))
+    with pytest.raises(gspread.exceptions.APIError):
+        cuota.llamar("get", "Asistencias", llamada)
+    assert llamada.veces == cuota.REINTENTOS_429 + 1
+
+
+def test_los_guardados_pasan_antes_que_el_resumen():
+    # 600 por minuto: ráfaga de 10 y después una ficha cada ~0.1 s.
+    cuota.configurar(600, 600)
+    for _ in range(cuota.RAFAGA):
+        cuota.llamar("append_rows", None, lambda: None)
+
+    orden = []
+
+    def llamar(prioridad, nombre):
+        with cuota.prioridad(prioridad):
+            cuota.llamar("append_rows", None, orden.append, nombre)
+
+    hilos = []
+    for i in range(3):
+        for prioridad, nombre in ((cuota.RESUMEN, "resumen"), (cuota.GUARDADO, "guardado")):
+            hilos.append(threading.Thread(target=llamar, args=(prioridad, nombre)))
+            hilos[-1].start()
+    for hilo in hilos:
+        hilo.join(timeout=10)
+
+    assert orden == ["guardado"] * 3 + ["resumen"] * 3
+
+
+def test_las_lecturas_no_gastan_fichas_de_escritura():
+    cuota.configurar(600, 600)
+    for _ in range(cuota.RAFAGA):
+        cuota.llamar("append_rows", None, lambda: None)
+    inicio = time.monotonic()
+    for _ in range(cuota.RAFAGA):
+        cuota.llamar("get", None, lambda: None)
+    assert time.monotonic() - inicio < 0.05
@@ -0,0 +1,91 @@
+import csv
+import io
+import os
+import re
+import time
+import zipfile
+from datetime import date
+
+from benchmarks.datos import generar_hojas
+from conftest import filas_crudas, resumen_de_referencia
+from services import exportacion, particiones
+from services.hoja_resumen import BLOQUES_RESUMEN
+from utils.helpers import parsear_fechas
+
+HOY = date(2025, 6, 20)
+
+
+def _csv(datos):
+    return list(csv.reader(io.StringIO(datos.decode("utf-8"), newline="")))
+
+
+def test_csv_en_zip_igual_a_las_filas_crudas(planilla, tmp_path):
+    sheet_id, almacenamiento = planilla(generar_hojas(3000, hasta=HOY))
+    particiones.migrar(sheet_id)
+    desde, hasta = date(2024, 11, 15), date(2025, 3, 10)
+    salida = tmp_path / "exportado.zip"
+    argv = ["--sheet-id", sheet_id, "--desde", desde.isoformat(), "--hasta", hasta.isoformat(), "--salida", str(salida)]
+    assert exportacion.main(argv) == 0
+
+    with zipfile.ZipFile(salida) as zf:
+        assert sorted(zf.namelist()) == sorted(f"{t}.csv" for t in ["asistencias"] + BLOQUES_RESUMEN)
+        asistencias = _csv(zf.read("asistencias.csv"))
+        bloques = {b: _csv(zf.read(f"{b}.csv")) for b in BLOQUES_RESUMEN}
+
+    # Las mismas filas que quedan dentro del rango leyendo la planilla entera, sin importar la partición.
+    filas = filas_crudas(almacenamiento)
+    fechas = parsear_fechas([f[0] for f in filas])
+    dentro = (fechas >= str(desde)) & (fechas <= str(hasta))
+    esperadas = [(list(f) + [""] * 5)[:5] for f, ok in zip(filas, dentro.to_numpy()) if ok]
+    assert asistencias[0] == list(exportacion.ENCABEZADOS_ASISTENCIAS)
+    assert sorted(asistencias[1:]) == sorted(esperadas)
+
+    resumen = resumen_de_referencia(filas, desde, hasta)
+    for bloque, df in resumen.items():
+        tandas = list(exportacion.tandas_dataframe(df))
+        assert bloques[bloque] == [[str(c) for c in df.columns]] + [[str(v) for v in f] for t in tandas for f in t]
+
+
+def test_xlsx_parte_las_hojas_largas(monkeypatch):
+    monkeypatch.setattr(exportacion, "MAX_FILAS_XLSX", 4)
+    tandas = [[(f"2025-06-{d:02d}", "Ana", "SÍ", "NO", "") for d in range(1, 8)]]
+    salida = io.BytesIO()
+    assert exportacion.exportar(salida, "xlsx", [("asistencias: junio", ["Fecha"] * 5, iter(tandas))]) == 7
+
+    with zipfile.ZipFile(salida) as zf:
+        libro = zf.read("xl/workbook.xml").decode("utf-8")
+    assert re.findall(r'<sheet name="([^"]+)"', libro) == [
+        "asistencias junio",
+        "asistencias junio (2)",
+        "asistencias junio (3)",
+    ]
+
+
+def test_sin_la_dependencia_no_queda_el_archivo(planilla, tmp_path, monkeypatch, capsys):
+    sheet_id, _ = planilla(generar_hojas(200, hasta=HOY))
+
+    def sin_pyarrow(*args):
+        raise ImportError("No module named 'pyarrow'")
+
+    monkeypatch.setattr(exportacion, "_escribir_parquet", sin_pyarrow)
+    salida = tmp_path / "exportado.parquet"
+    argv = ["--sheet-id", sheet_id, "--formato", "parquet", "--solo-asistencias", "--salida", str(salida)]
+    assert exportacion.main(argv) == 1
+    assert not salida.exists()
+    assert "pip install pyarrow" in capsys.readouterr().out
+
+
+def test_las_descargas_viejas_se_borran():
+    from ui import resumen
+
+    vieja = os.path.join(resumen._CARPETA_DESCARGAS, "vieja.csv")
+    nueva = os.path.join(resumen._CARPETA_DESCARGAS, "nueva.csv")
+    for ruta in (vieja, nueva):
+        with open(ruta, "w") as f:
+            f.write("x")
+    hace_rato = time.time() - resumen.VIDA_DESCARGA_SEG - 1
+    os.utime(vieja, (hace_rato, hace_rato))
+
+    resumen._borrar_descargas_viejas()
+    assert not os.path.exists(vieja) and os.path.exists(nueva)
+    os.remove(nueva)
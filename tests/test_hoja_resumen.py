@@ -0,0 +1,81 @@
+import pandas as pd
+import pytest
+
+from services import conexion, hoja_resumen
+from services.almacenamiento import ENCABEZADOS_ASISTENCIAS, filas_resumen, usar_almacenamiento
+from services.almacenamiento.sqlite import AlmacenamientoSQLite
+from services.google_sheets import upsert_asistencias
+
+
+def _bloques(presencias=3):
+    return [
+        pd.DataFrame({"Mes": ["2025-05", "2025-06"], "Entrenamientos del mes": [8, 9]}),
+        pd.DataFrame({"Mes": ["2025-06"] * 3, "Jugadora": ["Ana", "Bea", "Caro"], "Presencias": [presencias, 5, 7]}),
+        pd.DataFrame({"Mes": ["2025-06"], "Jugadora": ["Bea"], "Tardanzas": [2]}),
+        pd.DataFrame({"Jugadora": ["Caro", "Bea", "Ana"], "Porcentaje": [0.77, 0.5, presencias / 9]}),
+    ]
+
+
+@pytest.fixture(params=["sheets", "sqlite"])
+def almacenamiento(request, planilla, tmp_path):
+    hojas = {"Asistencias": [list(ENCABEZADOS_ASISTENCIAS)], "Jugadoras": [["Jugadora", "Categoría"]]}
+    sheet_id, sheets = planilla(hojas)
+    if request.param == "sheets":
+        return sheet_id, sheets
+    sqlite = AlmacenamientoSQLite(sheet_id, str(tmp_path / "hojas.sqlite3"))
+    usar_almacenamiento(sheet_id, sqlite)
+    return sheet_id, sqlite
+
+
+def _en_la_hoja(almacenamiento, bloques):
+    assert almacenamiento.leer_resumen(hoja_resumen.HOJA_RESUMEN) == filas_resumen(hoja_resumen.armar_grilla(bloques))
+
+
+def test_solo_se_reescriben_las_filas_que_cambiaron(almacenamiento):
+    sheet_id, almacenamiento = almacenamiento
+    completa = len(hoja_resumen.armar_grilla(_bloques()))
+    assert hoja_resumen.escribir_resumen(sheet_id, _bloques()) == completa
+
+    # Guardar asistencias cambia el archivo, pero no la hoja Resumen: no hace falta reescribirla.
+    upsert_asistencias(sheet_id, "Asistencias", [["2025-06-20", "Ana", "SÍ", "NO", ""]])
+    assert hoja_resumen.escribir_resumen(sheet_id, _bloques()) == 0
+    # Cambia la fila de Ana en dos bloques.
+    assert hoja_resumen.escribir_resumen(sheet_id, _bloques(presencias=4)) == 2
+    _en_la_hoja(almacenamiento, _bloques(presencias=4))
+
+
+@pytest.mark.parametrize("cambiar", [True, False])
+def test_una_edicion_a_mano_se_repara(almacenamiento, cambiar):
+    sheet_id, almacenamiento = almacenamiento
+    hoja_resumen.escribir_resumen(sheet_id, _bloques())
+    # Alguien pisa una celda que la próxima exportación no tendría por qué tocar.
+    almacenamiento.actualizar_filas(hoja_resumen.HOJA_RESUMEN, [{"inicio": 2, "values": [["a mano"]]}])
+
+    bloques = _bloques(presencias=4 if cambiar else 3)
+    assert hoja_resumen.escribir_resumen(sheet_id, bloques) == len(hoja_resumen.armar_grilla(bloques))
+    _en_la_hoja(almacenamiento, bloques)
+
+
+def test_sin_cambios_cuesta_una_lectura_y_ningun_sondeo(planilla):
+    sheet_id, _ = planilla({"Asistencias": [list(ENCABEZADOS_ASISTENCIAS)], "Resumen": []})
+    hoja_resumen.escribir_resumen(sheet_id, _bloques())
+    cliente = conexion.get_client()
+    cliente.llamadas.clear()
+
+    assert hoja_resumen.escribir_resumen(sheet_id, _bloques()) == 0
+    assert hoja_resumen.escribir_resumen(sheet_id, _bloques(presencias=4)) == 2
+    assert (cliente.llamadas["lectura"], cliente.llamadas["escritura"], cliente.llamadas["sondeo"]) == (1, 1, 0)
+
+
+def test_crear_y_escribir_la_hoja_es_un_solo_request(planilla):
+    sheet_id, almacenamiento = planilla({"Asistencias": [list(ENCABEZADOS_ASISTENCIAS)]})
+    # La app ya tiene abierto el archivo.
+    conexion.abrir_spreadsheet(sheet_id)
+    cliente = conexion.get_client()
+    cliente.llamadas.clear()
+
+    hoja_resumen.escribir_resumen(sheet_id, _bloques())
+
+    # Una lectura para buscar la hoja (no existe) y un único batchUpdate que la crea y la escribe.
+    assert (cliente.llamadas["lectura"], cliente.llamadas["escritura"], cliente.llamadas["sondeo"]) == (1, 1, 0)
+    _en_la_hoja(almacenamiento, _bloques())
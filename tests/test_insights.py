@@ -0,0 +1,80 @@
+import pytest
+
+from services import cambios, insights
+from services.almacenamiento import ENCABEZADOS_ASISTENCIAS
+from services.google_sheets import upsert_asistencias
+
+JUGADORAS = ("Ana", "Bea", "Caro", "Dana")
+
+
+def _hojas():
+    filas = []
+    for fecha, marcas in [("2025-05-02", "SSN"), ("2025-05-09", "SNN"), ("2025-06-06", "SSN")]:
+        for jugadora, marca in zip(JUGADORAS, marcas):
+            tarde = "SÍ" if (fecha, jugadora) == ("2025-05-02", "Bea") else "NO"
+            filas.append([fecha, jugadora, "SÍ" if marca == "S" else "NO", tarde, ""])
+    return {
+        "Jugadoras": [["Jugadora", "Categoría"]] + [[j, "1"] for j in JUGADORAS],
+        "Asistencias": [list(ENCABEZADOS_ASISTENCIAS)] + filas,
+    }
+
+
+@pytest.fixture
+def contar_resumenes(monkeypatch):
+    # El sondeo sin caché: una escritura se nota en la llamada siguiente.
+    monkeypatch.setattr(cambios, "INTERVALO_SONDEO_SEG", 0)
+    llamadas = []
+    original = insights.generar_resumen
+
+    def generar_resumen(*args):
+        llamadas.append(args)
+        return original(*args)
+
+    monkeypatch.setattr(insights, "generar_resumen", generar_resumen)
+    return llamadas
+
+
+def test_valores_de_los_insights(planilla, contar_resumenes):
+    sheet_id, _ = planilla(_hojas())
+    datos = insights.obtener_insights(sheet_id, "Primera", None, None, JUGADORAS, 1)
+
+    assert (datos["total_entrenamientos"], datos["total_presencias"], datos["total_tardanzas"]) == (3, 5, 1)
+    assert datos["porcentaje_asistencia"] == round(5 / (3 * 4) * 100, 1)
+    assert datos["porcentaje_tardanzas"] == 20.0
+    assert datos["top_jugadora"] == "Ana"
+    assert datos["df_asistencia"].to_dict("list") == {
+        "Jugadora": ["Ana", "Bea", "Caro", "Dana"],
+        "Presencias": [3, 2, 0, 0],
+        "% Asistencia": [100.0, 66.7, 0.0, 0.0],
+    }
+    assert (datos["perfectas"], datos["en_riesgo"], datos["sin_asistencia"]) == (
+        ["Ana"],
+        ["Caro", "Dana"],
+        ["Caro", "Dana"],
+    )
+    assert datos["ranking_faltas"]["Jugadora"].tolist() == ["Bea", "Ana"]
+    assert datos["ultimo_mes"] == {"entrenamientos": 1, "presencias": 2, "tardanzas": 0, "porcentaje": 50.0}
+    assert (str(datos["mejor_mes"]), str(datos["peor_mes"])) == ("2025-06", "2025-05")
+
+
+def test_se_memoizan_hasta_que_cambian_los_datos(planilla, contar_resumenes):
+    sheet_id, _ = planilla(_hojas())
+    primero = insights.obtener_insights(sheet_id, "Primera", None, None, JUGADORAS, 1)
+    assert insights.obtener_insights(sheet_id, "Primera", None, None, JUGADORAS, 1) is primero
+    assert len(contar_resumenes) == 1
+
+    # Otra versión del plantel es otra entrada.
+    insights.obtener_insights(sheet_id, "Primera", None, None, JUGADORAS, 2)
+    assert len(contar_resumenes) == 2
+
+    upsert_asistencias(sheet_id, "Asistencias", [["2025-06-13", "Caro", "SÍ", "NO", ""]])
+    nuevo = insights.obtener_insights(sheet_id, "Primera", None, None, JUGADORAS, 1)
+    assert nuevo is not primero and nuevo["total_entrenamientos"] == 4
+    assert len(contar_resumenes) == 3
+
+
+def test_sin_datos_en_el_rango_tambien_se_memoiza(planilla, contar_resumenes):
+    sheet_id, _ = planilla(_hojas())
+    for _ in range(2):
+        assert insights.obtener_insights(sheet_id, "Primera", "2030-01-01", "2030-12-31", JUGADORAS, 1) is None
+    assert len(contar_resumenes) == 1
@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from services import metricas
+
+
+class FilasSinRecorrer(list):
+    # Si la estimación recorriera todas las filas, fallaría.
+    def __iter__(self):
+        raise AssertionError("se recorrieron todas las filas")
+
+
+def _fila(i):
+    return ["2025-06-20", f"Jugadora {i:04d}", "SÍ", "NO", "comentario"]
+
+
+@pytest.mark.parametrize("cantidad", [3, 5000])
+def test_el_tamano_estimado_se_parece_al_real(cantidad):
+    filas = [_fila(i) for i in range(cantidad)]
+    celdas = [{"values": [{"userEnteredValue": {"stringValue": v}} for v in f]} for f in filas]
+    cuerpo = {"requests": [{"updateCells": {"rows": celdas}}]}
+    for args, kwargs in [((filas,), {"value_input_option": "USER_ENTERED"}), ((cuerpo,), {})]:
+        real = len(json.dumps([args, kwargs], ensure_ascii=False).encode("utf-8"))
+        assert 0.75 * real <= metricas._tamano(args) + metricas._tamano(kwargs) <= 1.25 * real
+
+
+def test_llamar_registra_sin_recorrer_lo_enviado():
+    metricas.reiniciar()
+    filas = FilasSinRecorrer(_fila(i) for i in range(1000))
+
+    resultado = metricas.llamar("append_rows", "Asistencias", lambda f: [[1], [2]], filas)
+
+    assert resultado == [[1], [2]]
+    stats = metricas.estadisticas()[("append_rows", "Asistencias")]
+    assert (stats["llamadas"], stats["errores"], stats["filas_recibidas"]) == (1, 0, 2)
+    assert stats["bytes_enviados"] > 1000 * 40
+
+
+def test_los_errores_se_cuentan():
+    metricas.reiniciar()
+
+    def fallar():
+        raise RuntimeError("falló")
+
+    with pytest.raises(RuntimeError):
+        metricas.llamar("get", "Jugadoras", fallar)
+    stats = metricas.estadisticas()[("get", "Jugadoras")]
+    assert (stats["llamadas"], stats["errores"], stats["bytes_enviados"]) == (1, 1, 0)
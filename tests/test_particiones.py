@@ -0,0 +1,97 @@
+from datetime import date
+
+import pytest
+
+from benchmarks.datos import generar_hojas
+from conftest import comparar_resumen, filas_crudas, resumen_de_referencia
+from services import particiones
+from services.almacenamiento import ENCABEZADOS_ASISTENCIAS
+from services.asistencia import generar_resumen
+
+HOY = date(2025, 6, 20)
+
+
+def _sin_vacias(filas):
+    return sorted(tuple(v.strip() for v in f[:5]) for f in filas if any(v.strip() for v in f))
+
+
+def test_migrar_reparte_por_mes(planilla):
+    hojas = generar_hojas(3000, hasta=HOY)
+    hojas["Asistencias"].append(["sin fecha", "Jugadora 0001", "SÍ", "NO", ""])
+    sheet_id, almacenamiento = planilla(hojas)
+    originales = filas_crudas(almacenamiento)
+    antes = generar_resumen(sheet_id)
+
+    informe = particiones.migrar(sheet_id)
+
+    assert informe["completa"]
+    base = almacenamiento.leer_filas(particiones.HOJA_BASE)
+    assert base[0] == list(ENCABEZADOS_ASISTENCIAS)
+    assert informe["sin_fecha"] == len(base) - 1
+    assert all(particiones._meses_de([f[0]]) == [""] for f in base[1:])
+    for mes, cantidad in informe["movidas"].items():
+        filas = almacenamiento.leer_filas(particiones.nombre_particion(mes))[1:]
+        assert len(filas) == cantidad
+        assert set(particiones._meses_de([f[0] for f in filas])) == {mes}
+    assert _sin_vacias(filas_crudas(almacenamiento)) == _sin_vacias(originales)
+    comparar_resumen(generar_resumen(sheet_id), antes)
+
+    # Correrla de nuevo no copia nada dos veces.
+    particiones.migrar(sheet_id)
+    assert _sin_vacias(filas_crudas(almacenamiento)) == _sin_vacias(originales)
+
+
+@pytest.mark.parametrize("agregadas", [1, particiones.INTENTOS_MIGRACION])
+def test_migrar_no_pierde_filas_agregadas_durante_la_migracion(planilla, agregadas):
+    sheet_id, almacenamiento = planilla(generar_hojas(500, hasta=HOY))
+    agregar_filas = almacenamiento.agregar_filas
+    pendientes = [agregadas]
+
+    def agregar_con_carrera(hoja, filas):
+        # Mientras se copia una partición, alguien guarda una fila nueva en la hoja base.
+        inicio = agregar_filas(hoja, filas)
+        if pendientes[0] and hoja != particiones.HOJA_BASE:
+            pendientes[0] -= 1
+            agregar_filas(particiones.HOJA_BASE, [[HOY.isoformat(), f"Nueva {pendientes[0]}", "SÍ", "NO", ""]])
+        return inicio
+
+    almacenamiento.agregar_filas = agregar_con_carrera
+    informe = particiones.migrar(sheet_id)
+
+    if not informe["completa"]:
+        # Se rindió: la hoja base quedó entera y la próxima corrida termina el trabajo.
+        assert agregadas == particiones.INTENTOS_MIGRACION
+        base = almacenamiento.leer_filas(particiones.HOJA_BASE)
+        assert sum(f[1].startswith("Nueva") for f in base) == agregadas
+        assert particiones.migrar(sheet_id)["completa"]
+    filas = filas_crudas(almacenamiento)
+    assert sum(f[1].startswith("Nueva") for f in filas) == agregadas
+    # En la base solo quedan las filas sin fecha válida: las nuevas están en su partición.
+    assert all(particiones._meses_de([f[0]]) == [""] for f in almacenamiento.leer_filas(particiones.HOJA_BASE)[1:])
+    comparar_resumen(generar_resumen(sheet_id, HOY, HOY), resumen_de_referencia(filas, HOY, HOY))
+
+
+def test_migrar_cortada_no_junta_filas_iguales(planilla):
+    # Dos cargas idénticas legítimas (mismo día, misma jugadora, mismos valores) siguen siendo dos.
+    hojas = generar_hojas(300, hasta=HOY)
+    repetida = ["2025-05-02", "Jugadora 0001", "SÍ", "NO", ""]
+    hojas["Asistencias"] += [repetida, ["2025-05-02", "Jugadora 0002", "SÍ", "SÍ", ""], repetida]
+    sheet_id, almacenamiento = planilla(hojas)
+    originales = filas_crudas(almacenamiento)
+    reemplazar_filas = almacenamiento.reemplazar_filas
+
+    def cortarse(hoja, filas, leidas):
+        raise ConnectionError("se cortó la migración")
+
+    # Primera corrida: copia todas las particiones y se corta antes de recortar la base.
+    almacenamiento.reemplazar_filas = cortarse
+    with pytest.raises(ConnectionError):
+        particiones.migrar(sheet_id)
+    almacenamiento.reemplazar_filas = reemplazar_filas
+    # Mientras tanto la base recibe otra fila idéntica: también hay que copiarla.
+    almacenamiento.agregar_filas(particiones.HOJA_BASE, [repetida])
+
+    assert particiones.migrar(sheet_id)["completa"]
+    mayo = almacenamiento.leer_filas(particiones.nombre_particion("2025-05"))[1:]
+    assert sum(particiones._recortar(f) == repetida[:4] for f in mayo) == 3
+    assert _sin_vacias(filas_crudas(almacenamiento)) == _sin_vacias(originales + [repetida])
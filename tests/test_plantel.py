@@ -0,0 +1,60 @@
+import pytest
+
+from services import cambios, conexion
+from services.almacenamiento import ENCABEZADOS_ASISTENCIAS, ENCABEZADOS_JUGADORAS
+from services.plantel import armar_plantel, invalidar_plantel, obtener_plantel
+
+
+@pytest.fixture(autouse=True)
+def _sondeo_sin_cache(monkeypatch):
+    monkeypatch.setattr(cambios, "INTERVALO_SONDEO_SEG", 0)
+
+
+def test_armar_plantel_ordena_por_categoria():
+    plantel = armar_plantel([["Zoe", "1"], [" Ana ", "1 y 2"], ["Bea", "2"], ["Ana", "2"], ["", "1"], ["Caro", ""]])
+
+    assert plantel["por_categoria"] == {
+        "Todas": ("Ana", "Bea", "Caro", "Zoe"),
+        "Primera": ("Ana", "Zoe"),
+        "Intermedia": ("Bea",),
+    }
+    assert plantel["hay_ambas"]
+    assert [j["jugadora"] for j in plantel["jugadoras"] if j["ambas"]] == ["Ana"]
+
+
+def test_se_relee_solo_cuando_cambia_la_hoja(planilla):
+    sheet_id, almacenamiento = planilla(
+        {
+            "Asistencias": [list(ENCABEZADOS_ASISTENCIAS)],
+            "Jugadoras": [list(ENCABEZADOS_JUGADORAS), ["Bea", "1"], ["Ana", "1"]],
+        }
+    )
+    cliente = conexion.get_client()
+    primero = obtener_plantel(sheet_id)
+    assert primero["version"] == 1 and primero["por_categoria"]["Primera"] == ("Ana", "Bea")
+
+    # Sin cambios en el archivo no se lee nada: es el mismo objeto para todas las sesiones.
+    lecturas = cliente.llamadas_por_hoja[("lectura", "Jugadoras")]
+    assert obtener_plantel(sheet_id) is primero
+    assert cliente.llamadas_por_hoja[("lectura", "Jugadoras")] == lecturas
+
+    # Cambió otra hoja: se relee, pero el plantel es el mismo y no sube la versión.
+    almacenamiento.agregar_filas("Asistencias", [["2025-06-20", "Ana", "SÍ", "NO", ""]])
+    assert obtener_plantel(sheet_id) is primero
+    assert cliente.llamadas_por_hoja[("lectura", "Jugadoras")] == lecturas + 1
+
+    almacenamiento.agregar_filas("Jugadoras", [["Caro", "2"]])
+    segundo = obtener_plantel(sheet_id)
+    assert segundo["version"] == 2 and segundo["por_categoria"]["Intermedia"] == ("Caro",)
+
+
+def test_invalidar_fuerza_la_relectura_sin_cambiar_la_version(planilla):
+    sheet_id, _ = planilla({"Jugadoras": [list(ENCABEZADOS_JUGADORAS), ["Ana", "1"]]})
+    cliente = conexion.get_client()
+    plantel = obtener_plantel(sheet_id)
+    lecturas = cliente.llamadas_por_hoja[("lectura", "Jugadoras")]
+
+    invalidar_plantel(sheet_id)
+
+    assert obtener_plantel(sheet_id) is plantel
+    assert cliente.llamadas_por_hoja[("lectura", "Jugadoras")] == lecturas + 1
@@ -0,0 +1,53 @@
+from streamlit.testing.v1 import AppTest
+
+
+def _app():
+    import datetime
+
+    import streamlit as st
+
+    from ui.registro import _formulario_tarjetas
+
+    jugadoras = [f"J{i:02d}" for i in range(st.session_state.get("cantidad", 20))]
+    filas = _formulario_tarjetas(jugadoras, datetime.date(2025, 6, 20))
+    if filas:
+        st.session_state["guardadas"] = filas
+
+
+def _boton(at, etiqueta):
+    return next(b for b in at.button if b.label == etiqueta)
+
+
+def _presentes(at):
+    return [(f[1], f[3], f[4]) for f in at.session_state["guardadas"] if f[2] == "SÍ"]
+
+
+def test_las_marcas_sobreviven_al_cambio_de_pagina():
+    at = AppTest.from_function(_app).run()
+    at.checkbox(key="20250620_J01_asistio").check()
+    at.checkbox(key="20250620_J01_tarde").check()
+    at.text_input(key="20250620_J02_coment").input("sin marcar")
+    _boton(at, "Siguiente →").click().run()
+
+    assert at.checkbox(key="20250620_J16_asistio").value is False
+    at.checkbox(key="20250620_J16_asistio").check()
+    _boton(at, "← Anterior").click().run()
+    assert at.checkbox(key="20250620_J01_asistio").value is True
+    assert at.checkbox(key="20250620_J01_tarde").value is True
+
+    # Se guardan las dos páginas, no solo la visible.
+    _boton(at, "Guardar asistencia").click().run()
+    assert not at.exception
+    assert len(at.session_state["guardadas"]) == 20
+    assert _presentes(at) == [("J01", "SÍ", ""), ("J16", "NO", "")]
+    assert at.session_state["guardadas"][2][4] == "SIN MARCAR"
+
+
+def test_sin_paginas_no_hay_botones_de_navegacion():
+    at = AppTest.from_function(_app)
+    at.session_state["cantidad"] = 5
+    at.run()
+    assert [b.label for b in at.button] == ["Guardar asistencia"]
+    at.checkbox(key="20250620_J03_asistio").check()
+    _boton(at, "Guardar asistencia").click().run()
+    assert _presentes(at) == [("J03", "NO", "")]
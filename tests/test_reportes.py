@@ -0,0 +1,41 @@
+import csv
+from datetime import date, timedelta
+
+from benchmarks.datos import generar_hojas
+from conftest import filas_crudas, resumen_de_referencia
+from services import reportes
+from services.almacenamiento import filas_resumen
+from services.hoja_resumen import BLOQUES_RESUMEN, armar_grilla
+from services.plantel import CATEGORIAS, obtener_plantel
+
+
+def _grilla(resumen):
+    return armar_grilla([resumen[b] for b in BLOQUES_RESUMEN])
+
+
+def test_csv_y_hojas_iguales_al_resumen_de_las_filas_crudas(planilla, tmp_path, capsys):
+    hoy = date.today()
+    sheet_id, almacenamiento = planilla(generar_hojas(3000, hasta=hoy))
+    carpeta = tmp_path / "reportes"
+    argv = ["--sheet-id", sheet_id, "--ventanas", "30d", "todo", "--carpeta", str(carpeta), "--hojas"]
+    assert reportes.main(argv + ["--procesos", "2"]) == 0
+
+    salida = capsys.readouterr().out
+    plantel = obtener_plantel(sheet_id)["por_categoria"]
+    filas = filas_crudas(almacenamiento)
+    ventanas = {"30d": (hoy - timedelta(days=30), hoy), "todo": (None, None)}
+    guardados = 0
+    for categoria in CATEGORIAS:
+        for ventana, (desde, hasta) in ventanas.items():
+            esperado = resumen_de_referencia(filas, desde, hasta, list(plantel[categoria]))
+            ruta = carpeta / f"resumen-{categoria.lower()}-{ventana}.csv"
+            hoja = f"Resumen {categoria} {ventana}"
+            if esperado is None:
+                assert not ruta.exists() and f"{categoria} {ventana}" in salida
+                continue
+            with open(ruta, newline="", encoding="utf-8") as f:
+                assert list(csv.reader(f)) == [[str(v) for v in fila] for fila in _grilla(esperado)]
+            assert almacenamiento.leer_resumen(hoja) == filas_resumen(_grilla(esperado))
+            assert f"Hoja actualizada: {hoja}" in salida
+            guardados += 1
+    assert guardados > 0
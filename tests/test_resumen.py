@@ -0,0 +1,94 @@
+import random
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from benchmarks.datos import generar_hojas
+from conftest import comparar_resumen, filas_crudas, resumen_de_referencia
+from services import acumulados, particiones, tabla
+from services.asistencia import generar_resumen
+from services.google_sheets import upsert_asistencias
+from services.plantel import obtener_plantel
+
+HOY = date(2025, 6, 20)
+
+
+def _hojas():
+    hojas = generar_hojas(4000, hasta=HOY)
+    asistencias = hojas["Asistencias"]
+    # Una fila vacía, una fecha inválida y una repetida con otro formato de mayúsculas y espacios.
+    asistencias.append(["", "", "", "", ""])
+    asistencias.append(["fecha mala", asistencias[5][1], "SÍ", "NO", "x"])
+    asistencias.append([f" {asistencias[3][0]} ", asistencias[3][1], "sí", " sí", "repetida"])
+    return hojas
+
+
+def _rangos(jugadoras, cantidad=12):
+    azar = random.Random(1)
+    rangos = [(None, None, None)]
+    for _ in range(cantidad):
+        desde = HOY - timedelta(days=azar.randint(0, 500))
+        hasta = desde + timedelta(days=azar.randint(0, 200))
+        rangos.append((desde, hasta, azar.choice([None, jugadoras, jugadoras[:2], ["No existe"]])))
+    return rangos
+
+
+def _acumulados_igual_a_construir(sheet_id, hoja):
+    # Las sumas acumuladas corregidas mes a mes tienen que ser las mismas que armarlas de cero.
+    indice = acumulados.obtener(sheet_id, hoja)
+    fresco = acumulados._construir(tabla._construir(sheet_id, hoja, indice["version"]))
+    assert indice["meses"].tolist() == fresco["meses"].tolist()
+    for mes, bloque in fresco["bloques"].items():
+        assert np.array_equal(indice["bloques"][mes]["dias"], bloque["dias"]), mes
+        for campo in acumulados.CAMPOS:
+            a, b = indice["bloques"][mes][campo], bloque[campo]
+            n = min(a.shape[0], b.shape[0])
+            # Una jugadora nueva agrega filas en cero a los bloques que se corrigieron.
+            assert np.array_equal(a[:n], b[:n]) and not a[n:].any() and not b[n:].any(), (mes, campo)
+
+
+@pytest.mark.parametrize("particionada", [False, True])
+def test_resumen_igual_a_filas_crudas(planilla, particionada):
+    sheet_id, almacenamiento = planilla(_hojas())
+    if particionada:
+        particiones.migrar(sheet_id)
+    jugadoras = list(obtener_plantel(sheet_id)["por_categoria"]["Primera"])
+    filas = filas_crudas(almacenamiento)
+    for desde, hasta, filtro in _rangos(jugadoras):
+        comparar_resumen(
+            generar_resumen(sheet_id, desde, hasta, filtro), resumen_de_referencia(filas, desde, hasta, filtro)
+        )
+
+
+@pytest.mark.parametrize("particionada", [False, True])
+def test_escrituras_y_lecturas(planilla, particionada):
+    sheet_id, almacenamiento = planilla(_hojas())
+    if particionada:
+        particiones.migrar(sheet_id)
+    jugadoras = list(obtener_plantel(sheet_id)["por_categoria"]["Primera"])
+    # Se arman los índices antes de escribir para que las escrituras los corrijan en lugar de reconstruirlos.
+    generar_resumen(sheet_id)
+    antes = {hoja: acumulados.obtener(sheet_id, hoja) for hoja in particiones.hojas_del_rango(sheet_id)}
+
+    # Correcciones de filas existentes, días nuevos y una jugadora que no estaba.
+    fechas = [(HOY + timedelta(days=dias)).isoformat() for dias in (0, 1, 40)]
+    for fecha in fechas:
+        filas = [[fecha, j, "SÍ", "SÍ" if i % 2 else "NO", "c" if i % 3 else ""] for i, j in enumerate(jugadoras)]
+        upsert_asistencias(sheet_id, particiones.HOJA_BASE, filas + [[fecha, "Jugadora Nueva", "SÍ", "NO", "hola"]])
+    upsert_asistencias(sheet_id, particiones.HOJA_BASE, [[HOY.isoformat(), jugadoras[0], "NO", "NO", ""]])
+
+    filas = filas_crudas(almacenamiento)
+    for desde, hasta, filtro in _rangos(jugadoras + ["Jugadora Nueva"], 6):
+        comparar_resumen(
+            generar_resumen(sheet_id, desde, hasta, filtro), resumen_de_referencia(filas, desde, hasta, filtro)
+        )
+    for hoja in particiones.hojas_del_rango(sheet_id):
+        _acumulados_igual_a_construir(sheet_id, hoja)
+
+    # Los meses que no se tocaron conservan su bloque: no se vuelven a contar.
+    tocados = set(tabla.meses_de(np.array([tabla.dia_ordinal(f) for f in fechas])).tolist())
+    for hoja, indice in antes.items():
+        despues = acumulados.obtener(sheet_id, hoja)
+        for mes in set(indice["bloques"]) - tocados:
+            assert despues["bloques"][mes] is indice["bloques"][mes], (hoja, mes)
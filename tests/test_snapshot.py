@@ -0,0 +1,74 @@
+import threading
+
+from services import cambios, snapshot
+
+ENCABEZADOS = ["Fecha", "Jugadora", "Asistió", "Llegó tarde", "Comentario"]
+
+
+def _hojas(filas=3):
+    return {
+        "Asistencias": [ENCABEZADOS] + [[f"2025-06-{d + 1:02d}", "Ana", "SÍ", "NO", ""] for d in range(filas)],
+        "Otra": [ENCABEZADOS, ["2025-06-01", "Bea", "SÍ", "NO", ""]],
+    }
+
+
+def _jugadoras(sheet_id, hoja="Asistencias"):
+    return [f[2] for f in snapshot.filas(sheet_id, hoja)]
+
+
+def test_agregado_desfasado_no_usa_la_revision_en_cache(planilla, monkeypatch):
+    monkeypatch.setattr(cambios, "INTERVALO_SONDEO_SEG", 60)
+    sheet_id, almacenamiento = planilla(_hojas())
+    snapshot.sincronizar(sheet_id)
+
+    # Otra sesión agrega una fila y esta escribe detrás: el snapshot queda desfasado, y la revisión del
+    # sondeo sigue en caché con el valor de antes.
+    almacenamiento.agregar_filas("Asistencias", [["2025-06-10", "Bea", "SÍ", "NO", ""]])
+    almacenamiento.agregar_filas("Asistencias", [["2025-06-11", "Cata", "SÍ", "NO", ""]])
+    snapshot.registrar_escritura(sheet_id, "Asistencias", {}, [["2025-06-11", "Cata", "SÍ", "NO", ""]], 6)
+
+    snapshot.sincronizar(sheet_id)
+    assert _jugadoras(sheet_id) == ["Ana", "Ana", "Ana", "Bea", "Cata"]
+
+
+def test_la_lectura_no_bloquea_escrituras_ni_otras_hojas(planilla, monkeypatch):
+    monkeypatch.setattr(cambios, "INTERVALO_SONDEO_SEG", 0)
+    sheet_id, almacenamiento = planilla(_hojas())
+    snapshot.sincronizar(sheet_id)
+    snapshot.sincronizar(sheet_id, "Otra")
+    snapshot.invalidar(sheet_id)
+
+    leyendo, seguir = threading.Event(), threading.Event()
+    leer_filas = almacenamiento.leer_filas
+
+    def leer_lento(hoja, *args, **kwargs):
+        datos = leer_filas(hoja, *args, **kwargs)
+        if hoja == "Asistencias" and not leyendo.is_set():
+            leyendo.set()
+            assert seguir.wait(5)
+        return datos
+
+    monkeypatch.setattr(almacenamiento, "leer_filas", leer_lento)
+    hilo = threading.Thread(target=snapshot.sincronizar, args=(sheet_id,))
+    hilo.start()
+    nueva = ["2025-06-10", "Bea", "SÍ", "NO", ""]
+
+    def escribir():
+        snapshot.sincronizar(sheet_id, "Otra", forzar=True)
+        almacenamiento.agregar_filas("Asistencias", [nueva])
+        snapshot.registrar_escritura(sheet_id, "Asistencias", {}, [nueva], 5)
+
+    try:
+        assert leyendo.wait(5)
+        # Con la lectura de "Asistencias" trabada, la otra hoja y el registro de escrituras siguen.
+        otro = threading.Thread(target=escribir)
+        otro.start()
+        otro.join(2)
+        assert not otro.is_alive()
+    finally:
+        seguir.set()
+        hilo.join(5)
+    assert not hilo.is_alive()
+    # Lo leído antes de la escritura se descarta en lugar de pisarla.
+    assert _jugadoras(sheet_id) == ["Ana", "Ana", "Ana", "Bea"]
+    assert snapshot.sincronizar(sheet_id)["total_filas"] == 5
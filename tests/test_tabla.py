@@ -0,0 +1,94 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from benchmarks.datos import generar_hojas
+from services import particiones, tabla
+from services.google_sheets import upsert_asistencias
+from services.plantel import obtener_plantel
+
+HOY = date(2025, 6, 20)
+
+
+def _igual_a_construir(sheet_id, hoja):
+    # Lo que quedó después de escrituras incrementales tiene que ser lo mismo que armarlo de cero.
+    actual = tabla.obtener(sheet_id, hoja)
+    nueva = tabla._construir(sheet_id, hoja, actual["version"])
+    for columna in tabla.COLUMNAS_NUMERICAS:
+        assert np.array_equal(actual[columna], nueva[columna]), columna
+    assert [actual["jugadoras"][c] for c in actual["jugadora"]] == [nueva["jugadoras"][c] for c in nueva["jugadora"]]
+    assert actual["comentarios"] == nueva["comentarios"]
+    assert actual["por_dia"].keys() == nueva["por_dia"].keys()
+    assert all(np.array_equal(actual["por_dia"][d], nueva["por_dia"][d]) for d in nueva["por_dia"])
+
+
+def _copia(t):
+    return {
+        **{c: t[c].copy() for c in tabla.COLUMNAS_NUMERICAS},
+        "codigos": dict(t["codigos"]),
+        "comentarios": dict(t["comentarios"]),
+        "por_dia": {d: p.copy() for d, p in t["por_dia"].items()},
+        "jugadoras": t["jugadoras"],
+    }
+
+
+def _sin_cambios(t, copia):
+    for c in tabla.COLUMNAS_NUMERICAS:
+        assert np.array_equal(t[c], copia[c]), c
+    assert t["codigos"] == copia["codigos"]
+    assert t["comentarios"] == copia["comentarios"]
+    assert t["jugadoras"] == copia["jugadoras"]
+    assert t["por_dia"].keys() == copia["por_dia"].keys()
+    assert all(np.array_equal(t["por_dia"][d], copia["por_dia"][d]) for d in copia["por_dia"])
+
+
+@pytest.mark.parametrize("particionada", [False, True])
+def test_escrituras_incrementales_igual_a_reconstruir(planilla, particionada):
+    sheet_id, _ = planilla(generar_hojas(4000, hasta=HOY))
+    if particionada:
+        particiones.migrar(sheet_id)
+    jugadoras = list(obtener_plantel(sheet_id)["por_categoria"]["Primera"])
+    for hoja in particiones.hojas_del_rango(sheet_id):
+        tabla.obtener(sheet_id, hoja)
+
+    # Correcciones de filas existentes, días nuevos y una jugadora que no estaba.
+    for dias in (0, 1, 40):
+        fecha = (HOY + timedelta(days=dias)).isoformat()
+        filas = [[fecha, j, "SÍ", "SÍ" if i % 2 else "NO", "c" if i % 3 else ""] for i, j in enumerate(jugadoras)]
+        upsert_asistencias(sheet_id, particiones.HOJA_BASE, filas + [[fecha, "Jugadora Nueva", "SÍ", "NO", "hola"]])
+    upsert_asistencias(sheet_id, particiones.HOJA_BASE, [[HOY.isoformat(), jugadoras[0], "NO", "NO", ""]])
+
+    for hoja in particiones.hojas_del_rango(sheet_id):
+        _igual_a_construir(sheet_id, hoja)
+    hoja_hoy = particiones.hojas_de_fecha(sheet_id, HOY)[-1]
+    presentes = tabla.asistencias_de_fecha(tabla.obtener(sheet_id, hoja_hoy), HOY.isoformat())
+    assert presentes[jugadoras[0]] == "NO"
+    assert all(presentes[j] == "SÍ" for j in jugadoras[1:])
+    assert presentes["Jugadora Nueva"] == "SÍ"
+
+
+def test_la_version_anterior_no_cambia(planilla):
+    sheet_id, _ = planilla(generar_hojas(2000, hasta=HOY))
+    jugadoras = list(obtener_plantel(sheet_id)["por_categoria"]["Primera"])
+    upsert_asistencias(sheet_id, particiones.HOJA_BASE, [[HOY.isoformat(), j, "SÍ", "NO", "x"] for j in jugadoras])
+    anterior = tabla.obtener(sheet_id, particiones.HOJA_BASE)
+    copia = _copia(anterior)
+
+    # Corrige filas (estado, comentario), agrega otras y suma una jugadora nueva.
+    upsert_asistencias(
+        sheet_id,
+        particiones.HOJA_BASE,
+        [[HOY.isoformat(), j, "NO", "NO", ""] for j in jugadoras]
+        + [[(HOY + timedelta(days=1)).isoformat(), "Jugadora Nueva", "SÍ", "SÍ", "nueva"]],
+    )
+    nueva = tabla.obtener(sheet_id, particiones.HOJA_BASE)
+
+    assert nueva["version"] != anterior["version"]
+    assert len(nueva["fila"]) == len(anterior["fila"]) + 1
+    _sin_cambios(anterior, copia)
+    assert tabla.asistencias_de_fecha(anterior, HOY.isoformat())[jugadoras[0]] == "SÍ"
+    assert tabla.asistencias_de_fecha(nueva, HOY.isoformat())[jugadoras[0]] == "NO"
+    # Lo agregado va después de "total" en la misma reserva; lo corregido, en una copia.
+    assert nueva["fila"].base is anterior["fila"].base
+    assert nueva["estado"].base is not anterior["estado"].base
@@ -0,0 +1,78 @@
+import pandas as pd
+import streamlit as st
+
+from services import metricas
+from services.plantel import invalidar_plantel, obtener_plantel
+from utils import arranque
+
+
+def _tabla(stats):
+    tramos = [f"≤{t} ms" for t in metricas.TRAMOS_MS] + [f">{metricas.TRAMOS_MS[-1]} ms"]
+    filas = []
+    for (operacion, hoja), s in sorted(stats.items(), key=lambda item: -item[1]["segundos"]):
+        fila = {
+            "Operación": operacion,
+            "Hoja": hoja or "-",
+            "Llamadas": s["llamadas"],
+            "Errores": s["errores"],
+            "Total s": round(s["segundos"], 2),
+            "Prom. ms": round(s["segundos"] / s["llamadas"] * 1000, 1),
+            "Máx. ms": round(s["max_seg"] * 1000, 1),
+            "KB enviados (aprox.)": round(s["bytes_enviados"] / 1024, 1),
+            "Filas recibidas": s["filas_recibidas"],
+        }
+        fila.update(zip(tramos, s["histograma"]))
+        filas.append(fila)
+    return pd.DataFrame(filas)
+
+
+def _mostrar(titulo, stats):
+    st.markdown(f'<div class="section-title">{titulo}</div>', unsafe_allow_html=True)
+    if not stats:
+        st.caption("Sin llamadas registradas.")
+        return
+    st.caption(
+        f"{sum(s['llamadas'] for s in stats.values())} llamadas · "
+        f"{sum(s['segundos'] for s in stats.values()):.2f} s en la API"
+    )
+    st.dataframe(_tabla(stats), use_container_width=True, hide_index=True)
+
+
+def mostrar_panel_admin(sheet_id):
+    # Solo aparece con ?admin=1 en la URL y si se entró con la clave de administración.
+    with st.expander("Llamadas a Google Sheets", expanded=True):
+        _mostrar("Esta sesión", metricas.estadisticas(metricas.sesion_actual()))
+        _mostrar("Todo el proceso", metricas.estadisticas())
+        if st.button("Reiniciar contadores"):
+            metricas.reiniciar()
+            st.rerun()
+
+    with st.expander("Plantel"):
+        # Para cuando se editó la hoja Jugadoras y no se quiere esperar al próximo cambio de revisión.
+        if st.button("Recargar plantel"):
+            invalidar_plantel(sheet_id)
+            plantel = obtener_plantel(sheet_id)
+            st.success(f"Plantel recargado: {len(plantel['jugadoras'])} jugadoras (versión {plantel['version']}).")
+
+    with st.expander("Arranque"):
+        tiempos = arranque.tiempos()
+        if tiempos:
+            st.dataframe(
+                pd.DataFrame(
+                    [
+                        {
+                            "Módulo": modulo,
+                            "Importación s": round(t["seg"], 3),
+                            "Listo a los s": round(t["desde_inicio"], 2),
+                            "Hilo": t["hilo"],
+                        }
+                        for modulo, t in sorted(tiempos.items(), key=lambda item: item[1]["desde_inicio"])
+                    ]
+                ),
+                use_container_width=True,
+                hide_index=True,
+            )
+        else:
+            st.caption("Sin importaciones diferidas registradas.")
+        # Medir el costo de cada módulo lanza un intérprete por módulo: queda en la terminal, no en la web.
+        st.caption("Costo de importación por módulo: `python -m utils.arranque` en el servidor.")
@@ -1,6 +1,6 @@
 import streamlit as st
 
-CATEGORIAS = ["Primera", "Intermedia", "Todas"]
+from services.plantel import CATEGORIAS
 
 
 def selector_categoria(key="categoria_seleccion"):
@@ -14,15 +14,6 @@ def selector_categoria(key="categoria_seleccion"):
     )
 
 
-def filtrar_jugadoras(jugadoras_con_categoria, categoria):
-    if categoria == "Todas":
-        nombres = [j.get("jugadora", "") for j in jugadoras_con_categoria if j.get("jugadora")]
-        return sorted(set(nombres))
-
-    codigo = "1" if categoria == "Primera" else "2"
-    nombres = [
-        j.get("jugadora", "")
-        for j in jugadoras_con_categoria
-        if j.get("categoria") == codigo
-    ]
-    return sorted(set(nombres))
+def filtrar_jugadoras(plantel, categoria):
+    # Las listas por categoría ya vienen ordenadas en el plantel compartido.
+    return plantel["por_categoria"].get(categoria, ())
@@ -29,8 +29,12 @@ def login():
             submitted = st.form_submit_button("Ingresar", type="primary")
 
         if submitted and pwd:
-            if pwd == st.secrets["app"]["password"]:
+            # La clave de administración (opcional) también entra y además habilita el panel de admin.
+            clave_admin = st.secrets["app"].get("admin_password")
+            es_admin = bool(clave_admin) and pwd == clave_admin
+            if es_admin or pwd == st.secrets["app"]["password"]:
                 st.session_state.logged_in = True
+                st.session_state.es_admin = es_admin
                 st.session_state.login_attempts = 0
                 st.session_state.login_blocked_until = None
                 st.rerun()
@@ -1,54 +1,116 @@
+import math
+import time
+
 import pandas as pd
 import streamlit as st
 from datetime import datetime
 
 from config import ARG_TZ
-from services.google_sheets import (
-    cargar_jugadoras_con_categoria,
-    obtener_asistencias_previas,
-    upsert_asistencias,
-)
+from services.cola_escritura import encolar, estado as estado_cola, fallidas, reintentar_fallidas
+from services.google_sheets import obtener_asistencias_previas
+from services.plantel import obtener_plantel
 from ui.categorias import selector_categoria, filtrar_jugadoras
 
+TARJETAS_POR_PAGINA = 15
 
-def mostrar_formulario_asistencia(jugadoras_faltantes, fecha):
-    st.markdown('<div class="section-title">Jugadoras pendientes</div>', unsafe_allow_html=True)
-    st.markdown(
-        '<div class="section-caption">Usá tarjetas en el celu o la tabla en desktop.</div>',
-        unsafe_allow_html=True,
-    )
 
-    modo_celu = st.toggle("Modo celular", value=True, help="Tarjetas más cómodas en pantalla chica.")
+def _recordar_pagina(prefijo, visibles, pagina=None, guardar=False):
+    # Callback de los botones del form: corre antes del rerun, con los valores recién enviados. Las marcas
+    # de la página visible pasan a session_state para sobrevivir al cambio de página.
+    marcas = st.session_state.setdefault(f"marcas_tarjetas_{prefijo}", {})
+    for jugadora in visibles:
+        key_base = f"{prefijo}_{jugadora}"
+        marcas[jugadora] = (
+            st.session_state.get(f"{key_base}_asistio", False),
+            st.session_state.get(f"{key_base}_tarde", False),
+            st.session_state.get(f"{key_base}_coment", ""),
+        )
+    if pagina is not None:
+        st.session_state[f"pagina_tarjetas_{prefijo}"] = pagina
+    if guardar:
+        st.session_state[f"guardar_tarjetas_{prefijo}"] = True
 
-    if modo_celu:
-        filas = []
-        for jugadora in jugadoras_faltantes:
-            key_base = f"{fecha.strftime('%Y%m%d')}_{jugadora}"
+
+def _formulario_tarjetas(jugadoras_faltantes, fecha):
+    # Las tarjetas van dentro de un form: tocar un checkbox no recarga la página, solo los botones. Con
+    # planteles grandes se muestran de a TARJETAS_POR_PAGINA; cambiar de página también envía el form, así
+    # las marcas de cada página se acumulan y "Guardar" manda todas juntas.
+    prefijo = fecha.strftime("%Y%m%d")
+    total = len(jugadoras_faltantes)
+    paginas = max(1, math.ceil(total / TARJETAS_POR_PAGINA))
+    pagina = min(st.session_state.get(f"pagina_tarjetas_{prefijo}", 1), paginas)
+    visibles = jugadoras_faltantes[(pagina - 1) * TARJETAS_POR_PAGINA : pagina * TARJETAS_POR_PAGINA]
+    marcas = st.session_state.get(f"marcas_tarjetas_{prefijo}", {})
+
+    with st.form(f"tarjetas_{prefijo}", border=False):
+        for jugadora in visibles:
+            key_base = f"{prefijo}_{jugadora}"
+            asistio, tarde, comentario = marcas.get(jugadora, (False, False, ""))
             with st.container(border=True):
                 st.markdown(f"**{jugadora}**")
                 c1, c2 = st.columns(2)
-                asistio = c1.checkbox("Asistió", key=f"{key_base}_asistio")
-                tarde = c2.checkbox("Tarde", key=f"{key_base}_tarde", disabled=not asistio)
-                comentario = st.text_input(
+                c1.checkbox("Asistió", value=asistio, key=f"{key_base}_asistio")
+                # Dentro del form no se puede deshabilitar según "Asistió": se ignora al guardar.
+                c2.checkbox("Tarde", value=tarde, key=f"{key_base}_tarde")
+                st.text_input(
                     "Comentario",
+                    value=comentario,
                     key=f"{key_base}_coment",
                     placeholder="Opcional",
                     max_chars=120,
                 )
-            filas.append(
-                [
-                    fecha.strftime("%Y-%m-%d"),
-                    jugadora.strip(),
-                    "SÍ" if asistio else "NO",
-                    "SÍ" if asistio and tarde else "NO",
-                    str(comentario).strip().upper(),
-                ]
+        if paginas > 1:
+            anterior, medio, siguiente = st.columns([1, 2, 1])
+            anterior.form_submit_button(
+                "← Anterior", disabled=pagina == 1, on_click=_recordar_pagina, args=(prefijo, visibles, pagina - 1)
             )
+            desde = (pagina - 1) * TARJETAS_POR_PAGINA + 1
+            medio.caption(f"Página {pagina} de {paginas} ({desde}-{desde + len(visibles) - 1} de {total})")
+            siguiente.form_submit_button(
+                "Siguiente →",
+                disabled=pagina == paginas,
+                on_click=_recordar_pagina,
+                args=(prefijo, visibles, pagina + 1),
+            )
+            st.caption("Las marcas de todas las páginas se guardan juntas.")
+        st.form_submit_button(
+            "Guardar asistencia",
+            type="primary",
+            on_click=_recordar_pagina,
+            args=(prefijo, visibles),
+            kwargs={"guardar": True},
+        )
 
-        if st.button("Guardar asistencia", type="primary"):
-            return filas
-
+    if not st.session_state.pop(f"guardar_tarjetas_{prefijo}", False):
         return []
+    marcas = st.session_state.pop(f"marcas_tarjetas_{prefijo}", {})
+    st.session_state.pop(f"pagina_tarjetas_{prefijo}", None)
+    filas = []
+    for jugadora in jugadoras_faltantes:
+        asistio, tarde, comentario = marcas.get(jugadora, (False, False, ""))
+        filas.append(
+            [
+                fecha.strftime("%Y-%m-%d"),
+                jugadora.strip(),
+                "SÍ" if asistio else "NO",
+                "SÍ" if asistio and tarde else "NO",
+                str(comentario).strip().upper(),
+            ]
+        )
+    return filas
+
+
+def mostrar_formulario_asistencia(jugadoras_faltantes, fecha):
+    st.markdown('<div class="section-title">Jugadoras pendientes</div>', unsafe_allow_html=True)
+    st.markdown(
+        '<div class="section-caption">Usá tarjetas en el celu o la tabla en desktop.</div>',
+        unsafe_allow_html=True,
+    )
+
+    modo_celu = st.toggle("Modo celular", value=True, help="Tarjetas más cómodas en pantalla chica.")
+
+    if modo_celu:
+        return _formulario_tarjetas(jugadoras_faltantes, fecha)
 
     default_df = pd.DataFrame(
         {
@@ -110,24 +172,21 @@ def mostrar_registro_tab(sheet_id):
 
     categoria = selector_categoria()
 
-    if "jugadoras_data" not in st.session_state:
-        with st.spinner("Cargando jugadoras..."):
-            st.session_state.jugadoras_data = cargar_jugadoras_con_categoria()
+    with st.spinner("Cargando jugadoras..."):
+        plantel = obtener_plantel(sheet_id)
 
-    if any(j.get("ambas") for j in st.session_state.jugadoras_data):
+    if plantel["hay_ambas"]:
         st.caption("Hay jugadoras marcadas con ambas categorías. Se asignan solo a la primera detectada.")
 
-    jugadoras = filtrar_jugadoras(st.session_state.jugadoras_data, categoria)
+    jugadoras = filtrar_jugadoras(plantel, categoria)
     if not jugadoras:
         st.warning("No hay jugadoras para esta categoría.")
         return
 
-    if "asistencias_previas" not in st.session_state or st.session_state.get("asistencia_fecha") != fecha:
-        with st.spinner("Buscando asistencias previas..."):
-            st.session_state.asistencias_previas = obtener_asistencias_previas(fecha)
-            st.session_state.asistencia_fecha = fecha
+    with st.spinner("Buscando asistencias previas..."):
+        asistencias_previas = obtener_asistencias_previas(fecha)
 
-    jugadoras_presentes = [j for j in st.session_state.asistencias_previas if j in jugadoras]
+    jugadoras_presentes = [j for j in asistencias_previas if j in jugadoras]
     jugadoras_faltantes = [j for j in jugadoras if j not in jugadoras_presentes]
 
     st.markdown(
@@ -152,21 +211,59 @@ def mostrar_registro_tab(sheet_id):
 
     if not jugadoras_faltantes:
         st.success("Todas las jugadoras ya tienen registrada la asistencia para esta fecha.")
+        mostrar_estado_envio(sheet_id)
         return
 
     nuevas_filas = mostrar_formulario_asistencia(jugadoras_faltantes, fecha)
     if nuevas_filas:
-        with st.spinner("Guardando asistencia..."):
-            try:
-                resultado = upsert_asistencias(sheet_id, "Asistencias", nuevas_filas)
-                total = sum(1 for fila in nuevas_filas if fila[2] == "SÍ")
-                st.success(
-                    "Asistencia guardada. "
-                    f"{total} jugadoras asistieron. "
-                    f"(Actualizadas: {resultado['actualizadas']} | Agregadas: {resultado['agregadas']})"
-                )
-                del st.session_state["asistencias_previas"]
-                obtener_asistencias_previas.clear()
-            except Exception as e:
-                st.error("Error al guardar la asistencia.")
-                st.exception(e)
+        try:
+            encolar(sheet_id, "Asistencias", nuevas_filas)
+            total = sum(1 for fila in nuevas_filas if fila[2] == "SÍ")
+            st.success(f"Asistencia guardada. {total} jugadoras asistieron. Se está enviando a la planilla.")
+        except Exception as e:
+            st.error("Error al guardar la asistencia.")
+            st.exception(e)
+
+    mostrar_estado_envio(sheet_id)
+
+
+def mostrar_estado_envio(sheet_id):
+    estado = estado_cola(sheet_id, "Asistencias")
+    if estado["pendientes"]:
+        texto = f"Pendientes de enviar a la planilla: {estado['pendientes']}."
+        if estado["error_worker"]:
+            desde = datetime.fromtimestamp(estado["error_worker_desde"], ARG_TZ).strftime("%H:%M:%S")
+            st.warning(f"{texto} El envío en segundo plano está fallando desde las {desde}; se sigue intentando.")
+            st.caption(estado["error_worker"])
+        elif estado["ultimo_error"]:
+            reintento = max(0, int(estado["proximo_intento"] - time.time()))
+            st.warning(f"{texto} Falló el último envío, se reintenta en {reintento} s.")
+        else:
+            st.caption(texto)
+    elif estado["ultimo_envio"] and not estado["fallidas"]:
+        enviado = datetime.fromtimestamp(estado["ultimo_envio"], ARG_TZ).strftime("%H:%M:%S")
+        st.caption(f"Todo enviado a la planilla (último envío {enviado}).")
+    if estado["fallidas"]:
+        mostrar_fallidas(sheet_id, estado["fallidas"])
+
+
+def mostrar_fallidas(sheet_id, cantidad):
+    st.error(f"{cantidad} filas no se pudieron guardar en la planilla y no se van a reintentar solas.")
+    with st.expander("Ver filas que fallaron"):
+        filas = fallidas(sheet_id, "Asistencias")
+        st.dataframe(
+            pd.DataFrame(
+                {
+                    "Fecha": [f["fila"][0] for f in filas],
+                    "Jugadora": [f["fila"][1] for f in filas],
+                    "Asistió": [f["fila"][2] if len(f["fila"]) > 2 else "" for f in filas],
+                    "Error": [f["error"] for f in filas],
+                    "Falló": [datetime.fromtimestamp(f["fallo"], ARG_TZ).strftime("%d/%m %H:%M") for f in filas],
+                }
+            ),
+            use_container_width=True,
+            hide_index=True,
+        )
+        if st.button("Volver a enviarlas"):
+            reintentar_fallidas(sheet_id, "Asistencias")
+            st.rerun()
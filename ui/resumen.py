@@ -1,36 +1,111 @@
 # ui/resumen.py
+import atexit
+import os
+import shutil
+import tempfile
+import time
+
 import streamlit as st
-import pandas as pd
-import gspread
 from datetime import datetime, timedelta
 
 from config import ARG_TZ
 from services.asistencia import generar_resumen
-from services.google_sheets import cargar_jugadoras_con_categoria
+from services.exportacion import DEPENDENCIAS, armar_tablas, exportar, extension
+from services.hoja_resumen import BLOQUES_RESUMEN, escribir_resumen
+from services.insights import obtener_insights
+from services.plantel import obtener_plantel
 from ui.categorias import selector_categoria, filtrar_jugadoras
 
 
-def exportar_df_a_hoja(ws, df, fila_inicio):
-    valores = [df.columns.tolist()] + df.astype(str).fillna("").values.tolist()
-    if not valores:
-        return fila_inicio + 1
-
-    filas_necesarias = fila_inicio + len(valores) - 1
-    cols_necesarias = len(valores[0])
-
-    if filas_necesarias > ws.row_count or cols_necesarias > ws.col_count:
-        ws.resize(rows=max(ws.row_count, filas_necesarias), cols=max(ws.col_count, cols_necesarias))
-
-    ws.update(f"A{fila_inicio}", valores, value_input_option="USER_ENTERED")
-    return fila_inicio + len(df) + 2
-
-
 def mostrar_boton_resumen(sheet_id, fecha_desde=None, fecha_hasta=None, jugadoras_filtro=None):
     if st.button("Generar resumen de asistencia"):
         with st.spinner("Generando resumen..."):
             generar_y_exportar_resumen(sheet_id, fecha_desde, fecha_hasta, jugadoras_filtro)
 
 
+FORMATOS_DESCARGA = {"CSV": "csv", "Excel": "xlsx", "Parquet": "parquet"}
+CONTENIDOS_DESCARGA = {
+    "Asistencias y resumen": (True, True),
+    "Solo asistencias": (True, False),
+    "Solo resumen": (False, True),
+}
+MIME_DESCARGA = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "parquet": "application/vnd.apache.parquet",
+    "zip": "application/zip",
+}
+
+# Los archivos para descargar van a una carpeta del proceso que se borra al salir. Si una sesión arma un
+# archivo y nunca lo descarga, se borra igual cuando pasa este tiempo.
+VIDA_DESCARGA_SEG = 60 * 60
+_CARPETA_DESCARGAS = tempfile.mkdtemp(prefix="asistencia-descargas-")
+atexit.register(shutil.rmtree, _CARPETA_DESCARGAS, ignore_errors=True)
+
+
+def _borrar_descargas_viejas():
+    limite = time.time() - VIDA_DESCARGA_SEG
+    for entrada in os.scandir(_CARPETA_DESCARGAS):
+        try:
+            if entrada.stat().st_mtime < limite:
+                os.remove(entrada.path)
+        except FileNotFoundError:
+            pass
+
+
+def mostrar_descargas(sheet_id, fecha_desde, fecha_hasta, jugadoras_filtro):
+    with st.expander("Descargar datos"):
+        col_formato, col_contenido = st.columns(2)
+        formato = FORMATOS_DESCARGA[
+            col_formato.radio("Formato", list(FORMATOS_DESCARGA), horizontal=True, key="descarga_formato")
+        ]
+        contenido = col_contenido.radio("Contenido", list(CONTENIDOS_DESCARGA), key="descarga_contenido")
+        clave = (sheet_id, formato, contenido, fecha_desde, fecha_hasta, tuple(jugadoras_filtro))
+
+        if st.button("Preparar archivo"):
+            _soltar_descarga()
+            _borrar_descargas_viejas()
+            with st.spinner("Armando archivo..."):
+                asistencias, resumen = CONTENIDOS_DESCARGA[contenido]
+                tablas = armar_tablas(sheet_id, fecha_desde, fecha_hasta, jugadoras_filtro, asistencias, resumen)
+                ext = extension(formato, tablas)
+                # El archivo se arma en disco y en la sesión queda solo la ruta; se borra al descargarlo.
+                temporal = tempfile.NamedTemporaryFile("wb", suffix=f".{ext}", dir=_CARPETA_DESCARGAS, delete=False)
+                with temporal as salida:
+                    try:
+                        exportar(salida, formato, tablas)
+                    except ImportError:
+                        salida.close()
+                        os.remove(salida.name)
+                        st.error(f"Para exportar a {formato} hace falta instalar {DEPENDENCIAS[formato]}.")
+                        return
+                st.session_state.descarga = {
+                    "clave": clave,
+                    "ruta": salida.name,
+                    "nombre": f"asistencias_{fecha_desde:%Y%m%d}_{fecha_hasta:%Y%m%d}.{ext}",
+                    "mime": MIME_DESCARGA[ext],
+                }
+
+        # El archivo armado sirve mientras no cambien el formato, el contenido, el rango o la categoría.
+        descarga = st.session_state.get("descarga")
+        if descarga and descarga["clave"] != clave:
+            _soltar_descarga()
+        elif descarga and os.path.exists(descarga["ruta"]):
+            with open(descarga["ruta"], "rb") as archivo:
+                st.download_button(
+                    "Descargar", archivo, file_name=descarga["nombre"], mime=descarga["mime"], on_click=_soltar_descarga
+                )
+
+
+def _soltar_descarga():
+    descarga = st.session_state.pop("descarga", None)
+    if descarga:
+        try:
+            os.remove(descarga["ruta"])
+        except FileNotFoundError:
+            pass
+
+
 def _render_metrics(cards):
     html = '<div class="metrics">'
     for label, value in cards:
@@ -61,27 +136,6 @@ def _listar_nombres(nombres, limite=12):
     return texto
 
 
-def _df_asistencia(resumen_data, jugadoras_categoria):
-    if not resumen_data:
-        return pd.DataFrame(columns=["Jugadora", "Presencias", "% Asistencia"]), 0, pd.DataFrame()
-
-    entrenamientos = resumen_data["entrenamientos_por_mes"]
-    ranking = resumen_data["ranking"]
-    total_entrenamientos = int(entrenamientos["Entrenamientos del mes"].sum()) if not entrenamientos.empty else 0
-    ranking_presencias = ranking.rename(columns={"Total presencias": "Presencias"})
-    presencias_por_jugadora = {
-        row["Jugadora"]: int(row["Presencias"]) for _, row in ranking_presencias.iterrows()
-    }
-    resumen_jugadoras = []
-    for jugadora in jugadoras_categoria:
-        presencias_j = presencias_por_jugadora.get(jugadora, 0)
-        porcentaje_j = round((presencias_j / total_entrenamientos) * 100, 1) if total_entrenamientos > 0 else 0
-        resumen_jugadoras.append(
-            {"Jugadora": jugadora, "Presencias": presencias_j, "% Asistencia": porcentaje_j}
-        )
-    return pd.DataFrame(resumen_jugadoras), total_entrenamientos, ranking_presencias
-
-
 def mostrar_resumen_insights(sheet_id):
     st.markdown(
         """
@@ -98,14 +152,13 @@ def mostrar_resumen_insights(sheet_id):
     hoy = datetime.now(ARG_TZ).date()
     rango_default = (hoy - timedelta(days=45), hoy)
 
-    if "jugadoras_data" not in st.session_state:
-        with st.spinner("Cargando jugadoras..."):
-            st.session_state.jugadoras_data = cargar_jugadoras_con_categoria()
+    with st.spinner("Cargando jugadoras..."):
+        plantel = obtener_plantel(sheet_id)
 
-    if any(j.get("ambas") for j in st.session_state.jugadoras_data):
+    if plantel["hay_ambas"]:
         st.caption("Hay jugadoras marcadas con ambas categorías. Se asignan solo a la primera detectada.")
 
-    jugadoras_categoria = filtrar_jugadoras(st.session_state.jugadoras_data, categoria)
+    jugadoras_categoria = filtrar_jugadoras(plantel, categoria)
     if not jugadoras_categoria:
         st.warning("No hay jugadoras para esta categoría.")
         return
@@ -137,143 +190,63 @@ def mostrar_resumen_insights(sheet_id):
     if st.button("Actualizar insights", type="primary"):
         with st.spinner("Calculando resumen..."):
             try:
-                resumen_tmp = generar_resumen(
-                    sheet_id,
-                    fecha_desde=fecha_desde,
-                    fecha_hasta=fecha_hasta,
-                    jugadoras_filtro=jugadoras_categoria,
+                # Si nada cambió desde el último cálculo (de cualquier sesión), vuelve el mismo resultado.
+                insights_tmp = obtener_insights(
+                    sheet_id, categoria, fecha_desde, fecha_hasta, jugadoras_categoria, plantel["version"]
                 )
-                if not resumen_tmp:
+                if not insights_tmp:
                     st.warning("No hay datos para el rango y categoría seleccionados.")
-                    st.session_state.resumen_cache = None
-                else:
-                    st.session_state.resumen_cache = resumen_tmp
+                st.session_state.resumen_cache = insights_tmp
             except Exception as e:
                 st.error("Error al generar el resumen.")
                 st.exception(e)
 
-    resumen_data = st.session_state.get("resumen_cache")
+    insights = st.session_state.get("resumen_cache")
 
-    if not resumen_data:
+    if not insights:
         st.info("Tocá “Actualizar insights” para ver el resumen.")
         mostrar_boton_resumen(sheet_id, fecha_desde, fecha_hasta, jugadoras_categoria)
+        mostrar_descargas(sheet_id, fecha_desde, fecha_hasta, jugadoras_categoria)
         return
 
-    entrenamientos = resumen_data["entrenamientos_por_mes"]
-    presencias = resumen_data["presencias_por_jugadora_mes"]
-    tardanzas = resumen_data["llegadas_tarde_mes"]
-    ranking = resumen_data["ranking"]
-
-    total_entrenamientos = int(entrenamientos["Entrenamientos del mes"].sum()) if not entrenamientos.empty else 0
-    total_presencias = int(presencias["Presencias"].sum()) if not presencias.empty else 0
-    total_tardanzas = int(tardanzas["Tardanzas"].sum()) if not tardanzas.empty else 0
-    top_jugadora = ranking.iloc[0]["Jugadora"] if not ranking.empty else "-"
-
-    total_jugadoras = len(jugadoras_categoria)
-
-    asistencia_promedio = round(total_presencias / total_entrenamientos, 1) if total_entrenamientos > 0 else 0
-    porcentaje_asistencia = (
-        round((total_presencias / (total_entrenamientos * total_jugadoras)) * 100, 1)
-        if total_entrenamientos > 0 and total_jugadoras > 0
-        else 0
-    )
-    porcentaje_tardanzas = round((total_tardanzas / total_presencias) * 100, 1) if total_presencias > 0 else 0
-
-    ranking_tardanzas = (
-        tardanzas.groupby("Jugadora")["Tardanzas"].sum().reset_index().sort_values("Tardanzas", ascending=False)
-        if not tardanzas.empty
-        else tardanzas
-    )
-    sin_asistencia = sorted(set(jugadoras_categoria) - set(ranking["Jugadora"])) if not ranking.empty else []
-
-    df_asistencia, total_entrenamientos_calc, ranking_presencias = _df_asistencia(
-        resumen_data, jugadoras_categoria
-    )
-    if total_entrenamientos_calc > 0:
-        total_entrenamientos = total_entrenamientos_calc
-
-    if total_entrenamientos > 0 and not ranking_presencias.empty:
-        ranking_faltas = ranking_presencias.copy()
-        ranking_faltas["Faltas"] = total_entrenamientos - ranking_faltas["Presencias"]
-        ranking_faltas = ranking_faltas.sort_values("Faltas", ascending=False)
-    else:
-        ranking_faltas = ranking_presencias
-
-    if not ranking_faltas.empty and "Faltas" in ranking_faltas.columns:
-        ranking_faltas = ranking_faltas.rename(columns={"Faltas": "Ausencias"})
-    if df_asistencia.empty:
-        top_asistencia = df_asistencia
-        bajo_asistencia = df_asistencia
-    else:
-        top_asistencia = df_asistencia.sort_values("% Asistencia", ascending=False).head(5)
-        bajo_asistencia = df_asistencia.sort_values("% Asistencia", ascending=True).head(5)
-
-    perfectas = (
-        df_asistencia[df_asistencia["% Asistencia"] >= 100]["Jugadora"].tolist()
-        if total_entrenamientos > 0
-        else []
-    )
-    en_riesgo = (
-        df_asistencia[df_asistencia["% Asistencia"] < 50]["Jugadora"].tolist()
-        if total_entrenamientos > 0
-        else []
-    )
-
-    ultimo_mes = entrenamientos["Mes"].max() if not entrenamientos.empty else None
-    entrenamientos_mes = 0
-    presencias_mes = 0
-    tardanzas_mes = 0
-    porcentaje_asistencia_mes = 0
-    if ultimo_mes is not None:
-        entrenamientos_mes = int(
-            entrenamientos[entrenamientos["Mes"] == ultimo_mes]["Entrenamientos del mes"].sum()
-        )
-        if entrenamientos_mes > 0:
-            presencias_mes = int(presencias[presencias["Mes"] == ultimo_mes]["Presencias"].sum()) if not presencias.empty else 0
-            tardanzas_mes = int(tardanzas[tardanzas["Mes"] == ultimo_mes]["Tardanzas"].sum()) if not tardanzas.empty else 0
-            porcentaje_asistencia_mes = (
-                round((presencias_mes / (entrenamientos_mes * total_jugadoras)) * 100, 1)
-                if total_jugadoras > 0
-                else 0
-            )
-
-    mejor_mes = None
-    peor_mes = None
-    if total_jugadoras > 0 and not entrenamientos.empty:
-        entrenamientos_mes_total = entrenamientos.set_index("Mes")["Entrenamientos del mes"]
-        presencias_mes_total = presencias.groupby("Mes")["Presencias"].sum() if not presencias.empty else None
-        if presencias_mes_total is not None:
-            asistencia_mes_pct = (presencias_mes_total / (entrenamientos_mes_total * total_jugadoras) * 100).dropna()
-            if not asistencia_mes_pct.empty:
-                mejor_mes = asistencia_mes_pct.idxmax()
-                peor_mes = asistencia_mes_pct.idxmin()
+    ultimo_mes = insights["ultimo_mes"]
+    perfectas = insights["perfectas"]
+    en_riesgo = insights["en_riesgo"]
+    mejor_mes = insights["mejor_mes"]
+    peor_mes = insights["peor_mes"]
+    ranking = insights["ranking"]
+    ranking_faltas = insights["ranking_faltas"]
+    ranking_tardanzas = insights["ranking_tardanzas"]
+    top_asistencia = insights["top_asistencia"]
+    bajo_asistencia = insights["bajo_asistencia"]
+    sin_asistencia = insights["sin_asistencia"]
 
     _render_metrics(
         [
-            ("Entrenamientos", total_entrenamientos),
-            ("Presencias", total_presencias),
-            ("Tardanzas", total_tardanzas),
+            ("Entrenamientos", insights["total_entrenamientos"]),
+            ("Presencias", insights["total_presencias"]),
+            ("Tardanzas", insights["total_tardanzas"]),
         ]
     )
 
     _render_metrics(
         [
-            ("Asistencia promedio", asistencia_promedio),
-            ("% asistencia del plantel", f"{porcentaje_asistencia}%"),
-            ("% tardanzas vs presencias", f"{porcentaje_tardanzas}%"),
+            ("Asistencia promedio", insights["asistencia_promedio"]),
+            ("% asistencia del plantel", f"{insights['porcentaje_asistencia']}%"),
+            ("% tardanzas vs presencias", f"{insights['porcentaje_tardanzas']}%"),
         ]
     )
 
     _render_metrics(
         [
-            ("Último mes (% asistencia)", f"{porcentaje_asistencia_mes}%"),
+            ("Último mes (% asistencia)", f"{ultimo_mes['porcentaje']}%"),
             ("Perfectas", len(perfectas)),
             ("Baja asistencia (<50%)", len(en_riesgo)),
         ]
     )
 
     st.markdown('<div class="section-title">Top jugadora</div>', unsafe_allow_html=True)
-    st.markdown(f"**{top_jugadora}**", unsafe_allow_html=True)
+    st.markdown(f"**{insights['top_jugadora']}**", unsafe_allow_html=True)
 
     if mejor_mes or peor_mes:
         st.markdown('<div class="section-title">Meses clave</div>', unsafe_allow_html=True)
@@ -308,7 +281,7 @@ def mostrar_resumen_insights(sheet_id):
         st.caption("Sin datos para calcular faltas.")
 
     st.markdown('<div class="section-title">Tardanzas (Top 5)</div>', unsafe_allow_html=True)
-    if ranking_tardanzas is not None and not ranking_tardanzas.empty:
+    if not ranking_tardanzas.empty:
         st.dataframe(ranking_tardanzas.head(5), use_container_width=True, hide_index=True)
     else:
         st.caption("Sin datos de tardanzas.")
@@ -326,6 +299,7 @@ def mostrar_resumen_insights(sheet_id):
         st.caption(_listar_nombres(en_riesgo))
 
     mostrar_boton_resumen(sheet_id, fecha_desde, fecha_hasta, jugadoras_categoria)
+    mostrar_descargas(sheet_id, fecha_desde, fecha_hasta, jugadoras_categoria)
 
 
 def generar_y_exportar_resumen(sheet_id, fecha_desde=None, fecha_hasta=None, jugadoras_filtro=None):
@@ -340,18 +314,9 @@ def generar_y_exportar_resumen(sheet_id, fecha_desde=None, fecha_hasta=None, jug
         st.warning("No hay suficientes datos para generar el resumen.")
         return
 
-    spreadsheet = resumen_data["spreadsheet"]
-
-    try:
-        resumen_ws = spreadsheet.worksheet("Resumen")
-        resumen_ws.clear()
-    except gspread.exceptions.WorksheetNotFound:
-        resumen_ws = spreadsheet.add_worksheet(title="Resumen", rows="200", cols="20")
-
-    fila = 1
-    fila = exportar_df_a_hoja(resumen_ws, resumen_data["entrenamientos_por_mes"], fila)
-    fila = exportar_df_a_hoja(resumen_ws, resumen_data["presencias_por_jugadora_mes"], fila)
-    fila = exportar_df_a_hoja(resumen_ws, resumen_data["llegadas_tarde_mes"], fila)
-    exportar_df_a_hoja(resumen_ws, resumen_data["ranking"], fila)
+    filas_escritas = escribir_resumen(sheet_id, [resumen_data[bloque] for bloque in BLOQUES_RESUMEN])
 
+    if filas_escritas == 0:
+        st.info("La hoja 'Resumen' ya estaba actualizada.")
+        return
     st.success("Resumen generado en la hoja 'Resumen'")
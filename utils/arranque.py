@@ -0,0 +1,90 @@
+# utils/arranque.py
+import importlib
+import subprocess
+import sys
+import threading
+import time
+
+# Importación diferida de los módulos pesados (pandas, gspread, oauth2client llegan con ellos) y registro
+# de cuánto costó cada uno. La pantalla de login solo necesita Streamlit; el resto se importa en segundo
+# plano mientras el entrenador escribe la clave, o al abrir la pestaña que lo usa.
+#   python -m utils.arranque     # costo de importación de cada módulo, medido con -X importtime
+
+INICIO = time.perf_counter()
+MODULOS_PESADOS = ["config", "services.precarga", "ui.registro", "ui.resumen", "ui.admin"]
+
+_lock = threading.Lock()
+# modulo -> {"seg": duración, "desde_inicio": seg desde que arrancó el proceso, "hilo": nombre}
+_tiempos = {}
+_precarga = None
+
+
+def importar(nombre):
+    # import_module espera si otro hilo está a mitad de importar el mismo módulo.
+    if nombre in sys.modules:
+        return importlib.import_module(nombre)
+    inicio = time.perf_counter()
+    modulo = importlib.import_module(nombre)
+    fin = time.perf_counter()
+    with _lock:
+        _tiempos.setdefault(
+            nombre,
+            {"seg": fin - inicio, "desde_inicio": fin - INICIO, "hilo": threading.current_thread().name},
+        )
+    return modulo
+
+
+def precargar_en_segundo_plano(nombres=None):
+    # Una sola vez por proceso; las sesiones siguientes ya encuentran todo importado.
+    global _precarga
+    with _lock:
+        if _precarga is not None:
+            return _precarga
+
+        def precargar():
+            for nombre in nombres or MODULOS_PESADOS:
+                importar(nombre)
+
+        _precarga = threading.Thread(target=precargar, name="precarga-modulos", daemon=True)
+        _precarga.start()
+        return _precarga
+
+
+def tiempos():
+    with _lock:
+        return dict(_tiempos)
+
+
+def medir_importaciones(modulos=None, minimo_ms=20):
+    # Importa cada módulo en un intérprete limpio después de Streamlit (como la app) y devuelve
+    # [(modulo, propio_ms, acumulado_ms)] de lo que se suma a Streamlit, de mayor a menor.
+    resultados = {}
+    for raiz in modulos or MODULOS_PESADOS:
+        salida = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import streamlit; import {raiz}"],
+            capture_output=True,
+            text=True,
+        ).stderr
+        despues_de_streamlit = False
+        for linea in salida.splitlines():
+            partes = linea.removeprefix("import time:").split("|")
+            if len(partes) != 3 or not partes[0].strip().isdigit():
+                continue
+            propio, acumulado, nombre = int(partes[0]), int(partes[1]), partes[2].strip()
+            if not despues_de_streamlit:
+                # Lo que importa Streamlit ya lo paga la pantalla de login.
+                despues_de_streamlit = nombre == "streamlit"
+                continue
+            resultados.setdefault(nombre, (propio / 1000, acumulado / 1000))
+    return sorted(((m, p, a) for m, (p, a) in resultados.items() if a >= minimo_ms), key=lambda r: -r[2])
+
+
+def main():
+    print(f"{'módulo':<48} {'propio ms':>10} {'acumulado ms':>13}")
+    for modulo, propio, acumulado in medir_importaciones():
+        print(f"{modulo:<48} {propio:>10.1f} {acumulado:>13.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,6 @@
 # utils/helpers.py
+import pandas as pd
+
 
 def normalizar_asistio(valor: str) -> str:
     return valor.strip().upper() if valor else "NO"
@@ -11,3 +13,22 @@ def limpiar_texto(texto: str) -> str:
 
 def to_str_fecha(fecha) -> str:
     return fecha.strftime("%Y-%m-%d")
+
+def normalizar_texto(value: str) -> str:
+    return value.strip().lower().replace("ó", "o")
+
+def indices_columnas(encabezados, requeridas) -> dict:
+    encabezados_norm = [normalizar_texto(e) for e in encabezados]
+    indices = {}
+    for col in requeridas:
+        col_norm = normalizar_texto(col)
+        if col_norm not in encabezados_norm:
+            raise ValueError(col)
+        indices[col] = encabezados_norm.index(col_norm)
+    return indices
+
+def parsear_fechas(valores) -> pd.Series:
+    # Siempre ISO (como las escribe la app): el resultado de cada fecha no depende de las demás del lote,
+    # así una fila cae en el mismo mes la lea el snapshot de a tandas o la reparta la migración.
+    valores = pd.Series([str(v).strip() for v in valores], dtype="object")
+    return pd.to_datetime(valores, format="ISO8601", errors="coerce")